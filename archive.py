@@ -0,0 +1,160 @@
+# archive.py
+import asyncio
+import gzip
+import json
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+
+from metrics import REGISTRY
+
+ARCHIVED_EVENTS = REGISTRY.counter("bot_events_archived_total", "Eventos terminados movidos al archivo")
+ARCHIVE_SECONDS = REGISTRY.histogram("bot_archive_seconds", "Duración de cada pasada de archivado")
+
+_PARTITION_RE = re.compile(r"eventos-(\d{4}-\d{2}|sin-fecha)\.jsonl\.gz")
+
+
+# -----------------------------
+# ARCHIVO MENSUAL (GZIP JSONL)
+# -----------------------------
+class EventArchive:
+    """Eventos terminados en un fichero gzip JSONL por mes (eventos-2026-05.jsonl.gz).
+
+    Cada lote se añade como un miembro gzip más (modo "ab"), así archivar no
+    reescribe lo anterior. Los meses solo se leen cuando una consulta de
+    historial los pide y se guardan en una caché LRU pequeña que se invalida
+    si el fichero cambia.
+    """
+
+    def __init__(self, directory, cache_months=6):
+        self.directory = directory
+        self.cache_months = cache_months
+        self._cache = OrderedDict()  # mes -> (mtime_ns, tamaño, eventos)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def month_of(event):
+        start = event.get("start")
+        return start[:7] if isinstance(start, str) and len(start) >= 7 else "sin-fecha"
+
+    def path(self, month):
+        return os.path.join(self.directory, f"eventos-{month}.jsonl.gz")
+
+    def months(self):
+        """Meses con archivo, del más reciente al más antiguo (sin leerlos)"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted((m.group(1) for m in map(_PARTITION_RE.fullmatch, names) if m), reverse=True)
+
+    # -----------------------------
+    # ESCRITURA
+    # -----------------------------
+    def append(self, events):
+        """Añade eventos (dicts de to_dict) a su mes; vuelve cuando están en disco"""
+        by_month = {}
+        for event in events:
+            by_month.setdefault(self.month_of(event), []).append(event)
+
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            for month, month_events in by_month.items():
+                payload = "".join(json.dumps(e, ensure_ascii=False, default=str) + "\n" for e in month_events)
+                with open(self.path(month), "ab") as raw:
+                    with gzip.GzipFile(fileobj=raw, mode="ab") as f:
+                        f.write(payload.encode())
+                    raw.flush()
+                    os.fsync(raw.fileno())
+                self._cache.pop(month, None)
+        return len(events)
+
+    # -----------------------------
+    # LECTURA PEREZOSA
+    # -----------------------------
+    def load(self, month):
+        """Eventos archivados de un mes; si un id aparece dos veces gana la última copia"""
+        path = self.path(month)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return []
+        with self._lock:
+            cached = self._cache.get(month)
+            if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._cache.move_to_end(month)
+                return cached[2]
+
+        by_id = {}
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    event = json.loads(line)
+                    by_id[str(event["id"])] = event
+        events = sorted(by_id.values(), key=lambda e: e.get("start") or "")
+
+        with self._lock:
+            self._cache[month] = (stat.st_mtime_ns, stat.st_size, events)
+            self._cache.move_to_end(month)
+            while len(self._cache) > self.cache_months:
+                self._cache.popitem(last=False)
+        return events
+
+
+# -----------------------------
+# ESTADÍSTICAS
+# -----------------------------
+def archive_stats(events, skip=("DECLINADO",)):
+    """Totales de un conjunto de eventos archivados: inscripciones por rol y asistentes más activos"""
+    by_role = Counter()
+    attendees = Counter()
+    for event in events:
+        seen = set()
+        for role, user_ids in (event.get("participants_roles") or {}).items():
+            by_role[role] += len(user_ids)
+            if role not in skip:
+                seen.update(user_ids)
+        attendees.update(seen)
+    return {
+        "events": len(events),
+        "signups": sum(n for role, n in by_role.items() if role not in skip),
+        "by_role": dict(by_role.most_common()),
+        "top_attendees": attendees.most_common(5),
+    }
+
+
+# -----------------------------
+# TAREA PERIÓDICA
+# -----------------------------
+class RetentionJob:
+    """Llama a `callback` cada `interval` segundos (la primera vez, al arrancar)"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self, callback):
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run(callback))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, callback):
+        while True:
+            try:
+                with ARCHIVE_SECONDS.time():
+                    moved = await callback()
+                if moved:
+                    ARCHIVED_EVENTS.inc(moved)
+                    print(f"🗄️ {moved} evento(s) terminados movidos al archivo")
+            except Exception as e:
+                print(f"❌ Error al archivar eventos: {e}")
+            await asyncio.sleep(self.interval)
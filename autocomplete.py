@@ -0,0 +1,80 @@
+# autocomplete.py
+import bisect
+import unicodedata
+
+# Discord acepta como mucho 25 opciones por autocompletado
+MAX_CHOICES = 25
+
+
+def normalize(text):
+    """Clave de búsqueda: minúsculas, sin tildes ni símbolos iniciales ("📅-Eventos" -> "eventos")"""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    start = 0
+    while start < len(text) and not text[start].isalnum():
+        start += 1
+    return text[start:] or text
+
+
+# -----------------------------
+# ÍNDICE POR PREFIJO
+# -----------------------------
+class PrefixIndex:
+    """Nombres ordenados para buscar por prefijo con bisect en O(log n + k).
+
+    Sustituye a los listados completos de guild.channels / guild.roles: el
+    autocompletado y el asistente por DM solo piden las k primeras
+    coincidencias, así que responden igual de rápido en servidores grandes.
+    """
+
+    def __init__(self, items=()):
+        self._names = dict(items)  # id -> nombre original
+        self._keys = sorted((normalize(name), item_id) for item_id, name in self._names.items())  # [(clave, id)]
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, item_id):
+        return item_id in self._names
+
+    def name(self, item_id):
+        return self._names.get(item_id)
+
+    def add(self, item_id, name):
+        """Añade o renombra una entrada"""
+        if self._names.get(item_id) == name:
+            return
+        self.remove(item_id)
+        self._names[item_id] = name
+        bisect.insort(self._keys, (normalize(name), item_id))
+
+    def remove(self, item_id):
+        name = self._names.pop(item_id, None)
+        if name is None:
+            return
+        entry = (normalize(name), item_id)
+        i = bisect.bisect_left(self._keys, entry)
+        if i < len(self._keys) and self._keys[i] == entry:
+            del self._keys[i]
+
+    def iter_prefix(self, prefix):
+        """Ids cuyo nombre empieza por `prefix`, en orden alfabético"""
+        key = normalize(prefix) if prefix else ""
+        i = bisect.bisect_left(self._keys, (key,))
+        while i < len(self._keys) and self._keys[i][0].startswith(key):
+            yield self._keys[i][1]
+            i += 1
+
+    def search(self, prefix, limit=MAX_CHOICES):
+        """Hasta `limit` pares (id, nombre) que empiezan por `prefix`"""
+        results = []
+        for item_id in self.iter_prefix(prefix):
+            results.append((item_id, self._names[item_id]))
+            if len(results) >= limit:
+                break
+        return results
+
+    def best(self, text):
+        """Id con ese nombre exacto o, si no hay, la primera coincidencia por prefijo"""
+        # El nombre exacto es la clave más corta con ese prefijo: va primero
+        return next(self.iter_prefix(text), None)
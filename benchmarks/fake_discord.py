@@ -0,0 +1,405 @@
+# benchmarks/fake_discord.py
+"""Imitación local de la API REST y del gateway de Discord para simulaciones de carga.
+
+Implementa solo lo que usa el bot (login, READY/GUILD_CREATE, interacciones,
+mensajes, hilos, DMs y sincronización de comandos) y aplica buckets de rate
+limit parecidos a los reales, con sus cabeceras X-RateLimit-* y respuestas 429.
+"""
+import asyncio
+import itertools
+import json
+import re
+import time
+from datetime import datetime, timezone
+
+from aiohttp import web, WSMsgType
+
+API_PREFIX = "/api/v10"
+HEARTBEAT_INTERVAL_MS = 41250
+
+# (método, patrón de ruta, parámetro mayor, límite, ventana en s, cuenta en el límite global)
+# Valores aproximados a los que devuelve Discord; las callbacks de interacción no tienen límite.
+RATE_LIMITS = [
+    ("POST", r"/interactions/(\d+)/[^/]+/callback", None, None, None, False),
+    ("POST", r"/channels/(\d+)/messages", "channel", 5, 5.0, True),
+    ("PATCH", r"/channels/(\d+)/messages/\d+", "channel", 5, 5.0, True),
+    ("DELETE", r"/channels/(\d+)/messages/\d+", "channel", 5, 1.0, True),
+    ("POST", r"/channels/(\d+)/threads", "channel", 5, 10.0, True),
+    ("POST", r"/users/@me/channels", None, 10, 1.0, True),
+    (None, r"/webhooks/\d+/([^/]+).*", "token", 5, 2.0, False),
+    (None, r".*", None, 50, 1.0, True),
+]
+GLOBAL_LIMIT = 50  # peticiones por segundo
+
+
+def json_response(body, status=200, headers=None):
+    # discord.py solo decodifica si el Content-Type es exactamente application/json (sin charset)
+    headers = dict(headers or {}, **{"Content-Type": "application/json"})
+    return web.Response(body=json.dumps(body).encode(), status=status, headers=headers)
+
+
+def route_template(path):
+    """/channels/123.../messages -> /channels/{id}/messages (para agrupar las estadísticas)"""
+    return re.sub(r"\d{15,}", "{id}", re.sub(r"tok\d+", "{token}", path))
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class Bucket:
+    __slots__ = ("name", "limit", "window", "remaining", "reset_at")
+
+    def __init__(self, name, limit, window):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.remaining = limit
+        self.reset_at = 0.0
+
+    def take(self, now):
+        """Consume una petición; devuelve los segundos de espera si no quedan (429)"""
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.window
+        if self.remaining <= 0:
+            return self.reset_at - now
+        self.remaining -= 1
+        return 0.0
+
+    def headers(self, now):
+        reset_after = max(0.0, self.reset_at - now)
+        return {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": f"{time.time() + reset_after:.3f}",
+            "X-RateLimit-Reset-After": f"{reset_after:.3f}",
+            "X-RateLimit-Bucket": self.name,
+        }
+
+
+# -----------------------------
+# SERVIDOR FALSO
+# -----------------------------
+class FakeDiscord:
+    def __init__(self, members=200, channels=10, roles=10, token="simulacion"):
+        self._ids = itertools.count(int(time.time() * 1000 - 1420070400000) << 22)
+        self.token = token
+        self.bot_user = self.user_payload(self.next_id(), "bot-eventos", bot=True)
+        self.application_id = self.bot_user["id"]
+        self.guild_id = self.next_id()
+        self.users = [self.user_payload(self.next_id(), f"miembro-{i}") for i in range(members)]
+        self.channels = [
+            {"id": self.next_id(), "type": 0, "name": f"canal-{i}", "position": i, "guild_id": self.guild_id,
+             "permission_overwrites": [], "nsfw": False, "parent_id": None, "topic": None,
+             "last_message_id": None, "rate_limit_per_user": 0}
+            for i in range(channels)
+        ]
+        self.roles = [self.role_payload(self.guild_id, "@everyone", 0)] + [
+            self.role_payload(self.next_id(), f"rol-{i}", i + 1) for i in range(roles)
+        ]
+
+        # Estadísticas
+        self.rest_calls = 0
+        self.rest_by_route = {}
+        self.rate_limited = 0
+        self.ack_times = []  # segundos entre INTERACTION_CREATE y su callback
+        self._interaction_sent = {}  # id de interacción -> time.perf_counter() al enviarla
+
+        # DMs: canal -> usuario, y quién espera los mensajes del bot en cada DM
+        self.dm_channels = {}
+        self.dm_listeners = {}  # dm_channel_id -> función(contenido)
+
+        self._buckets = {}
+        self._global = Bucket("global", GLOBAL_LIMIT, 1.0)
+        self._ws = None
+        self._seq = itertools.count(1)
+        self._send_lock = asyncio.Lock()
+        self.ready = asyncio.Event()
+        self.app = web.Application()
+        self.app.router.add_route("*", API_PREFIX + "/{tail:.*}", self.handle_rest)
+        self.app.router.add_get("/gateway", self.handle_gateway)
+        self._runner = None
+        self.port = None
+
+    # -----------------------------
+    # PAYLOADS
+    # -----------------------------
+    def next_id(self):
+        return str(next(self._ids))
+
+    @staticmethod
+    def user_payload(user_id, name, bot=False):
+        return {"id": user_id, "username": name, "discriminator": "0", "global_name": name,
+                "avatar": None, "bot": bot, "public_flags": 0}
+
+    @staticmethod
+    def role_payload(role_id, name, position):
+        return {"id": role_id, "name": name, "color": 0, "hoist": False, "position": position,
+                "permissions": "8" if position == 0 else "0", "managed": False,
+                "mentionable": True, "flags": 0}
+
+    def member_payload(self, user):
+        return {"user": user, "roles": [], "joined_at": now_iso(), "deaf": False, "mute": False,
+                "flags": 0, "nick": None, "avatar": None, "pending": False, "permissions": "8"}
+
+    def message_payload(self, channel_id, content=None, embeds=None, components=None, author=None, message_id=None):
+        return {
+            "id": message_id or self.next_id(), "channel_id": channel_id, "author": author or self.bot_user,
+            "content": content or "", "timestamp": now_iso(), "edited_timestamp": None, "tts": False,
+            "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [],
+            "embeds": embeds or [], "pinned": False, "type": 0, "components": components or [], "flags": 0,
+        }
+
+    def guild_payload(self):
+        members = [self.member_payload(u) for u in [self.bot_user, *self.users]]
+        return {
+            "id": self.guild_id, "name": "Servidor de simulación", "icon": None, "owner_id": self.users[0]["id"],
+            "roles": self.roles, "emojis": [], "stickers": [], "features": [], "member_count": len(members),
+            "members": members, "channels": self.channels, "threads": [], "presences": [], "voice_states": [],
+            "large": False, "unavailable": False, "afk_timeout": 300, "verification_level": 0,
+            "default_message_notifications": 0, "explicit_content_filter": 0, "mfa_level": 0,
+            "system_channel_flags": 0, "premium_tier": 0, "preferred_locale": "es-ES", "nsfw_level": 0,
+            "joined_at": now_iso(), "application_id": None, "stage_instances": [],
+            "guild_scheduled_events": [], "soundboard_sounds": [],
+        }
+
+    # -----------------------------
+    # ARRANQUE
+    # -----------------------------
+    async def start(self, host="127.0.0.1", port=0):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._ws is not None:
+            await self._ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def reset_stats(self):
+        self.rest_calls = 0
+        self.rest_by_route = {}
+        self.rate_limited = 0
+        self.ack_times = []
+
+    # -----------------------------
+    # RATE LIMITS
+    # -----------------------------
+    def _bucket_for(self, method, path):
+        for rule_method, pattern, major, limit, window, is_global in RATE_LIMITS:
+            if rule_method not in (None, method):
+                continue
+            match = re.fullmatch(pattern, path)
+            if not match:
+                continue
+            if limit is None:
+                return None, is_global
+            key = f"{rule_method or '*'} {pattern}"
+            if major and match.groups():
+                key += f" {match.group(1)}"
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = Bucket(f"b{len(self._buckets)}", limit, window)
+            return bucket, is_global
+        return None, False
+
+    # -----------------------------
+    # REST
+    # -----------------------------
+    async def handle_rest(self, request):
+        path = "/" + request.match_info["tail"]
+        method = request.method
+        now = time.monotonic()
+        bucket, is_global = self._bucket_for(method, path)
+
+        self.rest_calls += 1
+        route_key = f"{method} {route_template(path)}"
+        self.rest_by_route[route_key] = self.rest_by_route.get(route_key, 0) + 1
+
+        retry_after = self._global.take(now) if is_global else 0.0
+        scope = "global" if retry_after else "user"
+        if not retry_after and bucket is not None:
+            retry_after = bucket.take(now)
+        if retry_after:
+            self.rate_limited += 1
+            # Sin "Via" discord.py lo toma por un bloqueo de Cloudflare y no reintenta
+            headers = {"Retry-After": f"{retry_after:.3f}", "X-RateLimit-Scope": scope, "Via": "1.1 google"}
+            if scope == "global":
+                headers["X-RateLimit-Global"] = "true"
+            elif bucket is not None:
+                headers.update(bucket.headers(now))
+            body = {"message": "You are being rate limited.", "retry_after": round(retry_after, 3),
+                    "global": scope == "global"}
+            return json_response(body, 429, headers)
+
+        payload = await self._read_json(request)
+        status, body = await self.route(method, path, payload)
+        headers = bucket.headers(now) if bucket is not None else {}
+        if status == 204:
+            return web.Response(status=204, headers=headers)
+        return json_response(body, status, headers)
+
+    @staticmethod
+    async def _read_json(request):
+        if not request.can_read_body:
+            return {}
+        if request.content_type == "multipart/form-data":
+            reader = await request.multipart()
+            async for part in reader:
+                if part.name == "payload_json":
+                    return json.loads(await part.text())
+            return {}
+        try:
+            return await request.json()
+        except ValueError:
+            return {}
+
+    async def route(self, method, path, payload):
+        m = re.fullmatch
+        if method == "GET" and path == "/users/@me":
+            return 200, self.bot_user
+        if method == "GET" and path == "/oauth2/applications/@me":
+            return 200, {
+                "id": self.application_id, "name": "bot-eventos", "description": "", "icon": None,
+                "bot_public": True, "bot_require_code_grant": False, "owner": self.users[0],
+                "verify_key": "0" * 64, "flags": 0, "interactions_endpoint_url": None,
+            }
+        if method == "GET" and path in ("/gateway", "/gateway/bot"):
+            return 200, {"url": f"ws://127.0.0.1:{self.port}/gateway", "shards": 1,
+                         "session_start_limit": {"total": 1000, "remaining": 1000,
+                                                 "reset_after": 0, "max_concurrency": 1}}
+        if method == "PUT" and m(r"/applications/\d+(/guilds/\d+)?/commands", path):
+            return 200, [dict(cmd, id=self.next_id(), application_id=self.application_id, version=self.next_id(),
+                              default_member_permissions=None, dm_permission=True, nsfw=False)
+                         for cmd in payload or []]
+        if method == "POST" and (match := m(r"/interactions/(\d+)/[^/]+/callback", path)):
+            sent = self._interaction_sent.pop(match.group(1), None)
+            if sent is not None:
+                self.ack_times.append(time.perf_counter() - sent)
+            data = payload.get("data") or {}
+            return 200, {"interaction": {
+                "id": match.group(1), "type": 3,
+                "response_message_loading": payload.get("type") == 5,
+                "response_message_ephemeral": bool((data.get("flags") or 0) & 64),
+            }}
+        if (match := m(r"/webhooks/\d+/[^/]+(/messages/(@original|\d+))?", path)):
+            if method == "DELETE":
+                return 204, None
+            data = payload.get("data", payload) if isinstance(payload, dict) else {}
+            return 200, self.message_payload(self.channels[0]["id"], data.get("content"), data.get("embeds"))
+        if method == "POST" and (match := m(r"/channels/(\d+)/messages", path)):
+            channel_id = match.group(1)
+            listener = self.dm_listeners.get(channel_id)
+            if listener is not None:
+                listener(payload.get("content") or "")
+            return 200, self.message_payload(channel_id, payload.get("content"), payload.get("embeds"),
+                                             payload.get("components"))
+        if method == "PATCH" and (match := m(r"/channels/(\d+)/messages/(\d+)", path)):
+            return 200, self.message_payload(match.group(1), payload.get("content"), payload.get("embeds"),
+                                             payload.get("components"), message_id=match.group(2))
+        if method == "DELETE" and m(r"/channels/\d+/messages/\d+", path):
+            return 204, None
+        if method == "POST" and (match := m(r"/channels/(\d+)/threads", path)):
+            return 201, {
+                "id": self.next_id(), "type": payload.get("type", 11), "name": payload.get("name", "hilo"),
+                "guild_id": self.guild_id, "parent_id": match.group(1), "owner_id": self.bot_user["id"],
+                "message_count": 0, "member_count": 1, "rate_limit_per_user": 0, "flags": 0,
+                "thread_metadata": {"archived": False, "auto_archive_duration": 1440,
+                                    "archive_timestamp": now_iso(), "locked": False},
+            }
+        if method == "POST" and path == "/users/@me/channels":
+            recipient = next((u for u in self.users if u["id"] == str(payload.get("recipient_id"))), None)
+            recipient = recipient or self.user_payload(str(payload.get("recipient_id")), "desconocido")
+            channel_id = self.dm_channel_for(recipient["id"])
+            return 200, {"id": channel_id, "type": 1, "recipients": [recipient], "last_message_id": None}
+        return 200, {}
+
+    def dm_channel_for(self, user_id):
+        for channel_id, uid in self.dm_channels.items():
+            if uid == user_id:
+                return channel_id
+        channel_id = self.next_id()
+        self.dm_channels[channel_id] = user_id
+        return channel_id
+
+    # -----------------------------
+    # GATEWAY
+    # -----------------------------
+    async def handle_gateway(self, request):
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        self._ws = ws
+        await ws.send_json({"op": 10, "d": {"heartbeat_interval": HEARTBEAT_INTERVAL_MS}})
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            data = json.loads(msg.data)
+            op = data.get("op")
+            if op == 1:
+                await ws.send_json({"op": 11})
+            elif op == 2:
+                await self._identify(ws)
+        self._ws = None
+        return ws
+
+    async def _identify(self, ws):
+        await self.dispatch("READY", {
+            "v": 10, "user": self.bot_user, "guilds": [{"id": self.guild_id, "unavailable": True}],
+            "session_id": "simulacion", "resume_gateway_url": f"ws://127.0.0.1:{self.port}/gateway",
+            "application": {"id": self.application_id, "flags": 0}, "shard": [0, 1],
+            "private_channels": [], "relationships": [], "user_settings": {},
+        })
+        await self.dispatch("GUILD_CREATE", self.guild_payload())
+        self.ready.set()
+
+    async def dispatch(self, event, data):
+        async with self._send_lock:
+            await self._ws.send_json({"op": 0, "t": event, "s": next(self._seq), "d": data})
+
+    # -----------------------------
+    # INYECTAR ACCIONES DE USUARIOS
+    # -----------------------------
+    def _interaction_base(self, user, kind, data, channel_id, message=None):
+        interaction_id = self.next_id()
+        payload = {
+            "id": interaction_id, "application_id": self.application_id, "type": kind, "data": data,
+            "guild_id": self.guild_id, "channel_id": channel_id,
+            "channel": {"id": channel_id, "type": 0, "guild_id": self.guild_id, "name": "canal",
+                        "position": 0, "permission_overwrites": [], "nsfw": False, "parent_id": None},
+            "member": self.member_payload(user), "token": f"tok{interaction_id}", "version": 1,
+            "locale": "es-ES", "guild_locale": "es-ES", "app_permissions": "8", "entitlements": [],
+            "authorizing_integration_owners": {"0": self.guild_id}, "context": 0,
+            "attachment_size_limit": 8388608,
+        }
+        if message is not None:
+            payload["message"] = message
+        return interaction_id, payload
+
+    async def click(self, user, message, custom_id):
+        """Clic en un botón del mensaje `message` (payload devuelto al publicarlo)"""
+        interaction_id, payload = self._interaction_base(
+            user, 3, {"custom_id": custom_id, "component_type": 2}, message["channel_id"], message)
+        self._interaction_sent[interaction_id] = time.perf_counter()
+        await self.dispatch("INTERACTION_CREATE", payload)
+
+    async def slash(self, user, name, channel_id, options=()):
+        """Comando de barra con opciones de texto [(nombre, valor), ...]"""
+        data = {"id": self.next_id(), "name": name, "type": 1, "guild_id": self.guild_id,
+                "options": [{"name": k, "type": 3, "value": v} for k, v in options]}
+        interaction_id, payload = self._interaction_base(user, 2, data, channel_id)
+        self._interaction_sent[interaction_id] = time.perf_counter()
+        await self.dispatch("INTERACTION_CREATE", payload)
+
+    async def direct_message(self, user, content):
+        channel_id = self.dm_channel_for(user["id"])
+        message = self.message_payload(channel_id, content, author=user)
+        await self.dispatch("MESSAGE_CREATE", message)
@@ -0,0 +1,157 @@
+# benchmarks/fakes.py
+import itertools
+
+# -----------------------------
+# OBJETOS DE DISCORD SIMULADOS
+# -----------------------------
+# Lo mínimo que usa main.py de Guild, Member, TextChannel e Interaction, sin
+# red: los envíos solo devuelven mensajes falsos y cuentan las llamadas.
+_ids = itertools.count(10**17)
+
+
+def next_id():
+    return next(_ids)
+
+
+class FakeMessage:
+    def __init__(self, channel, message_id=None, content=None, embed=None):
+        self.id = message_id or next_id()
+        self.channel = channel
+        self.content = content
+        self.embed = embed
+
+    async def edit(self, **kwargs):
+        self.channel.calls["edit"] += 1
+        self.embed = kwargs.get("embed", self.embed)
+        return self
+
+    async def delete(self):
+        self.channel.calls["delete"] += 1
+
+
+class FakeDMChannel:
+    def __init__(self, user):
+        self.id = next_id()
+        self.recipient = user
+        self.sent = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+        return FakeMessage(self, content=content)
+
+
+class FakeMember:
+    def __init__(self, guild, member_id, name):
+        self.id = member_id
+        self.guild = guild
+        self.name = name
+        self.display_name = name
+        self.bot = False
+        self.dm_channel = None
+
+    @property
+    def mention(self):
+        return f"<@{self.id}>"
+
+    async def create_dm(self):
+        if self.dm_channel is None:
+            self.dm_channel = FakeDMChannel(self)
+        return self.dm_channel
+
+
+class FakeRole:
+    def __init__(self, guild, role_id, name):
+        self.id = role_id
+        self.guild = guild
+        self.name = name
+        self.managed = False
+
+    def is_default(self):
+        return False
+
+
+class FakeTextChannel:
+    def __init__(self, guild, channel_id, name):
+        self.id = channel_id
+        self.guild = guild
+        self.name = name
+        self.calls = {"send": 0, "edit": 0, "delete": 0, "thread": 0}
+        self.threads = []
+
+    async def send(self, content=None, embed=None, view=None, **kwargs):
+        self.calls["send"] += 1
+        return FakeMessage(self, content=content, embed=embed)
+
+    def get_partial_message(self, message_id):
+        return FakeMessage(self, message_id)
+
+    async def create_thread(self, name, type=None, **kwargs):
+        self.calls["thread"] += 1
+        thread = FakeTextChannel(self.guild, next_id(), name)
+        self.guild.threads[thread.id] = thread
+        self.threads.append(thread)
+        return thread
+
+
+class FakeGuild:
+    def __init__(self, guild_id, members=0, channels=50, roles=50):
+        self.id = guild_id
+        self.members = [FakeMember(self, next_id(), f"miembro-{i}") for i in range(members)]
+        self.text_channels = [FakeTextChannel(self, next_id(), f"canal-{i}") for i in range(channels)]
+        self.channels = list(self.text_channels)
+        self.roles = [FakeRole(self, next_id(), f"rol-{i}") for i in range(roles)]
+        self.threads = {}
+        self._members = {m.id: m for m in self.members}
+
+    def get_member(self, member_id):
+        return self._members.get(member_id)
+
+
+# -----------------------------
+# INTERACCIONES
+# -----------------------------
+class FakeResponse:
+    def __init__(self):
+        self._done = False
+        self.calls = []
+
+    def is_done(self):
+        return self._done
+
+    async def _respond(self, kind, **kwargs):
+        self._done = True
+        self.calls.append(kind)
+
+    async def defer(self, **kwargs):
+        await self._respond("defer", **kwargs)
+
+    async def edit_message(self, **kwargs):
+        await self._respond("edit_message", **kwargs)
+
+    async def send_message(self, *args, **kwargs):
+        await self._respond("send_message", **kwargs)
+
+    async def send_modal(self, modal):
+        await self._respond("send_modal")
+
+
+class FakeFollowup:
+    def __init__(self):
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+
+
+class FakeInteraction:
+    def __init__(self, user, message=None, channel=None):
+        self.user = user
+        self.message = message
+        self.channel = channel
+        self.channel_id = channel.id if channel else None
+        self.guild_id = user.guild.id
+        self.response = FakeResponse()
+        self.followup = FakeFollowup()
+
+    async def edit_original_response(self, **kwargs):
+        return self.message
@@ -0,0 +1,253 @@
+# benchmarks/run.py
+"""Micro-benchmarks de las rutas calientes del bot, sin conexión a Discord.
+
+Uso:
+    python benchmarks/run.py [--members 10000] [--events 5000] [--output resultados.json]
+
+Importa main.py con una base de datos temporal y objetos de Discord simulados
+(benchmarks/fakes.py) y escribe los tiempos en JSON para comparar commits.
+"""
+import argparse
+import asyncio
+import contextlib
+import inspect
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import FakeGuild, FakeInteraction, FakeMessage  # noqa: E402
+
+
+# -----------------------------
+# MEDICIÓN
+# -----------------------------
+def summarize(samples):
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def pct(p):
+        return ordered[min(n - 1, int(p * n))] * 1000
+
+    return {
+        "n": n,
+        "mean_ms": round(sum(ordered) / n * 1000, 4),
+        "p50_ms": round(pct(0.50), 4),
+        "p99_ms": round(pct(0.99), 4),
+        "min_ms": round(ordered[0] * 1000, 4),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+
+
+async def measure(fn, repeat, setup=None):
+    """Ejecuta fn(i) `repeat` veces (sync o async) y devuelve el resumen"""
+    samples = []
+    for i in range(repeat):
+        if setup is not None:
+            setup(i)
+        started = time.perf_counter()
+        result = fn(i)
+        if inspect.isawaitable(result):
+            await result
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# -----------------------------
+# ENTORNO SIMULADO
+# -----------------------------
+def load_bot(workdir):
+    """Importa main.py sin conectarse, con la base de datos en `workdir`"""
+    os.environ.setdefault("DISCORD_TOKEN", "benchmark")
+    os.environ.setdefault("GUILD_ID", "1")
+    os.environ["EVENTS_DB"] = os.path.join(workdir, "eventos.db")
+    os.environ["EVENTS_BACKEND"] = "sqlite"
+    os.chdir(workdir)  # Sin eventos.json: no se importa nada al arrancar
+    import main
+    return main
+
+
+def build_world(main, members, n_events, big_event_size, rng):
+    guild = FakeGuild(main.GUILD_ID, members=members)
+    channels = {c.id: c for c in guild.text_channels}
+    main.bot.get_guild = lambda guild_id: guild if guild_id == guild.id else None
+    main.bot.get_channel = lambda channel_id: channels.get(channel_id) or guild.threads.get(channel_id)
+    main.member_index.load_guild(guild)
+    main.load_guild_indexes(guild)
+
+    roles = list(main.BUTTONS)
+    now = datetime.now().replace(second=0, microsecond=0)
+    for i in range(n_events):
+        channel = rng.choice(guild.text_channels)
+        event = main.Event.from_dict({
+            "id": f"bench-{i}",
+            "title": f"Evento {i}",
+            "description": "Evento de prueba",
+            "channel_id": channel.id,
+            "guild_id": guild.id,
+            "message_id": 10**12 + i,
+            "start": (now + timedelta(minutes=30 + rng.randrange(60 * 24 * 60))).strftime(main.DATE_FORMAT),
+            "end": "2 horas",
+            "participants_roles": {key: [] for key in roles},
+        })
+        for member in rng.sample(guild.members, min(len(guild.members), rng.randrange(20))):
+            event.add_participant(rng.choice(roles), member.id)
+        main.add_event(event)
+
+    # Un evento grande (el caso que dispara el p99 al abrir inscripciones)
+    big = main.events.get("bench-0")
+    for member in guild.members[:big_event_size]:
+        big.add_participant(rng.choice(roles), member.id)
+    return guild, big
+
+
+# -----------------------------
+# BENCHMARKS
+# -----------------------------
+async def run_benchmarks(main, args):
+    rng = random.Random(args.seed)
+    results = {}
+    guild, big = build_world(main, args.members, args.events, args.big_event, rng)
+    channel = main.bot.get_channel(big.channel_id)
+    roles = list(main.BUTTONS)
+
+    # create_event_embed: completo, solo campos de rol y desde caché
+    results["embed_full"] = await measure(
+        lambda i: main.create_event_embed(big), args.repeat,
+        setup=lambda i: main.embed_cache.pop(big.id, None))
+    results["embed_partial"] = await measure(
+        lambda i: main.create_event_embed(big), args.repeat,
+        setup=lambda i: big.add_participant(roles[i % len(roles)], guild.members[-1 - i % 100].id))
+    results["embed_cached"] = await measure(lambda i: main.create_event_embed(big), args.repeat)
+
+    # Inscripción: EventButton.callback de principio a fin, un usuario distinto por clic
+    message = FakeMessage(channel, big.message_id)
+    clickers = guild.members[-args.clicks:]
+
+    def click(i):
+        button = main.EventButton(big.id, roles[i % len(roles)])
+        return button.callback(FakeInteraction(clickers[i % len(clickers)], message, channel))
+
+    results["signup_click"] = await measure(click, args.clicks)
+
+    # Persistencia: volcado completo, carga completa y un lote del write-behind
+    all_events = list(main.events)
+    await main.persister.flush()
+    results["save_events"] = await measure(lambda i: main.save_events(all_events), args.io_repeat)
+    results["load_events"] = await measure(lambda i: main.load_events(), args.io_repeat)
+
+    def dirty_batch(i):
+        for event in rng.sample(all_events, min(500, len(all_events))):
+            main.persister.save_event(event.to_dict(include_participants=False))
+            main.persister.add_participant(event.id, "INF", rng.randrange(10**6))
+
+    results["persister_flush_500"] = await measure(
+        lambda i: main.persister.flush(), args.io_repeat, setup=dirty_batch)
+
+    # Recordatorios: reprogramar en el heap y disparar uno (encolar y drenar el outbox: canal, hilo y DMs simulados)
+    base = time.time() + 3600
+    results["reminder_schedule"] = await measure(
+        lambda i: main.reminders.schedule(all_events[i % len(all_events)].id, base + rng.random() * 86400),
+        len(all_events))
+    results["reminder_next_deadline"] = await measure(lambda i: main.reminders.next_deadline(), args.repeat)
+
+    await main.election.renew()  # Este proceso toma los leases de recordatorios
+
+    def reset_reminder(i):
+        # Otra hora de inicio: claves de idempotencia nuevas en cada repetición
+        big.reminder_sent = False
+        big.thread_id = None
+        big.set_start(big.start + timedelta(minutes=1))
+        main.events.reindex(big)
+
+    async def fire_and_drain(i):
+        await main.fire_reminder(big.id)
+        await main.outbox.drain()
+
+    results["reminder_fire"] = await measure(fire_and_drain, args.io_repeat, setup=reset_reminder)
+
+    # /proximos_eventos_visual: filtrar, ordenar y agrupar por día
+    requester = guild.members[0]
+    results["proximos_eventos_visual"] = await measure(
+        lambda i: main.proximos_eventos_visual.callback(FakeInteraction(requester, channel=channel)),
+        args.io_repeat)
+
+    return results
+
+
+async def shutdown(main):
+    main.reminders.stop()
+    current = asyncio.current_task()
+    pending = [t for t in asyncio.all_tasks() if t is not current]
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def main_async(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        # Los print() del bot van a stderr para que stdout sea solo el JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            main = load_bot(workdir)
+            try:
+                results = await run_benchmarks(main, args)
+            finally:
+                await shutdown(main)
+                main.store.close()
+
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "params": {
+            "members": args.members,
+            "events": args.events,
+            "big_event": args.big_event,
+            "clicks": args.clicks,
+            "repeat": args.repeat,
+            "io_repeat": args.io_repeat,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks offline del bot de eventos")
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--big-event", type=int, default=1500, help="participantes del evento grande")
+    parser.add_argument("--clicks", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--io-repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="archivo JSON (por defecto, stdout)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
@@ -0,0 +1,262 @@
+# benchmarks/simulate.py
+"""Simulación de ráfagas de extremo a extremo contra un Discord falso local.
+
+Uso:
+    python benchmarks/simulate.py [--scenario clicks|reminders|wizards|all] [--output informe.json]
+
+Arranca benchmarks/fake_discord.py (REST + gateway con rate limits), apunta
+discord.py a él e inicia el bot real de main.py. Después lanza los escenarios
+y mide, por escenario, el tiempo hasta el ack de cada interacción (p50/p99),
+las llamadas REST emitidas y las respuestas 429 recibidas.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import random
+import socket
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import discord
+import yarl
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_discord import FakeDiscord, API_PREFIX  # noqa: E402
+from benchmarks.run import summarize, git_commit  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def wait_until(predicate, timeout, interval=0.02):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(interval)
+    return True
+
+
+def scenario_report(fake, started, extra=None):
+    report = {
+        "duration_s": round(time.perf_counter() - started, 3),
+        "ack": summarize(fake.ack_times) if fake.ack_times else None,
+        "rest_calls": fake.rest_calls,
+        "rate_limited_429": fake.rate_limited,
+        "rest_by_route": dict(sorted(fake.rest_by_route.items(), key=lambda kv: -kv[1])),
+    }
+    report.update(extra or {})
+    return report
+
+
+# -----------------------------
+# ESCENARIOS
+# -----------------------------
+async def scenario_clicks(main, fake, args):
+    """`clicks` clics repartidos en `click_window` segundos sobre el mismo EventView"""
+    channel_id = fake.channels[0]["id"]
+    event = main.Event.from_dict({
+        "id": "sim-clicks", "title": "Evento de la simulación", "channel_id": channel_id,
+        "guild_id": fake.guild_id, "start": (datetime.now() + timedelta(days=7)).strftime(main.DATE_FORMAT),
+        "participants_roles": {key: [] for key in main.BUTTONS},
+    })
+    main.add_event(event)
+    await main.publish_event(event)
+    # discord.py reconstruye el botón a partir de los componentes del mensaje
+    message = fake.message_payload(channel_id, message_id=str(event.message_id),
+                                   components=main.EventView(event.id).to_components())
+
+    fake.reset_stats()
+    edits_before = main.message_edits.edits_sent
+    roles = list(main.BUTTONS)
+    users = fake.users
+    started = time.perf_counter()
+    for i in range(args.clicks):
+        target = started + i * args.click_window / args.clicks
+        delay = target - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await fake.click(users[i % len(users)], message, f"evento:{roles[i % len(roles)]}:{event.id}")
+
+    acked = await wait_until(lambda: len(fake.ack_times) >= args.clicks, args.timeout)
+    # Dejar que se cierre la última ventana de ediciones agrupadas
+    await asyncio.sleep(main.EDIT_WINDOW_MS / 1000 + 0.5)
+    return scenario_report(fake, started, {
+        "clicks": args.clicks,
+        "acked": len(fake.ack_times),
+        "all_acked": acked,
+        "message_edits": main.message_edits.edits_sent - edits_before,
+        "participants": event.participants_roles.total(),
+    })
+
+
+async def scenario_reminders(main, fake, args):
+    """`reminders` eventos cuyo recordatorio vence en los mismos `reminder_spread` segundos"""
+    rng = random.Random(args.seed)
+    lead = main.REMINDER_LEAD.total_seconds()
+    due = {}
+    fake.reset_stats()
+    started = time.perf_counter()
+    base = time.time() + 1
+    for i in range(args.reminders):
+        channel = fake.channels[i % len(fake.channels)]
+        event = main.Event(id=f"sim-reminder-{i}", title=f"Recordatorio {i}", channel_id=int(channel["id"]),
+                           guild_id=int(fake.guild_id), participants_roles={key: [] for key in main.BUTTONS})
+        when = base + rng.random() * args.reminder_spread
+        event.set_start(datetime.fromtimestamp(when + lead))
+        for user in rng.sample(fake.users, min(args.reminder_participants, len(fake.users))):
+            event.add_participant(rng.choice(list(main.BUTTONS)), int(user["id"]))
+        due[event.id] = when
+        main.add_event(event)
+
+    completed = {}
+
+    def check():
+        # Completo cuando el recordatorio está encolado y el outbox ha terminado todos sus pasos
+        now = time.time()
+        for event_id, when in due.items():
+            if (event_id not in completed and main.events.get(event_id).reminder_sent
+                    and main.store.pending_jobs(event_id) == 0):
+                completed[event_id] = now - when
+        return len(completed) == len(due)
+
+    done = await wait_until(check, args.timeout + args.reminder_spread, interval=0.05)
+    return scenario_report(fake, started, {
+        "reminders": args.reminders,
+        "completed": len(completed),
+        "all_completed": done,
+        "completion_lag": summarize(list(completed.values())) if completed else None,
+    })
+
+
+async def scenario_wizards(main, fake, args):
+    """`wizards` usuarios lanzan /eventos modo:dm a la vez y responden al asistente por DM"""
+    start = (datetime.now() + timedelta(days=3)).strftime(main.DATE_FORMAT)
+    users = fake.users[:args.wizards]
+    finished = {}
+    started_at = {}
+
+    def answer_for(user, answers):
+        channel_id = fake.dm_channel_for(user["id"])
+
+        def on_bot_message(content):
+            if "Evento creado correctamente" in content:
+                finished[user["id"]] = time.perf_counter() - started_at[user["id"]]
+                return
+            if answers:
+                reply = answers.pop(0)
+                asyncio.get_running_loop().call_later(
+                    args.think_time, lambda: asyncio.ensure_future(fake.direct_message(user, reply)))
+
+        fake.dm_listeners[channel_id] = on_bot_message
+
+    for i, user in enumerate(users):
+        answer_for(user, ["1", f"Evento por DM {i}", "None", "None", start, "2 horas", "8"])
+
+    fake.reset_stats()
+    started = time.perf_counter()
+    channel_id = fake.channels[0]["id"]
+    for user in users:
+        started_at[user["id"]] = time.perf_counter()
+        await fake.slash(user, "eventos", channel_id, [("modo", "dm")])
+
+    done = await wait_until(lambda: len(finished) == len(users), args.timeout)
+    return scenario_report(fake, started, {
+        "wizards": len(users),
+        "completed": len(finished),
+        "all_completed": done,
+        "wizard_duration": summarize(list(finished.values())) if finished else None,
+    })
+
+
+SCENARIOS = {
+    "clicks": scenario_clicks,
+    "reminders": scenario_reminders,
+    "wizards": scenario_wizards,
+}
+
+
+# -----------------------------
+# ARRANQUE DEL BOT CONTRA EL DISCORD FALSO
+# -----------------------------
+async def start_bot(fake, workdir):
+    discord.http.Route.BASE = fake.base_url + API_PREFIX
+    discord.gateway.DiscordWebSocket.DEFAULT_GATEWAY = yarl.URL(f"ws://127.0.0.1:{fake.port}/gateway")
+
+    os.environ["DISCORD_TOKEN"] = fake.token
+    os.environ["GUILD_ID"] = str(fake.guild_id)
+    os.environ["EVENTS_DB"] = os.path.join(workdir, "eventos.db")
+    os.environ["EVENTS_BACKEND"] = "sqlite"
+    os.environ["PORT"] = str(free_port())
+    os.chdir(workdir)
+    import main
+
+    # Errores de discord.py (p. ej. payloads que no entiende) a stderr, como hace bot.run()
+    discord.utils.setup_logging(level=logging.WARNING)
+
+    task = asyncio.create_task(main.bot.start(fake.token))
+    await asyncio.wait_for(main.bot.wait_until_ready(), timeout=30)
+    return main, task
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as workdir:
+        with contextlib.redirect_stdout(sys.stderr):
+            fake = await FakeDiscord(members=args.members, channels=args.channels).start()
+            main, bot_task = await start_bot(fake, workdir)
+            results = {}
+            try:
+                names = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+                for name in names:
+                    print(f"▶ Escenario {name}")
+                    results[name] = await SCENARIOS[name](main, fake, args)
+            finally:
+                await main.bot.close()
+                await asyncio.gather(bot_task, return_exceptions=True)
+                await fake.stop()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "params": {k: v for k, v in vars(args).items() if k != "output"},
+        "scenarios": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulación de ráfagas contra un Discord falso")
+    parser.add_argument("--scenario", choices=[*SCENARIOS, "all"], default="all")
+    parser.add_argument("--members", type=int, default=600)
+    parser.add_argument("--channels", type=int, default=10)
+    parser.add_argument("--clicks", type=int, default=500)
+    parser.add_argument("--click-window", type=float, default=10.0, help="segundos en los que llegan los clics")
+    parser.add_argument("--reminders", type=int, default=50)
+    parser.add_argument("--reminder-spread", type=float, default=60.0, help="segundos entre el primero y el último")
+    parser.add_argument("--reminder-participants", type=int, default=10)
+    parser.add_argument("--wizards", type=int, default=20)
+    parser.add_argument("--think-time", type=float, default=0.2, help="segundos que tarda cada usuario en responder")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--output", help="archivo JSON (por defecto, stdout)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
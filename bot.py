@@ -21,6 +21,16 @@ intents.members = True
 
 bot = commands.Bot(command_prefix="!", intents=intents)
 
+# -----------------------------
+# KEEP ALIVE (para Koyeb): servidor HTTP en el loop del bot
+# -----------------------------
+from keep_alive import keep_alive
+
+async def setup_hook():
+    await keep_alive(bot)
+
+bot.setup_hook = setup_hook
+
 # -----------------------------
 # EVENTO ON_READY
 # -----------------------------
@@ -49,12 +59,6 @@ async def ping(interaction: discord.Interaction):
 async def eventos(interaction: discord.Interaction):
     await interaction.response.send_message("📅 Aquí iniciaremos la creación de un evento paso a paso.", ephemeral=True)
 
-# -----------------------------
-# KEEP ALIVE (para Koyeb)
-# -----------------------------
-from keep_alive import keep_alive
-keep_alive()
-
 # -----------------------------
 # INICIAR BOT
 # -----------------------------
@@ -0,0 +1,128 @@
+# cluster.py
+import asyncio
+
+from metrics import REGISTRY
+
+LEASE_CHANGES = REGISTRY.counter(
+    "bot_lease_changes_total", "Leases ganados o perdidos por este worker", ("lease", "result")
+)
+REMOTE_CHANGES = REGISTRY.counter("bot_remote_changes_total", "Cambios de otros workers aplicados en memoria")
+
+
+# -----------------------------
+# ELECCIÓN DE LÍDER (LEASES)
+# -----------------------------
+class LeaderElection:
+    """Mantiene los leases `names` en el almacén compartido para este worker.
+
+    Cada `ttl / 3` segundos se intenta tomar o renovar cada lease; si un worker
+    cae, su lease caduca a los `ttl` segundos y otro lo toma. Las tareas que
+    solo debe ejecutar un worker comprueban `is_leader(nombre)` antes de actuar.
+    """
+
+    def __init__(self, store, owner, names, ttl=30.0):
+        self.store = store
+        self.owner = owner
+        self.names = list(names)
+        self.ttl = ttl
+        self.held = set()
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def is_leader(self, name):
+        return name in self.held
+
+    async def renew(self):
+        for name in self.names:
+            try:
+                leader = await asyncio.to_thread(self.store.acquire_lease, name, self.owner, self.ttl)
+            except Exception as e:
+                # Sin poder renovar no hay garantía de exclusividad: se deja de actuar
+                print(f"❌ Error al renovar el lease {name}: {e}")
+                leader = False
+            if leader and name not in self.held:
+                self.held.add(name)
+                LEASE_CHANGES.inc(lease=name, result="acquired")
+                print(f"👑 {self.owner} es líder de {name}")
+            elif not leader and name in self.held:
+                self.held.discard(name)
+                LEASE_CHANGES.inc(lease=name, result="lost")
+                print(f"⚠️ {self.owner} ha perdido el lease {name}")
+
+    async def start(self):
+        """Primera ronda antes de volver (los jobs arrancan ya sabiendo quién es líder)"""
+        if not self.running:
+            await self.renew()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            await self.renew()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        # Soltar los leases al apagar para que otro worker no espere a que caduquen
+        for name in list(self.held):
+            try:
+                await asyncio.to_thread(self.store.release_lease, name, self.owner)
+            except Exception:
+                pass
+        self.held.clear()
+
+
+# -----------------------------
+# AVISOS DE CAMBIOS ENTRE WORKERS
+# -----------------------------
+class ChangeFeed:
+    """Sondea la tabla de cambios y llama a `callback(event_id, datos)` por cada evento
+    que otro worker ha escrito; datos es None si el evento se borró."""
+
+    def __init__(self, store, interval=1.0, seq=None):
+        self.store = store
+        self.interval = interval
+        self.seq = seq  # último cambio ya reflejado en lo cargado (None: el actual al arrancar)
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self, callback):
+        if not self.running:
+            if self.seq is None:
+                self.seq = self.store.last_change()
+            self._task = asyncio.get_running_loop().create_task(self._run(callback))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _fetch(self):
+        changes, last = self.store.changes_since(self.seq)
+        event_ids = list(dict.fromkeys(event_id for _, event_id in changes))
+        return [(event_id, self.store.load_event(event_id)) for event_id in event_ids], last
+
+    async def poll(self, callback):
+        updates, self.seq = await asyncio.to_thread(self._fetch)
+        for event_id, data in updates:
+            try:
+                callback(event_id, data)
+                REMOTE_CHANGES.inc()
+            except Exception as e:
+                print(f"❌ Error al aplicar el cambio remoto de {event_id}: {e}")
+        return len(updates)
+
+    async def _run(self, callback):
+        while True:
+            try:
+                await self.poll(callback)
+            except Exception as e:
+                print(f"❌ Error al leer cambios de otros workers: {e}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,65 @@
+# dm.py
+import asyncio
+from dataclasses import dataclass
+
+import discord
+
+
+@dataclass(slots=True)
+class DMReport:
+    """Resumen de los DMs de un recordatorio"""
+    delivered: int = 0
+    failed: int = 0
+    skipped: int = 0  # DMs cerrados ya conocidos (no se reintentan)
+
+
+# -----------------------------
+# ENVÍO DE DMs EN PARALELO
+# -----------------------------
+class DMDispatcher:
+    """Envía DMs con concurrencia limitada respetando los buckets de la API.
+
+    - Los envíos van en paralelo hasta `concurrency` a la vez (cada DM es su
+      propio canal y bucket de rate limit).
+    - Abrir un DM (POST /users/@me/channels) es un bucket compartido, así que
+      se serializa con un lock; los canales abiertos quedan en caché.
+    - Los usuarios con DMs cerrados (403) se recuerdan y se omiten después.
+    """
+
+    def __init__(self, concurrency=5, max_retries=3):
+        self.max_retries = max_retries
+        self.closed_dms = set()
+        self.delivered = 0
+        self.failed = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._open_lock = asyncio.Lock()
+
+    async def send(self, member, content):
+        """Devuelve True si se entregó, None si se omitió (DMs cerrados) y False si no se
+        podrá entregar (4xx); los 5xx que agotan los reintentos se relanzan, son pasajeros"""
+        if member.id in self.closed_dms:
+            return None
+
+        async with self._semaphore:
+            for attempt in range(self.max_retries):
+                try:
+                    channel = member.dm_channel
+                    if channel is None:
+                        async with self._open_lock:
+                            channel = await member.create_dm()
+                    await channel.send(content)
+                    self.delivered += 1
+                    return True
+                except discord.Forbidden:
+                    # DMs cerrados o bot bloqueado: no volver a intentarlo
+                    self.closed_dms.add(member.id)
+                    break
+                except discord.HTTPException as e:
+                    # Los 429 no llegan aquí: discord.py espera el retry_after y repite la petición
+                    if e.status < 500:
+                        break
+                    if attempt == self.max_retries - 1:
+                        raise
+                    await asyncio.sleep(2 ** attempt)
+            self.failed += 1
+            return False
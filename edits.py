@@ -0,0 +1,63 @@
+# edits.py
+import asyncio
+
+
+# -----------------------------
+# AGRUPADOR DE EDICIONES DE MENSAJES
+# -----------------------------
+class EditCoalescer:
+    """Como mucho una edición por mensaje en cada ventana de `window_ms`.
+
+    La primera petición se envía enseguida; las que llegan durante la ventana
+    se fusionan y al cerrarse se envía una sola edición con el estado más
+    reciente (la función de edición renderiza en el momento de ejecutarse).
+    """
+
+    def __init__(self, window_ms=1500):
+        self.window = window_ms / 1000
+        self.requests = 0
+        self.edits_sent = 0
+        self._pending = {}  # clave (message_id) -> función async de edición más reciente
+        self._tasks = {}
+
+    def request(self, key, edit):
+        """Pide editar el mensaje `key`; `edit` es una función async sin argumentos"""
+        self.requests += 1
+        self._pending[key] = edit
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.get_running_loop().create_task(self._run(key))
+
+    def open_window(self, key):
+        """Si el mensaje está libre abre su ventana y devuelve True.
+
+        Quien llama hace la edición por su cuenta (p. ej. como respuesta a la
+        interacción); lo que se pida durante la ventana se fusiona igual.
+        """
+        if key in self._tasks:
+            return False
+        self.requests += 1
+        self.edits_sent += 1
+        self._tasks[key] = asyncio.get_running_loop().create_task(self._run(key, wait_first=True))
+        return True
+
+    def pending(self, key):
+        return key in self._tasks
+
+    async def _run(self, key, wait_first=False):
+        try:
+            if wait_first:
+                await asyncio.sleep(self.window)
+            while True:
+                edit = self._pending.pop(key, None)
+                if edit is None:
+                    break
+                try:
+                    await edit()
+                    self.edits_sent += 1
+                except Exception as e:
+                    print(f"❌ Error al editar mensaje {key}: {e}")
+                # Ventana tras cada edición: lo que llegue mientras tanto se fusiona
+                await asyncio.sleep(self.window)
+        finally:
+            self._tasks.pop(key, None)
+
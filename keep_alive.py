@@ -1,17 +1,107 @@
-from flask import Flask
-from threading import Thread
+# keep_alive.py
+import asyncio
+import math
 import os
 
-app = Flask('')
+from aiohttp import web
 
-@app.route('/')
-def home():
-    return "✅ Bot activo en Koyeb"
+# Lag del loop a partir del cual /healthz se considera degradado
+MAX_LOOP_LAG_S = float(os.environ.get("MAX_LOOP_LAG_S", "5"))
 
-def run():
-    port = int(os.environ.get("PORT", 8080))
-    app.run(host='0.0.0.0', port=port)
 
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
+# -----------------------------
+# SERVIDOR HTTP (KOYEB / HEALTH CHECKS)
+# -----------------------------
+class HealthServer:
+    """Servidor aiohttp en el mismo loop que el bot (sin hilo aparte).
+
+    - /        texto fijo, como el antiguo keep-alive de Flask
+    - /healthz vivo: gateway conectado, latencia del heartbeat y lag del loop
+    - /readyz  listo: todas las comprobaciones registradas con ready_check()
+    - /metrics formato de texto de Prometheus (si se pasa un `registry`)
+
+    Las rutas extra se añaden a `app` antes de start().
+    """
+
+    def __init__(self, bot, port=None, lag_interval=1.0, registry=None):
+        self.bot = bot
+        self.registry = registry
+        self.port = port or int(os.environ.get("PORT", 8080))
+        self.lag_interval = lag_interval
+        self.loop_lag = 0.0
+        self.checks = {}  # nombre -> función sin argumentos que devuelve bool
+        self.app = web.Application()
+        self.app.router.add_get("/", self.home)
+        self.app.router.add_get("/healthz", self.healthz)
+        self.app.router.add_get("/readyz", self.readyz)
+        if registry is not None:
+            self.app.router.add_get("/metrics", self.metrics)
+        self._runner = None
+        self._lag_task = None
+
+    def ready_check(self, name, check):
+        self.checks[name] = check
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "0.0.0.0", self.port).start()
+        self._lag_task = asyncio.get_running_loop().create_task(self._measure_lag())
+
+    async def stop(self):
+        if self._lag_task is not None:
+            self._lag_task.cancel()
+            self._lag_task = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _measure_lag(self):
+        # Cuánto tarda en volver un sleep corto: mide lo bloqueado que está el loop
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            self.loop_lag = max(0.0, loop.time() - started - self.lag_interval)
+
+    # -----------------------------
+    # RUTAS
+    # -----------------------------
+    async def home(self, request):
+        return web.Response(text="✅ Bot activo en Koyeb")
+
+    async def healthz(self, request):
+        latency = self.bot.latency
+        connected = self.bot.is_ready() and not self.bot.is_closed() and math.isfinite(latency)
+        healthy = connected and self.loop_lag < MAX_LOOP_LAG_S
+        body = {
+            "status": "ok" if healthy else "unhealthy",
+            "gateway_connected": connected,
+            "latency_ms": round(latency * 1000, 1) if math.isfinite(latency) else None,
+            "loop_lag_ms": round(self.loop_lag * 1000, 1),
+        }
+        return web.json_response(body, status=200 if healthy else 503)
+
+    async def readyz(self, request):
+        results = {}
+        for name, check in self.checks.items():
+            try:
+                results[name] = bool(check())
+            except Exception:
+                results[name] = False
+        ready = all(results.values())
+        body = {"status": "ready" if ready else "not_ready", "checks": results}
+        return web.json_response(body, status=200 if ready else 503)
+
+    async def metrics(self, request):
+        return web.Response(
+            body=self.registry.render().encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+
+async def keep_alive(bot, port=None):
+    """Arranca el servidor HTTP en el loop del bot (llamar desde setup_hook)"""
+    server = HealthServer(bot, port)
+    await server.start()
+    return server
@@ -1,50 +1,170 @@
 # main.py
 import os
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord import app_commands
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
-import json
 import uuid
-from keep_alive import keep_alive  # Para Koyeb u otros hosts
+from keep_alive import HealthServer  # Para Koyeb u otros hosts
+from storage import SqliteStore, JsonStore
+from persistence import WriteBehindPersister
+from registry import EventRegistry
+from scheduler import ReminderScheduler
+from models import Event, DATE_FORMAT
+from edits import EditCoalescer
+from members import MemberIndex
+from dm import DMDispatcher, DMReport
+from notify import ThreadNotifier
+from sessions import DMSessionManager, SessionExpired, SessionLimitReached
+from autocomplete import PrefixIndex, MAX_CHOICES, normalize
+from metrics import REGISTRY, instrument_http, watch_rate_limits
+from archive import EventArchive, RetentionJob, archive_stats
+from cluster import LeaderElection, ChangeFeed
+from outbox import Outbox, Job, Done, PermanentJobError
+import time
+import asyncio
+import signal
+import socket
 
 # -----------------------------
 # CARGAR VARIABLES DE ENTORNO
 # -----------------------------
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
-GUILD_ID = int(os.getenv("GUILD_ID"))
+# Servidor al que pertenecen los eventos antiguos guardados sin guild_id (la versión
+# de un solo servidor lo exigía); sin definirlo se deducen del canal de cada evento
+GUILD_ID = int(os.getenv("GUILD_ID")) if os.getenv("GUILD_ID") else None
+# Opcional, para desarrollo: servidor de pruebas donde los comandos aparecen al instante
+DEV_GUILD_ID = int(os.getenv("DEV_GUILD_ID")) if os.getenv("DEV_GUILD_ID") else None
+
+# Varios workers: cada proceso se conecta a los shards SHARD_IDS (p. ej. "0,1") de
+# SHARD_COUNT y todos comparten EVENTS_DB. Sin definirlos, un proceso con todos los shards.
+SHARD_COUNT = int(os.getenv("SHARD_COUNT")) if os.getenv("SHARD_COUNT") else None
+SHARD_IDS = [int(i) for i in os.getenv("SHARD_IDS").split(",")] if os.getenv("SHARD_IDS") else None
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
 
 # -----------------------------
 # CONFIGURACIÓN DEL BOT
 # -----------------------------
 intents = discord.Intents.default()
 intents.members = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+
+
+class EventBot(commands.AutoShardedBot):
+    tree_synced = False
+
+    async def setup_hook(self):
+        # Un único manejador para todos los botones de eventos (y los del calendario)
+        self.add_dynamic_items(EventButton, CalendarPageButton)
+
+        # Métricas: cada petición REST por ruta y los 429 que registra discord.py
+        instrument_http(self.http)
+        watch_rate_limits()
+
+        # Leases de las tareas de un solo worker (recordatorios y archivo)
+        await election.start()
+
+        # Health checks para Koyeb en el mismo loop que el bot
+        try:
+            await health.start()
+        except OSError as e:
+            print(f"❌ No se pudo abrir el puerto {health.port}: {e}")
+
+        # Koyeb detiene el contenedor con SIGTERM: cerrar ordenadamente para guardar
+        try:
+            self.loop.add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(self.close()))
+        except (NotImplementedError, RuntimeError):
+            pass
+
+    async def close(self):
+        # Escribir los cambios pendientes antes de desconectar
+        try:
+            await persister.flush()
+        except Exception as e:
+            print(f"❌ Error al guardar eventos al cerrar: {e}")
+        change_feed.stop()
+        outbox.stop()
+        await election.stop()
+        await health.stop()
+        await super().close()
+
+
+bot = EventBot(command_prefix="!", intents=intents, shard_count=SHARD_COUNT, shard_ids=SHARD_IDS)
+health = HealthServer(bot, registry=REGISTRY)
+
+# -----------------------------
+# MÉTRICAS (/metrics)
+# -----------------------------
+BUTTON_SECONDS = REGISTRY.histogram(
+    "bot_button_seconds", "Tiempo de un clic en un botón de evento, de principio a fin", ("action",)
+)
+EMBED_RENDER_SECONDS = REGISTRY.histogram(
+    "bot_embed_render_seconds", "Tiempo de render del embed de un evento", ("mode",)
+)
+REGISTRY.gauge("bot_gateway_latency_seconds", "Latencia del heartbeat del gateway", lambda: bot.latency)
+REGISTRY.gauge("bot_loop_lag_seconds", "Retraso del event loop", lambda: health.loop_lag)
+REGISTRY.gauge("bot_events", "Eventos cargados", lambda: len(events))
+REGISTRY.gauge("bot_reminders_scheduled", "Recordatorios pendientes", lambda: len(reminders))
+REGISTRY.gauge("bot_leases_held", "Leases de tareas de un solo worker que tiene este proceso", lambda: len(election.held))
+# Sin consultas en el loop: el valor lo refresca el bucle del outbox (en un hilo) en cada vuelta
+REGISTRY.gauge("bot_outbox_pending", "Trabajos pendientes del outbox (recordatorios, hilos, DMs y roles)", lambda: outbox.pending)
 # -----------------------------
 # EVENTO ON_READY
 # -----------------------------
+async def sync_commands():
+    """Comandos globales (todos los servidores); con DEV_GUILD_ID además se copian a ese servidor al instante"""
+    synced = await bot.tree.sync()
+    print(f"📌 Slash commands globales sincronizados: {[cmd.name for cmd in synced]}")
+    if DEV_GUILD_ID is not None:
+        # En el servidor de pruebas aparecen dos veces (global y copia) hasta quitar DEV_GUILD_ID
+        guild = discord.Object(id=DEV_GUILD_ID)
+        bot.tree.copy_global_to(guild=guild)
+        synced = await bot.tree.sync(guild=guild)
+        print(f"📌 Slash commands copiados al servidor de pruebas {DEV_GUILD_ID}: {[cmd.name for cmd in synced]}")
+    if GUILD_ID is not None and GUILD_ID != DEV_GUILD_ID:
+        # Versiones anteriores copiaban los comandos a GUILD_ID; esa copia duplicaría los globales
+        bot.tree.clear_commands(guild=discord.Object(id=GUILD_ID))
+        await bot.tree.sync(guild=discord.Object(id=GUILD_ID))
+
+
 @bot.event
 async def on_ready():
-    try:
-        guild = discord.Object(id=GUILD_ID)
-        synced = await bot.tree.sync(guild=guild)
-        print(f"📌 Slash commands sincronizados en {GUILD_ID}: {[cmd.name for cmd in synced]}")
-    except Exception as e:
-        print(f"❌ Error al sincronizar: {e}")
+    # on_ready se repite tras cada reconexión: los comandos solo se sincronizan una vez
+    if not bot.tree_synced:
+        try:
+            await sync_commands()
+            bot.tree_synced = True
+        except Exception as e:
+            print(f"❌ Error al sincronizar: {e}")
 
-    print(f"✅ Bot conectado como {bot.user}")
+    print(f"✅ Bot conectado como {bot.user} ({len(bot.guilds)} servidores, {bot.shard_count} shards)")
 
-    # Iniciar el loop de recordatorios solo si no está corriendo
-    if not check_event_reminders.is_running():
-        check_event_reminders.start()
+    # Índices de miembros, canales y roles
+    for guild in bot.guilds:
+        load_guild(guild)
+    adopt_orphan_events()
+
+    # Iniciar el planificador de recordatorios solo si no está corriendo
+    if not reminders.running:
+        reminders.start(fire_reminder)
+    if not retention.running:
+        retention.start(housekeeping)
+    if not change_feed.running:
+        change_feed.start(apply_remote_change)
+    if not outbox.running:
+        outbox.start()
 
 
 # -----------------------------
 # ARCHIVO DE EVENTOS
 # -----------------------------
 EVENTS_FILE = "eventos.json"
+EVENTS_DB = os.getenv("EVENTS_DB", "eventos.db")
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "sqlite")  # "sqlite" o "json"
+SAVE_INTERVAL_MS = int(os.getenv("SAVE_INTERVAL_MS", "500"))
+store = JsonStore(EVENTS_FILE) if EVENTS_BACKEND == "json" else SqliteStore(EVENTS_DB, origin=WORKER_ID)
+persister = WriteBehindPersister(store, interval_ms=SAVE_INTERVAL_MS)
 
 # -----------------------------
 # BOTONES CON EMOJIS VÁLIDOS
@@ -63,39 +183,237 @@ BUTTONS = {
 # CARGAR / GUARDAR EVENTOS
 # -----------------------------
 def load_events():
-    if os.path.exists(EVENTS_FILE):
-        with open(EVENTS_FILE, "r") as f:
-            return json.load(f)
-    return []
+    # La primera vez se importa eventos.json a la base de datos
+    store.import_json(EVENTS_FILE)
+    loaded = [Event.from_dict(data) for data in store.load_events()]
+    for event in loaded:
+        # Eventos de la versión de un solo servidor
+        if event.guild_id is None:
+            event.guild_id = GUILD_ID
+    return loaded
 
 def save_events(events):
-    with open(EVENTS_FILE, "w") as f:
-        json.dump(events, f, indent=4, default=str)
+    """Volcado completo; solo para migraciones, el bot guarda evento por evento"""
+    store.save_all([event.to_dict() for event in events])
+
+def add_event(event):
+    events.add(event)
+    titles_for(event.guild_id).add(event.id, event.title)
+    schedule_reminder(event)
+    persister.save_event(event.to_dict(include_participants=False))
+
+def save_event(event):
+    """Reindexa y reprograma el evento y lo marca para el próximo volcado (sin E/S en el handler).
+    Devuelve False si el evento se borró mientras se editaba (no se vuelve a guardar)."""
+    if event.id not in events:
+        return False
+    event.touch()
+    events.reindex(event)
+    titles_for(event.guild_id).add(event.id, event.title)
+    schedule_reminder(event)
+    persister.save_event(event.to_dict(include_participants=False))
+    return True
+
+def delete_event(event):
+    forget_event(event)
+    persister.delete_event(event.id)
+
+def forget_event(event):
+    """Quita el evento de memoria (índices, caché y recordatorio) sin tocar el almacén"""
+    events.remove(event.id)
+    titles_for(event.guild_id).remove(event.id)
+    embed_cache.pop(event.id, None)
+    reminders.cancel(event.id)
 
-events = load_events()
+# -----------------------------
+# VARIOS WORKERS: LEASES Y AVISOS DE CAMBIOS
+# -----------------------------
+# Los recordatorios de cada shard y el archivado solo los ejecuta el worker con
+# el lease correspondiente (tabla leases de EVENTS_DB); si cae, otro lo toma a
+# los LEASE_TTL_S segundos. Lo que escribe un worker llega a los demás por la
+# tabla changes, que cada uno sondea cada CHANGE_POLL_MS.
+LEASE_TTL_S = float(os.getenv("LEASE_TTL_S", "30"))
+CHANGE_POLL_MS = int(os.getenv("CHANGE_POLL_MS", "1000"))
+CHANGES_RETENTION_S = 24 * 3600
+ARCHIVE_LEASE = "archivo"
+
+def shard_of(guild_id):
+    # Fórmula de Discord para repartir servidores entre shards
+    return (guild_id >> 22) % SHARD_COUNT if SHARD_COUNT and guild_id else 0
+
+def owns_guild(guild_id):
+    return SHARD_IDS is None or shard_of(guild_id) in SHARD_IDS
+
+def reminder_lease(guild_id):
+    return f"recordatorios:{shard_of(guild_id)}"
+
+# Los mismos shards que puede devolver shard_of: con SHARD_COUNT y sin SHARD_IDS,
+# este proceso tiene todos y necesita el lease de cada uno
+OWNED_SHARDS = SHARD_IDS or list(range(SHARD_COUNT or 1))
+
+election = LeaderElection(
+    store, WORKER_ID, [ARCHIVE_LEASE] + [f"recordatorios:{shard}" for shard in OWNED_SHARDS], ttl=LEASE_TTL_S
+)
+def apply_remote_change(event_id, data):
+    """Aplica en memoria un evento escrito por otro worker (data=None si lo borró)"""
+    row_pending, ops = persister.pending(event_id)
+    current = events.get(event_id)
+    if data is None:
+        if current is not None and not row_pending:
+            forget_event(current)
+        return
+
+    remote = Event.from_dict(data)
+    if remote.guild_id is None:
+        remote.guild_id = GUILD_ID
+    # Lo que este worker aún no ha volcado va encima de la versión remota
+    for role, user_id, present in ops:
+        if present:
+            remote.add_participant(role, user_id)
+        else:
+            remote.remove_participant(role, user_id)
 
+    if current is None:
+        events.add(remote)
+        titles_for(remote.guild_id).add(remote.id, remote.title)
+        schedule_reminder(remote)
+        return
+    old_guild = current.guild_id
+    current.update_from(remote, participants_only=row_pending)
+    if current.guild_id != old_guild:
+        titles_for(old_guild).remove(current.id)
+    events.reindex(current)
+    titles_for(current.guild_id).add(current.id, current.title)
+    schedule_reminder(current)
+
+# -----------------------------
+# RECORDATORIOS PROGRAMADOS
 # -----------------------------
-# ESPERA POR MENSAJES
+REMINDER_LEAD = timedelta(minutes=15)
+reminders = ReminderScheduler()
+
+def schedule_reminder(event):
+    # Los recordatorios de servidores de otros shards los programa el worker que los tiene
+    if event.reminder_sent or event.start_ts is None or not owns_guild(event.guild_id):
+        reminders.cancel(event.id)
+        return
+    reminders.schedule(event.id, event.start_ts - REMINDER_LEAD.total_seconds())
+
+def titles_for(guild_id):
+    index = event_titles.get(guild_id)
+    if index is None:
+        index = event_titles[guild_id] = PrefixIndex((e.id, e.title) for e in events.by_guild(guild_id))
+    return index
+
+def adopt_orphan_events():
+    """Asigna servidor a los eventos sin guild_id a partir de su canal (sin GUILD_ID configurado)"""
+    for event in events.by_guild(None):
+        channel = bot.get_channel(event.channel_id) if event.channel_id else None
+        if channel is not None and getattr(channel, "guild", None) is not None:
+            titles_for(None).remove(event.id)
+            event.guild_id = channel.guild.id
+            migrate_legacy_participants(event)
+            save_event(event)
+
+# Posición de la tabla de cambios antes de leer los eventos: lo que otro worker
+# escriba durante la carga (o hasta on_ready) llega después por change_feed
+_loaded_seq = store.last_change()
+events = EventRegistry(load_events())  # Particionado por servidor (events.by_guild, events.upcoming)
+change_feed = ChangeFeed(store, interval=CHANGE_POLL_MS / 1000, seq=_loaded_seq)
+event_titles = {}  # guild_id -> PrefixIndex de títulos (autocompletar eventos)
+for _event in events:
+    schedule_reminder(_event)
+
+# /readyz: comandos sincronizados y almacén escribible (el último volcado no falló)
+health.ready_check("tree_synced", lambda: bot.tree_synced)
+health.ready_check("store_writable", lambda: not persister.failing)
+
 # -----------------------------
+# ARCHIVO DE EVENTOS TERMINADOS
+# -----------------------------
+# Los eventos que terminaron hace más de ARCHIVE_AFTER_DAYS salen de la base de
+# datos y de memoria a archivo/<guild_id>/eventos-AAAA-MM.jsonl.gz; /historial los lee.
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archivo")
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_INTERVAL_S = int(os.getenv("ARCHIVE_INTERVAL_S", "3600"))
+archives = {}  # guild_id -> EventArchive
+retention = RetentionJob(ARCHIVE_INTERVAL_S)
+
+def archive_for(guild_id):
+    archive = archives.get(guild_id)
+    if archive is None:
+        archive = archives[guild_id] = EventArchive(os.path.join(ARCHIVE_DIR, str(guild_id or "sin-servidor")))
+    return archive
+
+async def housekeeping():
+    """Tarea periódica de un solo worker: archivar eventos y podar los avisos de cambios y trabajos terminados"""
+    if not election.is_leader(ARCHIVE_LEASE):
+        return 0
+    await asyncio.to_thread(store.prune_changes, time.time() - CHANGES_RETENTION_S)
+    await asyncio.to_thread(store.prune_jobs, time.time() - JOBS_RETENTION_S)
+    return await archive_finished_events()
+
+async def archive_finished_events():
+    cutoff = time.time() - ARCHIVE_AFTER_DAYS * 86400
+    moved = 0
+    for guild_id in events.guilds():
+        # Solo se recorren los que empezaron antes del corte (índice por inicio)
+        finished = [e for e in events.started_before(guild_id, cutoff) if e.end_ts < cutoff]
+        if not finished:
+            continue
+        # Primero al archivo (ya en disco) y después fuera del almacén: un corte a medias solo deja duplicados
+        await asyncio.to_thread(archive_for(guild_id).append, [e.to_dict() for e in finished])
+        for event in finished:
+            if event.id in events:
+                delete_event(event)
+        moved += len(finished)
+    return moved
+
+# -----------------------------
+# ESPERA POR MENSAJES (SESIONES DM)
+# -----------------------------
+DM_SESSION_TTL_S = int(os.getenv("DM_SESSION_TTL_S", "300"))
+DM_SESSIONS_PER_USER = int(os.getenv("DM_SESSIONS_PER_USER", "1"))
+dm_sessions = DMSessionManager(ttl=DM_SESSION_TTL_S, max_per_user=DM_SESSIONS_PER_USER)
+
+
+@bot.event
+async def on_message(message):
+    # Los DMs de un asistente abierto van directos a su sesión
+    if message.author.bot or dm_sessions.dispatch(message):
+        return
+    await bot.process_commands(message)
+
+
+async def run_dm_session(user, dm, flow):
+    """Abre la sesión DM del usuario, ejecuta el asistente y la cierra siempre"""
+    try:
+        session = dm_sessions.open(user.id)
+    except SessionLimitReached:
+        await dm.send("Ya tienes un asistente en curso. Termínalo o escribe 'cancelar' para salir de él.")
+        return
+    try:
+        await flow(session)
+    except SessionExpired:
+        await dm.send(f"⌛ Tiempo agotado: sin respuesta en {DM_SESSION_TTL_S // 60} minutos. Vuelve a empezar cuando quieras.")
+    finally:
+        session.close()
+
 # -----------------------------
 # FUNCIONES AUXILIARES
 # -----------------------------
-async def wait_for_number(user, dm, min_val, max_val, cancel_word="cancelar"):
-    def check(m):
-        return m.author == user and m.guild is None
+async def wait_for_number(session, dm, min_val, max_val, cancel_word="cancelar"):
     while True:
-        msg = await bot.wait_for("message", check=check)
+        msg = await session.next_message()
         if msg.content.lower() == cancel_word:
             return None
         if msg.content.isdigit() and min_val <= int(msg.content) <= max_val:
             return int(msg.content)
         await dm.send(f"Introduce un número entre {min_val} y {max_val}, o '{cancel_word}' para salir.")
 
-async def wait_for_text(user, dm, max_length, allow_none=False, cancel_word="cancelar"):
-    def check(m):
-        return m.author == user and m.guild is None
+async def wait_for_text(session, dm, max_length, allow_none=False, cancel_word="cancelar"):
     while True:
-        msg = await bot.wait_for("message", check=check)
+        msg = await session.next_message()
         if msg.content.lower() == cancel_word:
             return None
         if allow_none and msg.content.lower() == "none":
@@ -104,525 +422,797 @@ async def wait_for_text(user, dm, max_length, allow_none=False, cancel_word="can
             return msg.content
         await dm.send(f"Texto demasiado largo. Máximo {max_length} caracteres. Escribe '{cancel_word}' para salir.")
 
+# Máximo de coincidencias que se listan por DM (el listado completo superaba los 2000 caracteres)
+DM_CHOICES = 10
+
+async def ask_channel(session, dm, guild_id, cancel_word="cancelar"):
+    """Busca un canal de texto por nombre (o su principio); None si se cancela o con 'skip'"""
+    index = channel_index.get(guild_id) or PrefixIndex()
+    while True:
+        msg = await session.next_message()
+        text = msg.content.strip().lstrip("#")
+        if text.lower() in (cancel_word, "skip"):
+            return None
+        matches = index.search(text, limit=DM_CHOICES)
+        if not matches:
+            await dm.send(f"No encontré ningún canal que empiece por '{text}'. Prueba otra vez o '{cancel_word}'.")
+            continue
+        if len(matches) == 1 or normalize(matches[0][1]) == normalize(text):
+            return matches[0][0]
+        await dm.send("Varios canales coinciden, elige uno por número:\n" +
+                      "\n".join(f"{i+1}. #{name}" for i, (_, name) in enumerate(matches)))
+        option = await wait_for_number(session, dm, 1, len(matches))
+        if option is None:
+            return None
+        return matches[option - 1][0]
+
+async def ask_roles(session, dm, guild_id, max_roles=25):
+    """Roles por nombre separados por comas; [] con 'none' y None si se cancela"""
+    index = role_index.get(guild_id) or PrefixIndex()
+    while True:
+        response = await wait_for_text(session, dm, 200)
+        if response is None:
+            return None
+        if response.lower() == "none":
+            return []
+        found = []
+        missing = []
+        for name in (n.strip().lstrip("@") for n in response.split(",")):
+            if not name:
+                continue
+            role_id = index.best(name)
+            if role_id is None:
+                missing.append(name)
+            elif role_id not in found:
+                found.append(role_id)
+        if missing:
+            await dm.send(f"No encontré estos roles: {', '.join(missing)}. Escríbelos de nuevo o 'none'.")
+        elif not found:
+            await dm.send("Ningún rol válido. Intenta de nuevo o 'none'.")
+        elif len(found) > max_roles:
+            await dm.send(f"Como máximo {max_roles} rol(es). Intenta de nuevo o 'none'.")
+        else:
+            return found
+
 # -----------------------------
-# CREAR EMBED DE EVENTO
+# CREAR EMBED DE EVENTO (CON CACHÉ)
 # -----------------------------
+# event_id -> EmbedCacheEntry; se reutiliza mientras la versión del evento no cambie
+FIELD_VALUE_LIMIT = 1024
+ROLE_FIELD_OFFSET = 2  # Los campos de rol van después de "Fecha de inicio" y "Duración/Fin"
+
+
+class EmbedCacheEntry:
+    __slots__ = ("embed", "version", "header_version", "role_versions")
+
+    def __init__(self, embed, event):
+        self.embed = embed
+        self.version = event.version
+        self.header_version = event.header_version
+        self.role_versions = dict(event.role_versions)
+
+
+embed_cache = {}
+
+
+def render_role_field(event, key, emoji, guild):
+    """Nombre y valor del campo de un rol (solo se recalcula si cambió ese rol)"""
+    count = event.participants_roles.count(key)
+    if not count:
+        return f"{emoji} {key} (0)", "Nadie aún"
+
+    field_name = f"{emoji} {key} ({count})"  # número a la par
+    lines = []
+    length = 0
+    for i, uid in enumerate(event.participants_roles.members(key)):
+        member = member_index.resolve(guild.id, uid) if guild else None
+        line = f"- {member.display_name if member else f'❓({uid})'}"
+        # Discord limita cada campo a 1024 caracteres
+        if length + len(line) + 1 > FIELD_VALUE_LIMIT - 20:
+            lines.append(f"… y {count - i} más")
+            break
+        lines.append(line)
+        length += len(line) + 1
+    return field_name, "\n".join(lines)
+
+
 async def create_event_embed(event):
+    started = time.perf_counter()
+    embed, mode = render_event_embed(event)
+    EMBED_RENDER_SECONDS.observe(time.perf_counter() - started, mode=mode)
+    return embed
+
+
+def render_event_embed(event):
+    """Devuelve (embed, modo); modo = "cached", "partial" o "full" según lo reconstruido"""
+    cached = embed_cache.get(event.id)
+    if cached and cached.version == event.version:
+        return cached.embed, "cached"
+
+    guild = bot.get_guild(event.guild_id) if event.guild_id else None
+
+    # Solo cambiaron participantes: reconstruir únicamente los campos de esos roles
+    if cached and cached.header_version == event.header_version:
+        for index, (key, (emoji, _)) in enumerate(BUTTONS.items()):
+            if event.role_versions.get(key, 0) != cached.role_versions.get(key, 0):
+                name, value = render_role_field(event, key, emoji, guild)
+                cached.embed.set_field_at(ROLE_FIELD_OFFSET + index, name=name, value=value, inline=False)
+        cached.version = event.version
+        cached.role_versions = dict(event.role_versions)
+        return cached.embed, "partial"
+
     embed = discord.Embed(
-        title=event.get("title", "Evento sin título"),
-        description=event.get("description", "Sin descripción"),
-        color=discord.Color(event.get("color", 0x00ff00))
+        title=event.title,
+        description=event.description,
+        color=discord.Color(event.color if event.color is not None else 0x00ff00)
     )
 
-    embed.add_field(name="📅 Fecha de inicio", value=event.get("start", "No especificado"), inline=True)
-    embed.add_field(name="⏱️ Duración/Fin", value=event.get("end", "No especificado"), inline=True)
+    embed.add_field(name="📅 Fecha de inicio", value=event.start_str, inline=True)
+    embed.add_field(name="⏱️ Duración/Fin", value=event.end or "No especificado", inline=True)
 
-    guild = bot.get_guild(GUILD_ID)
     for key, (emoji, _) in BUTTONS.items():
-        user_ids = event.get("participants_roles", {}).get(key, [])
-        if user_ids:
-            names = []
-            for uid in user_ids:
-                member = guild.get_member(uid) if guild else None
-                names.append(member.display_name if member else f"❓({uid})")
-            field_name = f"{emoji} {key} ({len(user_ids)})"  # número a la par
-            text = "\n".join(f"- {n}" for n in names)
-            
-        else:
-            field_name = f"{emoji} {key} (0)"
-            text = "Nadie aún"
-        embed.add_field(name=field_name, value=text, inline=False)
+        name, value = render_role_field(event, key, emoji, guild)
+        embed.add_field(name=name, value=value, inline=False)
 
     # Menciones de roles
-    if event.get("mention_roles"):
-        mentions = " ".join(f"<@&{r}>" for r in event["mention_roles"])
+    if event.mention_roles:
+        mentions = " ".join(f"<@&{r}>" for r in event.mention_roles)
         embed.add_field(name="Roles mencionados", value=mentions, inline=False)
 
-    if event.get("image"):
-        embed.set_image(url=event["image"])
+    if event.image:
+        embed.set_image(url=event.image)
 
-    return embed
+    embed_cache[event.id] = EmbedCacheEntry(embed, event)
+    return embed, "full"
 
 
 
 # -----------------------------
-# 🔹 FUNCION DE ACTUALIZACIÓN DE EMBED Y HILO
+# 🔹 PARTICIPANTES → MIEMBROS
 # -----------------------------
-async def update_event_embed_and_thread(event):
-    """Actualiza el embed del evento y el hilo si ya fue creado"""
-    channel = bot.get_channel(event["channel_id"])
-    if not channel:
+member_index = MemberIndex()
+
+def participant_members(event, guild, skip=("DECLINADO",)):
+    """Miembros inscritos sin duplicados; ids (y apodos antiguos) se resuelven en O(1)"""
+    seen = set()
+    members = []
+    for ref in event.participants_roles.users(skip):
+        member = member_index.resolve(guild.id, ref)
+        if member and member.id not in seen:
+            seen.add(member.id)
+            members.append(member)
+    return members
+
+def migrate_legacy_participants(event):
+    """Sustituye los participantes guardados como apodo (o id en texto) por el id del miembro"""
+    migrated = 0
+    for ref in event.participants_roles.legacy_refs():
+        member = member_index.resolve(event.guild_id, ref)
+        if member is None:
+            continue  # Ya no está en el servidor (o aún no se han cargado sus miembros)
+        for role in event.rekey_participant(ref, member.id):
+            persister.remove_participant(event.id, role, ref)
+            persister.add_participant(event.id, role, member.id)
+        migrated += 1
+    return migrated
+
+
+@bot.event
+async def on_member_join(member):
+    member_index.add(member)
+
+
+@bot.event
+async def on_member_update(before, after):
+    member_index.update(before, after)
+    if before.display_name != after.display_name:
+        # Los embeds en caché muestran nombres visibles
+        embed_cache.clear()
+
+
+@bot.event
+async def on_user_update(before, after):
+    # Cambio de nombre global: afecta al nombre visible en cada servidor
+    if before.display_name == after.display_name:
         return
+    for guild in bot.guilds:
+        member = guild.get_member(after.id)
+        if member:
+            member_index.rename(member, before.display_name)
+    embed_cache.clear()
+
+
+@bot.event
+async def on_member_remove(member):
+    member_index.remove(member)
+
+
+# -----------------------------
+# 🔹 ÍNDICES DE CANALES Y ROLES (AUTOCOMPLETADO)
+# -----------------------------
+channel_index = {}  # guild_id -> PrefixIndex de canales de texto
+role_index = {}     # guild_id -> PrefixIndex de roles asignables
+
+def assignable_role(role):
+    return not role.is_default() and not role.managed
+
+def load_guild_indexes(guild):
+    channel_index[guild.id] = PrefixIndex((c.id, c.name) for c in guild.text_channels)
+    role_index[guild.id] = PrefixIndex((r.id, r.name) for r in guild.roles if assignable_role(r))
+
+def load_guild(guild):
+    member_index.load_guild(guild)
+    load_guild_indexes(guild)
+    # Eventos antiguos con apodos: ya se pueden resolver con los miembros cargados
+    migrated = sum(migrate_legacy_participants(event) for event in events.by_guild(guild.id))
+    if migrated:
+        print(f"🔁 {migrated} participante(s) antiguos migrados a id en {guild.name}")
+
+
+@bot.event
+async def on_guild_join(guild):
+    load_guild(guild)
+    print(f"➕ Añadido al servidor {guild.name} ({guild.id})")
+
+
+@bot.event
+async def on_guild_remove(guild):
+    # Los eventos del servidor se conservan (por si vuelve); solo se sueltan los índices
+    member_index.drop_guild(guild.id)
+    channel_index.pop(guild.id, None)
+    role_index.pop(guild.id, None)
+    calendar_pages.pop(guild.id, None)
+
+
+@bot.event
+async def on_guild_channel_create(channel):
+    if isinstance(channel, discord.TextChannel):
+        channel_index.setdefault(channel.guild.id, PrefixIndex()).add(channel.id, channel.name)
+
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    channel_index.get(channel.guild.id, PrefixIndex()).remove(channel.id)
+
+
+@bot.event
+async def on_guild_channel_update(before, after):
+    index = channel_index.setdefault(after.guild.id, PrefixIndex())
+    if isinstance(after, discord.TextChannel):
+        index.add(after.id, after.name)
+    else:
+        index.remove(after.id)
+
+
+@bot.event
+async def on_guild_role_create(role):
+    if assignable_role(role):
+        role_index.setdefault(role.guild.id, PrefixIndex()).add(role.id, role.name)
+
+
+@bot.event
+async def on_guild_role_delete(role):
+    role_index.get(role.guild.id, PrefixIndex()).remove(role.id)
 
-    embed = create_event_embed(event)  # Usamos la función que ya tiene todo: título, descripción, hora, duración, imagen
 
-    mentions = []
-    for role_key, (emoji, _) in BUTTONS.items():
-        if role_key == "DECLINADO":
+@bot.event
+async def on_guild_role_update(before, after):
+    if before.name != after.name:
+        role_index.setdefault(after.guild.id, PrefixIndex()).add(after.id, after.name)
+
+
+def pick_id(index, value):
+    """Id elegido en un autocompletado; si el usuario escribió texto libre, se busca por nombre"""
+    if value is None or index is None:
+        return None
+    if value.isdigit() and int(value) in index:
+        return int(value)
+    return index.best(value)
+
+
+async def channel_autocomplete(interaction: discord.Interaction, current: str):
+    index = channel_index.get(interaction.guild_id)
+    if not index:
+        return []
+    return [app_commands.Choice(name=f"#{name}"[:100], value=str(channel_id))
+            for channel_id, name in index.search(current)]
+
+
+async def role_autocomplete(interaction: discord.Interaction, current: str):
+    index = role_index.get(interaction.guild_id)
+    if not index:
+        return []
+    return [app_commands.Choice(name=f"@{name}"[:100], value=str(role_id))
+            for role_id, name in index.search(current)]
+
+
+async def event_autocomplete(interaction: discord.Interaction, current: str):
+    """Próximos eventos por título; los ya pasados salen del índice al encontrarlos"""
+    now_ts = time.time()
+    choices = []
+    stale = []
+    titles = titles_for(interaction.guild_id)
+    for event_id in titles.iter_prefix(current):
+        event = events.get(event_id)
+        if event is None or event.start_ts is None or event.start_ts < now_ts:
+            stale.append(event_id)
             continue
-        names = event.get("participants_roles", {}).get(role_key, [])
-        for name in names:
-            member = discord.utils.find(lambda m: m.display_name == name, channel.guild.members)
-            if member and member not in mentions:
-                mentions.append(member)
-
-    # Actualizar mensaje original
-    if "message_id" in event:
-        try:
-            msg = await channel.fetch_message(event["message_id"])
-            await msg.edit(embed=embed)
-        except:
-            sent_msg = await channel.send(embed=embed)
-            event["message_id"] = sent_msg.id
-            save_events(events)
+        choices.append(app_commands.Choice(name=f"{event.title} · {event.start_str}"[:100], value=event.id))
+        if len(choices) >= MAX_CHOICES:
+            break
+    for event_id in stale:
+        titles.remove(event_id)
+    return choices
 
-    # Actualizar hilo si existe
-    if "thread_id" in event:
-        try:
-            thread = await channel.fetch_message(event["thread_id"])
-            await thread.channel.send(f"Nuevos inscritos: {', '.join([m.mention for m in mentions])}")
-        except:
-            pass
 
 # -----------------------------
-# BOTONES DE INSCRIPCIÓN
+# 🔹 AVISOS AGRUPADOS EN EL HILO
 # -----------------------------
-class EventButton(discord.ui.Button):
-    def __init__(self, label, emoji, style, event_id, role_key):
-        super().__init__(label=label, emoji=emoji, style=style)
-        self.event_id = event_id
-        self.role_key = role_key
+THREAD_NOTIFY_INTERVAL_MS = int(os.getenv("THREAD_NOTIFY_INTERVAL_MS", "30000"))
+thread_notifier = ThreadNotifier(interval_ms=THREAD_NOTIFY_INTERVAL_MS)
 
-async def callback(self, interaction: discord.Interaction):
-    global events
-    user_id = interaction.user.id
-    nickname = interaction.user.display_name
+def notify_thread(event, member, joined):
+    thread_id = event.thread_id
+    guild_id = event.guild_id
 
-    for event in events:
-        if event["id"] == self.event_id:
-            if "participants_roles" not in event:
-                event["participants_roles"] = {key: [] for key in BUTTONS.keys()}
+    async def send(text):
+        # Sin caché: los hilos archivados o aún no recibidos tras reconectar no están en get_channel
+        # (enviar a un hilo archivado lo reabre); los errores los registra thread_notifier
+        await bot.get_partial_messageable(thread_id, guild_id=guild_id).send(text)
 
-            # Registrar al usuario en el rol seleccionado
-            if not event.get("multi_response", False):
-                # Quitar de otros roles primero
-                for key, lst in event["participants_roles"].items():
-                    if key != self.role_key and nickname in lst:
-                        lst.remove(nickname)
+    if joined:
+        thread_notifier.joined(thread_id, member.id, member.mention, send)
+    else:
+        thread_notifier.left(thread_id, member.id, member.mention, send)
 
-            if nickname not in event["participants_roles"][self.role_key]:
-                event["participants_roles"][self.role_key].append(nickname)
 
-            save_events(events)
-            await update_event_embed_and_thread(event)
+# -----------------------------
+# 🔹 EDICIONES AGRUPADAS DEL EMBED
+# -----------------------------
+EDIT_WINDOW_MS = int(os.getenv("EDIT_WINDOW_MS", "1500"))
+message_edits = EditCoalescer(window_ms=EDIT_WINDOW_MS)
 
-            await interaction.response.send_message(
-                f"Te has inscrito como {self.role_key}", ephemeral=True
-            )
-            return
+def schedule_embed_update(event, channel):
+    """Pide una edición del mensaje del evento; en ráfagas se envía una por ventana"""
+    if event.message_id is None:
+        return
+
+    async def edit():
+        # Se renderiza al ejecutar, así siempre sale el estado más reciente.
+        # get_partial_message no hace petición: solo la edición va a la API.
+        embed = await create_event_embed(event)
+        await channel.get_partial_message(event.message_id).edit(embed=embed)
+
+    message_edits.request(event.message_id, edit)
 
 
+# -----------------------------
+# BOTONES DEL EVENTO (ROUTER PERSISTENTE)
+# -----------------------------
+# custom_id = "evento:<ACCIÓN>:<event_id>". EventButton se registra una sola vez
+# con bot.add_dynamic_items y atiende los clics de todos los mensajes de eventos,
+# también los publicados antes de un reinicio; no se guarda una vista por mensaje.
+ACTION_BUTTONS = {
+    "EDITAR": ("Editar evento", discord.ButtonStyle.primary),
+    "ELIMINAR": ("Eliminar evento", discord.ButtonStyle.danger),
+}
 
-class EventActionButton(discord.ui.Button):
-    def __init__(self, label, style, event_id, creator_id):
-        super().__init__(label=label, style=style)
+
+class EventButton(discord.ui.DynamicItem[discord.ui.Button], template=r"evento:(?P<action>[A-Z]+):(?P<event_id>[\w-]+)"):
+    def __init__(self, event_id, action):
+        if action in BUTTONS:
+            emoji, style = BUTTONS[action]
+            label = action
+        else:
+            emoji = None
+            label, style = ACTION_BUTTONS[action]
+        super().__init__(discord.ui.Button(label=label, emoji=emoji, style=style, custom_id=f"evento:{action}:{event_id}"))
         self.event_id = event_id
-        self.creator_id = creator_id
+        self.action = action
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["event_id"], match["action"])
 
     async def callback(self, interaction: discord.Interaction):
-        global events
-        event = next((e for e in events if e["id"] == self.event_id), None)
+        with BUTTON_SECONDS.time(action=self.action):
+            await self.dispatch(interaction)
+
+    async def dispatch(self, interaction):
+        event = events.get(self.event_id) or events.by_message(interaction.message.id)
         if not event:
             await interaction.response.send_message("Evento no encontrado.", ephemeral=True)
             return
 
-        if self.label == "Eliminar evento":
-            events.remove(event)
-            save_events(events)
-            channel = bot.get_channel(event["channel_id"])
-            if channel and "message_id" in event:
-                try:
-                    msg = await channel.fetch_message(event["message_id"])
-                    await msg.delete()
-                except:
-                    pass
-            await interaction.response.send_message("Evento eliminado ✅", ephemeral=True)
+        if self.action in BUTTONS:
+            await signup(interaction, event, self.action)
+        elif self.action == "ELIMINAR":
+            await delete_event_from_button(interaction, event)
+        elif self.action == "EDITAR":
+            # Formulario en una sola interacción; el asistente por DM queda en EventSetupView
+            await interaction.response.send_modal(EventModal(event))
 
-        elif self.label == "Editar evento":
-            await interaction.response.send_message("Te enviaré un DM para editar el evento.", ephemeral=True)
-            # Aquí va tu flujo de edición existente
 
 # -----------------------------
-# CLASES DE BOTONES Y VISTA
+# INSCRIPCIÓN
 # -----------------------------
-class EventButton(discord.ui.Button):
-    def __init__(self, label, emoji, style, event_id, role_key):
-        super().__init__(label=label, emoji=emoji, style=style)
-        self.event_id = event_id
-        self.role_key = role_key
+async def signup(interaction, event, role_key):
+    user_id = interaction.user.id
+    was_attending = event.is_attending(user_id)
 
-    async def callback(self, interaction: discord.Interaction):
-        global events
-        user_id = interaction.user.id
-        channel = interaction.channel
-
-        for event in events:
-            if event["id"] == self.event_id:
-                if "participants_roles" not in event:
-                    event["participants_roles"] = {key: [] for key in BUTTONS.keys()}
-
-                # Agregar usuario al rol seleccionado
-                if user_id not in event["participants_roles"][self.role_key]:
-                    event["participants_roles"][self.role_key].append(user_id)
-
-                # Quitar de otros roles si no es multi-respuesta
-                if not event.get("multi_response", False):
-                    for key, lst in event["participants_roles"].items():
-                        if key != self.role_key and user_id in lst:
-                            lst.remove(user_id)
-
-                save_events(events)
-
-                # Crear embed actualizado
-                embed = await create_event_embed(event)
-
-                # Actualizar mensaje original
-                if channel and "message_id" in event:
-                    try:
-                        msg = await channel.fetch_message(event["message_id"])
-                        await msg.edit(embed=embed, view=EventView(self.event_id, event["creator_id"]))
-                    except:
-                        pass
-
-                # Actualizar hilo si existe
-                if "thread_id" in event:
-                    thread = channel.guild.get_channel(event["thread_id"])
-                    if thread:
-                        mentions = []
-                        for role_key, user_ids in event.get("participants_roles", {}).items():  
-                            if role_key == "DECLINADO":
-                                continue
-                            for uid in user_ids:    
-                                member = guild.get_member(uid)
-                                if member and member not in mentions:
-                                    mentions.append(member.mention)
-                        if mentions:
-                            await thread.send(f"👥 Nuevos inscritos: {', '.join(mentions)}")
-
-                await interaction.response.send_message(
-                    f"✅ Te has inscrito como **{self.role_key}**",
-                    ephemeral=True
-                )
-                return
+    # Agregar usuario al rol seleccionado; sin multi-respuesta, quitarlo de los demás (O(1), máscara de roles)
+    if event.multi_response:
+        added, removed = event.add_participant(role_key, user_id), []
+    else:
+        added, removed = event.switch_participant(role_key, user_id)
+    if added:
+        persister.add_participant(event.id, role_key, user_id)
+    for key in removed:
+        persister.remove_participant(event.id, key, user_id)
+
+    # El embed viaja en la propia respuesta a la interacción (sin fetch_message
+    # ni edición aparte). En ráfagas solo se confirma y la edición se agrupa.
+    key = interaction.message.id
+    if message_edits.open_window(key):
+        embed = await create_event_embed(event)
+        await interaction.response.edit_message(embed=embed)
+    else:
+        await interaction.response.defer()
 
-        # Acciones de botón especiales
-        if self.label == "Eliminar evento":
-            events.remove(event)
-            save_events(events)
-            if channel and "message_id" in event:
-                try:
-                    msg = await channel.fetch_message(event["message_id"])
-                    await msg.delete()
-                except discord.NotFound:
-                    pass
-                except discord.Forbidden:
-                    await interaction.response.send_message("No tengo permisos para eliminar el mensaje.", ephemeral=True)
-                    return
-                except Exception as e:
-                    await interaction.response.send_message(f"Ocurrió un error: {e}", ephemeral=True)
-                    return
-            await interaction.response.send_message("Evento eliminado ✅", ephemeral=True)
-
-        elif self.label == "Editar evento":
-            await interaction.response.send_message("Te enviaré un DM para editar el evento paso a paso.", ephemeral=True)
-            user = interaction.user
-            dm = await user.create_dm()
-
-            # Valores actuales
-            current_title = event["title"]
-            current_description = event["description"]
-            current_channel_id = event["channel_id"]
-            current_start = event["start"]
-            current_end = event.get("end")
-            current_max = event.get("max_attendees")
-
-            # 1️⃣ Título
-            await dm.send(f"Título actual: **{current_title}**\nEscribe el nuevo título o 'skip' para dejarlo igual:")
-            new_title = await wait_for_text(user, dm, 200, allow_none=True)
-            if new_title is None:
-                await dm.send("Edición cancelada.")
-                return
-            if new_title.lower() != "skip" and new_title != "":
-                event["title"] = new_title
-
-            # 2️⃣ Descripción
-            await dm.send(f"Descripción actual: **{current_description or 'Ninguna'}**\nEscribe la nueva o 'skip':")
-            new_description = await wait_for_text(user, dm, 1600, allow_none=True)
-            if new_description is None:
-                await dm.send("Edición cancelada.")
-                return
-            if new_description.lower() != "skip":
-                event["description"] = new_description
-
-            # 3️⃣ Canal
-            guild = bot.get_guild(GUILD_ID)
-            text_channels = [c for c in guild.channels if isinstance(c, discord.TextChannel)]
-            await dm.send(f"Canal actual: <#{current_channel_id}>\nSelecciona nuevo canal por número o 'skip':\n" +
-                          "\n".join(f"{i+1}. {c.name}" for i, c in enumerate(text_channels)))
-            chan_option = await wait_for_number(user, dm, 1, len(text_channels))
-            if chan_option is not None:
-                event["channel_id"] = text_channels[chan_option-1].id
-
-            # 4️⃣ Fecha inicio
-            await dm.send(f"Fecha y hora actual: **{current_start}**\nEscribe nueva fecha ('YYYY-MM-DD HH:MM') o 'skip':")
-            while True:
-                msg_time = await bot.wait_for("message", check=lambda m: m.author == user and m.guild is None)
-                if msg_time.content.lower() == "cancelar":
-                    await dm.send("Edición cancelada.")
-                    return
-                if msg_time.content.lower() == "skip":
-                    break
-                try:
-                    start_dt = datetime.strptime(msg_time.content, "%Y-%m-%d %H:%M")
-                    event["start"] = start_dt.strftime("%Y-%m-%d %H:%M")
-                    break
-                except:
-                    await dm.send("Formato inválido. Intenta de nuevo o 'skip'.")
+        async def edit():
+            await interaction.edit_original_response(embed=await create_event_embed(event))
 
-            # 5️⃣ Duración
-            await dm.send(f"Duración actual: **{current_end or 'Ninguna'}**\nEscribe nueva duración o 'skip':")
-            new_duration = await wait_for_text(user, dm, 100, allow_none=True)
-            if new_duration.lower() != "skip":
-                event["end"] = new_duration
+        message_edits.request(key, edit)
 
-            # 6️⃣ Máximo asistentes
-            await dm.send(f"Número máximo de asistentes actual: **{current_max or 'Ninguno'}**\nEscribe nuevo número (1-250) o 'skip':")
-            while True:
-                msg = await bot.wait_for("message", check=lambda m: m.author == user and m.guild is None)
-                if msg.content.lower() == "cancelar":
-                    await dm.send("Edición cancelada.")
-                    return
-                if msg.content.lower() == "skip":
-                    break
-                if msg.content.isdigit() and 1 <= int(msg.content) <= 250:
-                    event["max_attendees"] = int(msg.content)
-                    break
-                await dm.send("Número inválido. Intenta de nuevo o 'skip'.")
+    await interaction.followup.send(
+        f"✅ Te has inscrito como **{role_key}**",
+        ephemeral=True
+    )
 
-            save_events(events)
+    # Avisar en el hilo solo del cambio (se agrupa por intervalo) y ajustar el rol de asistente
+    if was_attending != event.is_attending(user_id):
+        if event.thread_id is not None:
+            notify_thread(event, interaction.user, joined=not was_attending)
+        await sync_assigned_role(event, user_id)
 
-            # Actualizar embed original
-            channel = bot.get_channel(event["channel_id"])
-            if channel and "message_id" in event:
-                try:
-                    msg = await channel.fetch_message(event["message_id"])
-                    embed = await create_event_embed(event)
-                    await msg.edit(embed=embed, view=EventView(event["id"], event["creator_id"]))
-                except:
-                    await channel.send("No se pudo actualizar el evento, enviando uno nuevo...",
-                                       embed=await create_event_embed(event),
-                                       view=EventView(event["id"], event["creator_id"]))
 
-            await dm.send("Evento editado correctamente ✅")
+async def delete_event_from_button(interaction, event):
+    delete_event(event)
+    channel = bot.get_channel(event.channel_id)
+    if channel and event.message_id is not None:
+        try:
+            await channel.get_partial_message(event.message_id).delete()
+        except discord.NotFound:
+            pass
+        except discord.Forbidden:
+            await interaction.response.send_message("No tengo permisos para eliminar el mensaje.", ephemeral=True)
+            return
+        except Exception as e:
+            await interaction.response.send_message(f"Ocurrió un error: {e}", ephemeral=True)
+            return
+    await interaction.response.send_message("Evento eliminado ✅", ephemeral=True)
 
 
-class EventView(discord.ui.View):
-    def __init__(self, event_id, creator_id):
-        super().__init__(timeout=None)
-        self.event_id = event_id
-        self.creator_id = creator_id
-        for role_key, (emoji, style) in BUTTONS.items():
-            self.add_item(EventButton(label=role_key, emoji=emoji, style=style, event_id=event_id, role_key=role_key))
-        self.add_item(EventButton("Editar evento", discord.ButtonStyle.primary, event_id, creator_id))
-        self.add_item(EventButton("Eliminar evento", discord.ButtonStyle.danger, event_id, creator_id))
+# -----------------------------
+# EDICIÓN DE EVENTO POR DM
+# -----------------------------
+async def edit_event_steps(event, dm, session):
+    # Valores actuales
+    current_title = event.title
+    current_description = event.description
+    current_channel_id = event.channel_id
+    current_start = event.start_str
+    current_end = event.end
+    current_max = event.max_attendees
+
+    # 1️⃣ Título
+    await dm.send(f"Título actual: **{current_title}**\nEscribe el nuevo título o 'skip' para dejarlo igual:")
+    new_title = await wait_for_text(session, dm, 200, allow_none=True)
+    if new_title is None:
+        await dm.send("Edición cancelada.")
+        return
+    if new_title.lower() != "skip" and new_title != "":
+        event.title = new_title
+
+    # 2️⃣ Descripción
+    await dm.send(f"Descripción actual: **{current_description or 'Ninguna'}**\nEscribe la nueva o 'skip':")
+    new_description = await wait_for_text(session, dm, 1600, allow_none=True)
+    if new_description is None:
+        await dm.send("Edición cancelada.")
+        return
+    if new_description.lower() != "skip":
+        event.description = new_description
+
+    # 3️⃣ Canal
+    await dm.send(f"Canal actual: <#{current_channel_id}>\nEscribe el nombre del nuevo canal (basta el principio) o 'skip':")
+    new_channel_id = await ask_channel(session, dm, event.guild_id)
+    if new_channel_id is not None:
+        event.channel_id = new_channel_id
 
+    # 4️⃣ Fecha inicio
+    await dm.send(f"Fecha y hora actual: **{current_start}**\nEscribe nueva fecha ('YYYY-MM-DD HH:MM') o 'skip':")
+    while True:
+        msg_time = await session.next_message()
+        if msg_time.content.lower() == "cancelar":
+            await dm.send("Edición cancelada.")
+            return
+        if msg_time.content.lower() == "skip":
+            break
+        try:
+            start_dt = datetime.strptime(msg_time.content, DATE_FORMAT)
+            if start_dt != event.start:
+                # Nueva fecha: el recordatorio se reprograma al guardar
+                event.set_start(start_dt)
+                event.reminder_sent = False
+            break
+        except:
+            await dm.send("Formato inválido. Intenta de nuevo o 'skip'.")
+
+    # 5️⃣ Duración
+    await dm.send(f"Duración actual: **{current_end or 'Ninguna'}**\nEscribe nueva duración o 'skip':")
+    new_duration = await wait_for_text(session, dm, 100, allow_none=True)
+    if new_duration is None:
+        await dm.send("Edición cancelada.")
+        return
+    if new_duration.lower() != "skip":
+        event.end = new_duration or "No especificada"
+
+    # 6️⃣ Máximo asistentes
+    await dm.send(f"Número máximo de asistentes actual: **{current_max or 'Ninguno'}**\nEscribe nuevo número (1-250) o 'skip':")
+    while True:
+        msg = await session.next_message()
+        if msg.content.lower() == "cancelar":
+            await dm.send("Edición cancelada.")
+            return
+        if msg.content.lower() == "skip":
+            break
+        if msg.content.isdigit() and 1 <= int(msg.content) <= 250:
+            event.max_attendees = int(msg.content)
+            break
+        await dm.send("Número inválido. Intenta de nuevo o 'skip'.")
+
+    if not save_event(event):
+        await dm.send("El evento se ha borrado mientras lo editabas; no se han guardado los cambios.")
+        return
+
+    # Actualizar embed original
+    channel = bot.get_channel(event.channel_id)
+    if channel and event.message_id is not None:
+        try:
+            embed = await create_event_embed(event)
+            await channel.get_partial_message(event.message_id).edit(embed=embed)
+        except:
+            sent_msg = await channel.send("No se pudo actualizar el evento, enviando uno nuevo...",
+                                          embed=await create_event_embed(event),
+                                          view=EventView(event.id))
+            event.message_id = sent_msg.id
+            save_event(event)
+
+    await dm.send("Evento editado correctamente ✅")
 
 
 # -----------------------------
 # VISTA DEL EVENTO
 # -----------------------------
 class EventView(discord.ui.View):
-    def __init__(self, event_id, creator_id):
+    """Botones de un evento; solo contiene EventButton, así que no se guarda por mensaje"""
+    def __init__(self, event_id):
         super().__init__(timeout=None)
-        self.event_id = event_id
-        self.creator_id = creator_id
-        for role_key, (emoji, style) in BUTTONS.items():
-            self.add_item(EventButton(label=role_key, emoji=emoji, style=style, event_id=event_id, role_key=role_key))
-        self.add_item(EventActionButton("Editar evento", discord.ButtonStyle.primary, event_id, creator_id))
-        self.add_item(EventActionButton("Eliminar evento", discord.ButtonStyle.danger, event_id, creator_id))
+        for action in (*BUTTONS, *ACTION_BUTTONS):
+            self.add_item(EventButton(event_id, action))
+
 
 # -----------------------------
-# LOOP DE RECORDATORIOS
+# 🔹 FUNCION DE RECORDATORIO
 # -----------------------------
-@tasks.loop(seconds=60)
-async def check_events():
-    global events
-    now = datetime.now()
-    guild = bot.get_guild(GUILD_ID)
-    if not guild:
-        return
+DM_CONCURRENCY = int(os.getenv("DM_CONCURRENCY", "5"))
+dm_dispatcher = DMDispatcher(concurrency=DM_CONCURRENCY)
 
-    for event in events:
-        start_dt = datetime.strptime(event["start"], "%Y-%m-%d %H:%M")
-
-        # Recordatorio 15 minutos antes
-        if not event.get("reminder_sent") and start_dt - timedelta(minutes=15) <= now < start_dt:
-            # Preparar menciones de todos los participantes (excepto DECLINADO)
-            mentions = []
-            for role_key, user_ids in event.get("participants_roles", {}).items():
-                if role_key == "DECLINADO":
-                    continue
-                for user_id in user_ids:
-                    member = guild.get_member(user_id)
-                    if member and member not in mentions:
-                        mentions.append(member.mention)
-
-            channel = bot.get_channel(event["channel_id"])
-            if channel:
-                # Enviar recordatorio en el canal
-                message = await channel.send(
-                    f"⏰ Recordatorio! 15 minutos para el inicio del evento.\n"
-                    f"Participantes: {', '.join(mentions) if mentions else 'Nadie registrado aún.'}"
-                )
-
-                # Crear hilo a partir del mensaje
-                thread_name = f"Hilo de {event.get('name', 'Evento')}"
-                thread = await message.create_thread(name=thread_name, auto_archive_duration=60)
-
-                # Menciones de los confirmados
-                confirmed_ids = event.get("participants_roles", {}).get("✅ Confirmado", [])
-                confirmed_members = [guild.get_member(uid) for uid in confirmed_ids]
-                confirmed_mentions = [member.mention for member in confirmed_members if member]
-
-                # Enviar mensaje de bienvenida en el hilo
-                welcome_msg = f"👋 Bienvenidos al evento **{event.get('name', 'Evento')}**\nEstá por iniciar, prepárense!"
-                if confirmed_mentions:
-                    welcome_msg += f"\n\n{' '.join(confirmed_mentions)}"
-
-                await thread.send(welcome_msg)
-
-            # Marcar como recordatorio enviado y guardar cambios
-            event["reminder_sent"] = True
-            save_events(events)
-
-        # Si quieres hacer algo justo al inicio del evento, puedes usar esta sección:
-        # if not event.get("channel_created") and now >= start_dt:
-        #     event["channel_created"] = True
-        #     save_events(events)
-# -----------------------------
-# 🔹 FUNCION DE ACTUALIZACIÓN DE EMBED ORIGINAL
-# -----------------------------
-async def update_event_embed(event):
-    """Actualiza solo el embed original del evento con los participantes"""
-    channel = bot.get_channel(event["channel_id"])
-    if not channel or "message_id" not in event:
+async def send_event_reminder(event):
+    """Encola el recordatorio (canal, hilo y un DM por participante) y lo marca como enviado"""
+    channel = bot.get_channel(event.channel_id)
+    if not channel:
         return
 
-    embed = create_event_embed(event)  # Título, descripción, hora, duración, imagen
-    try:
-        msg = await channel.fetch_message(event["message_id"])
-        await msg.edit(embed=embed, view=EventView(event["id"], event["creator_id"]))
-    except:
-        # Si no se encuentra el mensaje, lo enviamos de nuevo
-        sent_msg = await channel.send(embed=embed, view=EventView(event["id"], event["creator_id"]))
-        event["message_id"] = sent_msg.id
-        save_events(events)
-
+    # La clave incluye el inicio: si el evento se reprograma, el nuevo recordatorio es otro trabajo
+    key = f"recordatorio:{event.id}:{int(event.start_ts)}"
+    shard = shard_of(event.guild_id)
+    jobs = [
+        Job(f"{key}:canal", "recordatorio-canal", event.id, shard),
+        Job(f"{key}:hilo", "hilo", event.id, shard),
+    ]
+    jobs += [
+        Job(f"{key}:dm:{member.id}", "recordatorio-dm", event.id, shard, {"user_id": member.id})
+        for member in participant_members(event, channel.guild)
+    ]
+    # Ya en disco al volver: aunque se repita (caída antes de guardar reminder_sent), las claves no se duplican
+    await outbox.enqueue(jobs)
+    print(f"📨 Recordatorio '{event.title}': {len(jobs)} trabajo(s) encolados")
+
+    event.reminder_sent = True
+    save_event(event)
 
 # -----------------------------
-# 🔹 FUNCION DE RECORDATORIO
+# 🔹 PLANIFICADOR DE RECORDATORIOS
 # -----------------------------
-async def send_event_reminder(event):
-    """Envía un recordatorio 15 min antes, crea hilo y menciona participantes correctamente"""
-    channel = bot.get_channel(event["channel_id"])
-    if not channel:
+async def fire_reminder(event_id):
+    """Lo llama el planificador cuando vence el recordatorio de un evento"""
+    event = events.get(event_id)
+    if not event or event.reminder_sent:
+        return
+    if not election.is_leader(reminder_lease(event.guild_id)):
+        # Lo envía el worker con el lease de este shard; si cae, se reintenta aquí
+        reminders.schedule(event_id, time.time() + LEASE_TTL_S)
         return
+    await send_event_reminder(event)
+    if not event.reminder_sent and event_id in events:
+        # No se pudo enviar (canal no disponible): reintentar en un minuto
+        reminders.schedule(event_id, time.time() + 60)
 
-    guild = channel.guild
 
-    # Crear embed del recordatorio
+# -----------------------------
+# 🔹 OUTBOX (RECORDATORIOS, HILOS, DMs Y ROLES)
+# -----------------------------
+# Cada paso con efecto en Discord es un trabajo de la tabla jobs con su clave de
+# idempotencia: si el proceso cae a medias, al volver solo se repite lo que no
+# terminó (y en paralelo, sin esperar a ningún tick). Los trabajos de un shard
+# solo los ejecuta el worker con su lease de recordatorios.
+JOBS_RETENTION_S = 7 * 24 * 3600
+OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", "8"))
+
+def job_event(job):
+    event = events.get(job.event_id)
+    if event is None:
+        raise PermanentJobError(f"el evento {job.event_id} ya no existe")
+    return event
+
+def job_channel(event):
+    channel = bot.get_channel(event.channel_id)
+    if channel is None:
+        raise Exception(f"canal {event.channel_id} no disponible")
+    return channel
+
+async def run_reminder_channel(job):
+    """Embed del recordatorio en el canal principal, con menciones"""
+    event = job_event(job)
+    channel = job_channel(event)
+    guild = channel.guild
     reminder_embed = discord.Embed(
-        title=f"⏰ Recordatorio: {event['title']}",
+        title=f"⏰ Recordatorio: {event.title}",
         description=f"El evento empieza en 15 minutos en <#{channel.id}>!",
         color=discord.Color.green()
     )
 
-    # Preparar menciones y agregar campos por rol
-    mentions = []
-    for role_key, names in event.get("participants_roles", {}).items():
-        if role_key == "DECLINADO":
+    # Agregar campos por rol y preparar menciones (resueltas por id en O(1))
+    for role_key in event.participants_roles.roles():
+        if role_key == "DECLINADO" or role_key not in BUTTONS or not event.participants_roles.count(role_key):
             continue
-        if names:
-            reminder_embed.add_field(
-                name=f"{BUTTONS[role_key][0]} {role_key} ({len(names)})",
-                value="\n".join(f"- {n}" for n in names),
-                inline=False
-            )
-        for name in names:
-            member = discord.utils.find(lambda m: m.display_name == name, guild.members)
-            if member and member not in mentions:
-                mentions.append(member)
-
-    # Enviar embed en el canal principal
-    await channel.send(
-    embed=reminder_embed,
-    content=f"Participantes confirmados: {', '.join(mentions)}" if mentions else None)
-
-    # Crear hilo si no existe
-    thread = None
-    if "thread_id" not in event:
-        thread = await channel.create_thread(
-            name=f"Hilo - {event['title']}",
-            type=discord.ChannelType.public_thread
-        )
-        event["thread_id"] = thread.id
-        save_events(events)
-    else:
-        thread = bot.get_channel(event["thread_id"])
-
-    # Mensaje dentro del hilo
-    if thread:
-        if mentions:
-            await thread.send(f"¡Bienvenidos al evento! {' '.join([m.mention for m in mentions])}")
-        else:
-            await thread.send("¡Bienvenidos al evento! No hay participantes aún.")
-
+        name, value = render_role_field(event, role_key, BUTTONS[role_key][0], guild)
+        reminder_embed.add_field(name=name, value=value, inline=False)
+    mentions = participant_members(event, guild)
 
+    await channel.send(
+        embed=reminder_embed,
+        content=f"Participantes confirmados: {', '.join(m.mention for m in mentions)}" if mentions else None)
+
+def existing_event_thread(channel, name, event):
+    """Hilo ya creado para el evento que no llegó a guardarse (caída entre crearlo y cerrar el trabajo)"""
+    taken = {other.thread_id for other in events.by_channel(channel.id) if other is not event and other.thread_id}
+    return next((t for t in getattr(channel, "threads", ()) if t.name == name and t.id not in taken), None)
+
+async def run_thread_create(job):
+    """Crea el hilo del evento (si ya existe no se crea otro) y encola su mensaje de bienvenida"""
+    event = job_event(job)
+    if event.thread_id is None:
+        channel = job_channel(event)
+        name = f"Hilo - {event.title}"
+        thread = existing_event_thread(channel, name, event)
+        if thread is None:
+            thread = await channel.create_thread(name=name, type=discord.ChannelType.public_thread)
+        event.thread_id = thread.id
+        save_event(event)
+    # El thread_id se escribe en el evento del almacén en la misma transacción que cierra el
+    # trabajo y encola el mensaje: al repetirse tras una caída ya no es None
+    return Done(
+        result={"thread_id": event.thread_id},
+        enqueue=[Job(f"{job.key}:mensaje", "hilo-mensaje", event.id, job.shard, {"thread_id": event.thread_id})],
+        events={event.id: {"thread_id": event.thread_id}},
+    )
 
-    # Enviar DM a cada participante
-    for member in mentions:
-        try:
-            await member.send(f"⏰ Tu evento **{event['title']}** empieza en 15 minutos en <#{channel.id}>!")
-        except:
-            pass
-
-    event["reminder_sent"] = True
-    save_events(events)
+async def run_thread_message(job):
+    event = job_event(job)
+    guild = bot.get_guild(event.guild_id)
+    if guild is None:
+        raise Exception(f"servidor {event.guild_id} no disponible")
+    # Sin fetch: el hilo recién creado puede no estar aún en caché (llega por el gateway)
+    thread = bot.get_partial_messageable(job.payload["thread_id"], guild_id=guild.id)
+    mentions = participant_members(event, guild)
+    if mentions:
+        await thread.send(f"¡Bienvenidos al evento! {' '.join([m.mention for m in mentions])}")
+    else:
+        await thread.send("¡Bienvenidos al evento! No hay participantes aún.")
+
+async def run_reminder_dm(job):
+    event = job_event(job)
+    member = member_index.resolve(event.guild_id, job.payload["user_id"])
+    if member is None:
+        raise PermanentJobError(f"el usuario {job.payload['user_id']} ya no está en el servidor")
+    delivered = await dm_dispatcher.send(
+        member, f"⏰ Tu evento **{event.title}** empieza en 15 minutos en <#{event.channel_id}>!"
+    )
+    if delivered is False:
+        # DMs cerrados o rechazado (4xx): reintentarlo no cambia nada; los 5xx se relanzan y se reintentan
+        raise PermanentJobError(f"no se pudo enviar el DM a {member.id}")
+    return Done(result={"dm": "delivered" if delivered else "skipped"})
+
+async def report_reminder_dms(finished):
+    """Cuando termina el último DM de un recordatorio, resume entregados, fallidos y omitidos"""
+    reminders_done = {
+        job.key.rpartition(":dm:")[0]: job.event_id for job, _, _ in finished if job.kind == "recordatorio-dm"
+    }
+    for key, event_id in reminders_done.items():
+        outcomes = await asyncio.to_thread(store.job_outcomes, f"{key}:dm:")
+        if any(state == "pending" for state, _ in outcomes):
+            continue
+        report = DMReport()
+        for state, result in outcomes:
+            if state == "failed":
+                report.failed += 1
+            elif result and result.get("dm") == "skipped":
+                report.skipped += 1
+            else:
+                report.delivered += 1
+        event = events.get(event_id)
+        print(f"📨 Recordatorio '{event.title if event else event_id}': {report.delivered} DMs enviados, "
+              f"{report.failed} fallidos, {report.skipped} con DMs cerrados")
+
+async def run_role_grant(job):
+    """Deja el rol de asistente de acuerdo con la inscripción actual (da o quita; idempotente)"""
+    event = job_event(job)
+    guild = bot.get_guild(event.guild_id)
+    role = guild.get_role(event.assign_role) if guild and event.assign_role else None
+    if role is None:
+        raise PermanentJobError(f"rol {event.assign_role} no disponible")
+    user_id = job.payload["user_id"]
+    member = guild.get_member(user_id)
+    if member is None:
+        raise PermanentJobError(f"el usuario {user_id} ya no está en el servidor")
+    has_role = any(r.id == role.id for r in member.roles)
+    if event.is_attending(user_id) and not has_role:
+        await member.add_roles(role, reason=f"Inscrito en {event.title}")
+    elif not event.is_attending(user_id) and has_role:
+        await member.remove_roles(role, reason=f"Baja de {event.title}")
+
+outbox = Outbox(store, {
+    "recordatorio-canal": run_reminder_channel,
+    "hilo": run_thread_create,
+    "hilo-mensaje": run_thread_message,
+    "recordatorio-dm": run_reminder_dm,
+    "rol": run_role_grant,
+}, concurrency=OUTBOX_CONCURRENCY)
+outbox.on_finished = report_reminder_dms
+# Solo los shards cuyo lease de recordatorios tiene este worker (todos con un solo proceso)
+outbox.shards = lambda: [shard for shard in OWNED_SHARDS if election.is_leader(f"recordatorios:{shard}")]
+
+async def sync_assigned_role(event, user_id):
+    """Encola dar o quitar el rol de asistente (ya en disco al volver; un fallo se ve en el handler)"""
+    if event.assign_role:
+        job = Job(f"rol:{event.id}:{user_id}", "rol", event.id, shard_of(event.guild_id), {"user_id": user_id})
+        await outbox.enqueue([job], replace=True)
 
-# -----------------------------
-# 🔹 LOOP DE RECORDATORIOS
-# -----------------------------
-@tasks.loop(seconds=60)
-async def check_event_reminders():
-    now = datetime.now()
-    for event in events:
-        start_dt = datetime.strptime(event["start"], "%Y-%m-%d %H:%M")
-        reminder_time = start_dt - timedelta(minutes=15)
-        if not event.get("reminder_sent") and now >= reminder_time:
-            await send_event_reminder(event)
 
 
 # -----------------------------
 # COMANDO /ping
 # -----------------------------
-@bot.tree.command(name="ping", description="Responde con Pong!", guild=discord.Object(id=GUILD_ID))
+@bot.tree.command(name="ping", description="Responde con Pong!")
 async def ping(interaction: discord.Interaction):
     await interaction.response.send_message("🏓 Pong!", ephemeral=True)
 
 # -----------------------------
 # COMANDO /hola
 # -----------------------------
-@bot.tree.command(name="hola", description="Te saluda el bot", guild=discord.Object(id=GUILD_ID))
+@bot.tree.command(name="hola", description="Te saluda el bot")
 async def hola(interaction: discord.Interaction):
     await interaction.response.send_message("👋 Hola! ¿Cómo estás?", ephemeral=True)
 
@@ -631,105 +1221,168 @@ async def hola(interaction: discord.Interaction):
 # -----------------------------
 @bot.tree.command(
     name="eventos",
-    description="Crear un evento paso a paso",
-    guild=discord.Object(id=GUILD_ID)
+    description="Crear un evento con un formulario (o paso a paso por DM)"
 )
-async def eventos(interaction: discord.Interaction):
+@app_commands.guild_only()
+@app_commands.describe(
+    modo="Formulario (por defecto) o asistente paso a paso por DM",
+    canal="Canal donde publicar (por defecto, el actual)",
+    mencionar="Rol a mencionar al publicar",
+)
+@app_commands.choices(modo=[
+    app_commands.Choice(name="Formulario", value="formulario"),
+    app_commands.Choice(name="Asistente por DM", value="dm"),
+])
+@app_commands.autocomplete(canal=channel_autocomplete, mencionar=role_autocomplete)
+async def eventos(interaction: discord.Interaction, modo: app_commands.Choice[str] = None,
+                  canal: str = None, mencionar: str = None):
+    draft = {}
+    channel_id = pick_id(channel_index.get(interaction.guild_id), canal)
+    if channel_id is not None:
+        draft["channel_id"] = channel_id
+    role_id = pick_id(role_index.get(interaction.guild_id), mencionar)
+    if role_id is not None:
+        draft["mention_roles"] = [role_id]
+
+    if modo is None or modo.value == "formulario":
+        await interaction.response.send_modal(EventModal(draft=draft))
+        return
+
     await interaction.response.defer(ephemeral=True)  # Dice a Discord "espera"
     await interaction.followup.send("Te enviaré un DM para crear el evento paso a paso.", ephemeral=True)
     user = interaction.user
     dm = await user.create_dm()
+    await run_dm_session(user, dm, lambda session: create_event_dm(interaction, user, dm, session, draft))
 
-    event = {}  # Diccionario temporal
+
+# -----------------------------
+# COMANDO /editar_evento
+# -----------------------------
+def can_edit_event(interaction, event):
+    """El creador del evento o quien puede gestionar el servidor (permisos resueltos en el canal)"""
+    return interaction.user.id == event.creator_id or interaction.permissions.manage_guild
+
+@bot.tree.command(name="editar_evento", description="Editar un evento próximo")
+@app_commands.guild_only()
+@app_commands.describe(evento="Título del evento (empieza a escribir para buscarlo)")
+@app_commands.autocomplete(evento=event_autocomplete)
+async def editar_evento(interaction: discord.Interaction, evento: str):
+    event = events.get(evento)
+    if event is None:
+        event_id = titles_for(interaction.guild_id).best(evento)
+        event = events.get(event_id) if event_id else None
+    if event is None or event.guild_id != interaction.guild_id:
+        await interaction.response.send_message("Evento no encontrado.", ephemeral=True)
+        return
+    if not can_edit_event(interaction, event):
+        await interaction.response.send_message(
+            "Solo quien creó el evento o alguien con permiso de gestionar el servidor puede editarlo.",
+            ephemeral=True)
+        return
+    await interaction.response.send_modal(EventModal(event))
+
+
+# -----------------------------
+# ASISTENTE DE CREACIÓN POR DM
+# -----------------------------
+async def create_event_dm(interaction, user, dm, session, draft=None):
+    event = dict(draft or {})  # Diccionario temporal (con lo ya elegido en /eventos)
+    guild_id = interaction.guild_id
 
     # -----------------------------
     # 1️⃣ Canal
     # -----------------------------
-    await dm.send("¿Dónde publicar el evento?\n1️⃣ Canal actual\n2️⃣ Otro canal\nEscribe el número o 'cancelar'.")
-    option = await wait_for_number(user, dm, 1, 2)
-    if option is None:
-        await dm.send("Creación cancelada.")
-        return
-
-    if option == 1:
-        channel_id = interaction.channel_id
-    else:
-        guild = bot.get_guild(GUILD_ID)
-        text_channels = [c for c in guild.channels if isinstance(c, discord.TextChannel)]
-        await dm.send("Listado de canales:\n" + "\n".join(f"{i+1}. {c.name}" for i, c in enumerate(text_channels)))
-        chan_option = await wait_for_number(user, dm, 1, len(text_channels))
-        if chan_option is None:
+    if event.get("channel_id") is None:
+        await dm.send("¿Dónde publicar el evento?\n1️⃣ Canal actual\n2️⃣ Otro canal\nEscribe el número o 'cancelar'.")
+        option = await wait_for_number(session, dm, 1, 2)
+        if option is None:
             await dm.send("Creación cancelada.")
             return
-        channel_id = text_channels[chan_option - 1].id
-    event["channel_id"] = channel_id
+
+        if option == 1:
+            channel_id = interaction.channel_id
+        else:
+            await dm.send("Escribe el nombre del canal (basta el principio, p. ej. 'even'):")
+            channel_id = await ask_channel(session, dm, guild_id)
+            if channel_id is None:
+                await dm.send("Creación cancelada.")
+                return
+        event["channel_id"] = channel_id
 
     # -----------------------------
     # 2️⃣ Título
     # -----------------------------
-    await dm.send("Ingresa el título del evento (máx 200 caracteres):")
-    title = await wait_for_text(user, dm, 200)
-    if title is None:
-        await dm.send("Creación cancelada.")
-        return
-    event["title"] = title
+    # Lo ya rellenado en el formulario de /eventos no se vuelve a preguntar
+    if "title" not in event:
+        await dm.send("Ingresa el título del evento (máx 200 caracteres):")
+        title = await wait_for_text(session, dm, 200)
+        if title is None:
+            await dm.send("Creación cancelada.")
+            return
+        event["title"] = title
 
     # -----------------------------
     # 3️⃣ Descripción
     # -----------------------------
-    await dm.send("Ingresa la descripción (máx 1600 caracteres, 'None' para sin descripción):")
-    description = await wait_for_text(user, dm, 1600, allow_none=True)
-    if description is None:
-        await dm.send("Creación cancelada.")
-        return
-    event["description"] = description or "Sin descripción"
+    if "description" not in event:
+        await dm.send("Ingresa la descripción (máx 1600 caracteres, 'None' para sin descripción):")
+        description = await wait_for_text(session, dm, 1600, allow_none=True)
+        if description is None:
+            await dm.send("Creación cancelada.")
+            return
+        event["description"] = description or "Sin descripción"
 
     # -----------------------------
     # 4️⃣ Máximo asistentes
     # -----------------------------
-    await dm.send("Número máximo de asistentes (1-250, 'None' para sin límite):")
-    while True:
-        msg = await bot.wait_for("message", check=lambda m: m.author == user and m.guild is None)
-        if msg.content.lower() == "cancelar":
-            await dm.send("Creación cancelada.")
-            return
-        if msg.content.lower() == "none":
-            max_attendees = None
-            break
-        if msg.content.isdigit() and 1 <= int(msg.content) <= 250:
-            max_attendees = int(msg.content)
-            break
-        await dm.send("Número inválido. Intenta de nuevo.")
-    event["max_attendees"] = max_attendees
+    if "max_attendees" not in event:
+        await dm.send("Número máximo de asistentes (1-250, 'None' para sin límite):")
+        while True:
+            msg = await session.next_message()
+            if msg.content.lower() == "cancelar":
+                await dm.send("Creación cancelada.")
+                return
+            if msg.content.lower() == "none":
+                max_attendees = None
+                break
+            if msg.content.isdigit() and 1 <= int(msg.content) <= 250:
+                max_attendees = int(msg.content)
+                break
+            await dm.send("Número inválido. Intenta de nuevo.")
+        event["max_attendees"] = max_attendees
 
     # -----------------------------
     # 5️⃣ Fecha inicio
     # -----------------------------
-    await dm.send("Fecha y hora de inicio ('YYYY-MM-DD HH:MM') o 'ahora':")
-    while True:
-        msg_time = await bot.wait_for("message", check=lambda m: m.author == user and m.guild is None)
-        if msg_time.content.lower() == "cancelar":
-            await dm.send("Creación cancelada.")
-            return
-        try:
-            start_dt = datetime.now() if msg_time.content.lower() == "ahora" else datetime.strptime(msg_time.content, "%Y-%m-%d %H:%M")
-            break
-        except:
-            await dm.send("Formato inválido. Intenta de nuevo.")
-    event["start"] = start_dt.strftime("%Y-%m-%d %H:%M")
+    if "start" not in event:
+        await dm.send("Fecha y hora de inicio ('YYYY-MM-DD HH:MM') o 'ahora':")
+        while True:
+            msg_time = await session.next_message()
+            if msg_time.content.lower() == "cancelar":
+                await dm.send("Creación cancelada.")
+                return
+            try:
+                start_dt = datetime.now() if msg_time.content.lower() == "ahora" else datetime.strptime(msg_time.content, DATE_FORMAT)
+                break
+            except:
+                await dm.send("Formato inválido. Intenta de nuevo.")
+        event["start"] = start_dt.strftime(DATE_FORMAT)
 
     # -----------------------------
     # 6️⃣ Duración
     # -----------------------------
-    await dm.send("Duración del evento (ej. '2 horas', '1 día', '30 minutos') o 'None' si no hay duración:")
-    duration = await wait_for_text(user, dm, 100, allow_none=True)
-    event["end"] = duration or "No especificada"
+    if "end" not in event:
+        await dm.send("Duración del evento (ej. '2 horas', '1 día', '30 minutos') o 'None' si no hay duración:")
+        duration = await wait_for_text(session, dm, 100, allow_none=True)
+        if duration is None:
+            await dm.send("Creación cancelada.")
+            return
+        event["end"] = duration or "No especificada"
 
     # -----------------------------
     # 7️⃣ OPCIONES AVANZADAS
     # -----------------------------
-    guild = bot.get_guild(GUILD_ID)
-    roles = [r for r in guild.roles if not r.is_default() and not r.managed]
+    roles = role_index.get(guild_id)
 
     while True:
         await dm.send(
@@ -744,7 +1397,7 @@ async def eventos(interaction: discord.Interaction):
             "8️⃣ Finalizar creación del evento\n"
             "Escribe el número de la opción que quieres configurar, o '8' para finalizar."
         )
-        option = await wait_for_number(user, dm, 1, 8)
+        option = await wait_for_number(session, dm, 1, 8)
         if option is None:
             await dm.send("Creación cancelada.")
             return
@@ -756,23 +1409,12 @@ async def eventos(interaction: discord.Interaction):
             if not roles:
                 await dm.send("No hay roles disponibles para mencionar.")
                 continue
-            roles_text = "\n".join(f"{i+1}. {r.name}" for i, r in enumerate(roles))
-            await dm.send("Selecciona los roles a mencionar escribiendo sus números separados por comas, o 'none':\n" + roles_text)
-            while True:
-                response = await wait_for_text(user, dm, 200)
-                if response.lower() == "none":
-                    event["mention_roles"] = []
-                    break
-                try:
-                    indices = [int(x.strip()) - 1 for x in response.split(",")]
-                    selected_roles = [roles[i].id for i in indices if 0 <= i < len(roles)]
-                    if selected_roles:
-                        event["mention_roles"] = selected_roles
-                        break
-                    else:
-                        await dm.send("Ningún rol válido seleccionado. Intenta de nuevo o 'none'.")
-                except:
-                    await dm.send("Entrada inválida. Escribe los números separados por comas o 'none'.")
+            await dm.send("Escribe los roles a mencionar separados por comas (basta el principio del nombre), o 'none':")
+            selected_roles = await ask_roles(session, dm, guild_id)
+            if selected_roles is None:
+                await dm.send("Creación cancelada.")
+                return
+            event["mention_roles"] = selected_roles
 
         # -----------------------------
         # 2️⃣ Añadir imagen
@@ -780,11 +1422,8 @@ async def eventos(interaction: discord.Interaction):
         elif option == 2:
             await dm.send("Envía la imagen directamente al chat o un URL de imagen, o escribe 'none' para omitir:")
 
-            def check_img(m):
-                return m.author == user and m.guild is None and (m.attachments or m.content)
-
             while True:
-                msg_img = await bot.wait_for("message", check=check_img)
+                msg_img = await session.next_message()
                 if msg_img.content.lower() == "cancelar":
                     await dm.send("Creación cancelada.")
                     return
@@ -815,8 +1454,12 @@ async def eventos(interaction: discord.Interaction):
         # -----------------------------
         elif option == 3:
             await dm.send("Escribe el color en hexadecimal (ej. FF0000) o 'skip' para dejarlo verde:")
-            color_hex = await wait_for_text(user, dm, 7, allow_none=True)
-            if color_hex.lower() != "skip":
+            color_hex = await wait_for_text(session, dm, 7, allow_none=True)
+            if color_hex is None:
+                await dm.send("Creación cancelada.")
+                return
+            # 'none' (cadena vacía) o 'skip': se queda verde
+            if color_hex and color_hex.lower() != "skip":
                 try:
                     color_str = color_hex.replace("#", "")
                     event["color"] = int(color_str, 16)
@@ -830,30 +1473,22 @@ async def eventos(interaction: discord.Interaction):
             if not roles:
                 await dm.send("No hay roles disponibles.")
                 continue
-            roles_text = "\n".join(f"{i+1}. {r.name}" for i, r in enumerate(roles))
-            await dm.send("Selecciona los roles permitidos escribiendo sus números separados por comas, o 'none':\n" + roles_text)
-            while True:
-                response = await wait_for_text(user, dm, 200)
-                if response.lower() == "none":
-                    event["allowed_roles"] = []
-                    break
-                try:
-                    indices = [int(x.strip()) - 1 for x in response.split(",")]
-                    allowed_roles = [roles[i].id for i in indices if 0 <= i < len(roles)]
-                    if allowed_roles:
-                        event["allowed_roles"] = allowed_roles
-                        break
-                    else:
-                        await dm.send("Ningún rol válido. Intenta de nuevo o escribe 'none'.")
-                except:
-                    await dm.send("Entrada inválida. Intenta de nuevo.")
+            await dm.send("Escribe los roles permitidos separados por comas (basta el principio del nombre), o 'none':")
+            allowed_roles = await ask_roles(session, dm, guild_id)
+            if allowed_roles is None:
+                await dm.send("Creación cancelada.")
+                return
+            event["allowed_roles"] = allowed_roles
 
         # -----------------------------
         # 5️⃣ Multi-respuesta
         # -----------------------------
         elif option == 5:
             await dm.send("Permitir que un usuario elija múltiples roles? (si/no)")
-            multi = await wait_for_text(user, dm, 3)
+            multi = await wait_for_text(session, dm, 3)
+            if multi is None:
+                await dm.send("Creación cancelada.")
+                return
             event["multi_response"] = True if multi.lower() == "si" else False
 
         # -----------------------------
@@ -863,26 +1498,20 @@ async def eventos(interaction: discord.Interaction):
             if not roles:
                 await dm.send("No hay roles disponibles.")
                 continue
-            roles_text = "\n".join(f"{i+1}. {r.name}" for i, r in enumerate(roles))
-            await dm.send("Selecciona el rol que se asignará automáticamente a los asistentes o 'none':\n" + roles_text)
-            while True:
-                response = await wait_for_text(user, dm, 100)
-                if response.lower() == "none":
-                    event["assign_role"] = None
-                    break
-                try:
-                    index = int(response.strip()) - 1
-                    if 0 <= index < len(roles):
-                        event["assign_role"] = roles[index].id
-                        break
-                    else:
-                        await dm.send("Número inválido. Intenta de nuevo o 'none'.")
-                except:
-                    await dm.send("Entrada inválida. Intenta de nuevo o 'none'.")
+            await dm.send("Escribe el rol que se asignará automáticamente a los asistentes o 'none':")
+            assign_role = await ask_roles(session, dm, guild_id, max_roles=1)
+            if assign_role is None:
+                await dm.send("Creación cancelada.")
+                return
+            event["assign_role"] = assign_role[0] if assign_role else None
         elif option == 7:  # Cierre de inscripciones
             await dm.send("Escribe cuándo cerrar las inscripciones ('10 minutos', '1 hora', 'none'):")
-            close_time = await wait_for_text(user, dm, 50, allow_none=True)
-            if close_time.lower() != "none":
+            close_time = await wait_for_text(session, dm, 50, allow_none=True)
+            if close_time is None:
+                await dm.send("Creación cancelada.")
+                return
+            # Con 'none' wait_for_text devuelve "": sin cierre
+            if close_time:
                 event["registration_close"] = close_time
         elif option == 8:  # Finalizar
             break
@@ -893,95 +1522,469 @@ async def eventos(interaction: discord.Interaction):
     event_id = str(uuid.uuid4())
     event["id"] = event_id
     event["creator_id"] = user.id
+    event["guild_id"] = guild_id
     event["participants_roles"] = {key: [] for key in BUTTONS.keys()}
     event["registration_open"] = True
     event["reminder_sent"] = False
     event["channel_created"] = False
 
-    events.append(event)
-    save_events(events)
+    event = Event.from_dict(event)
+    add_event(event)
 
     # -----------------------------
     # Enviar embed con roles mencionados
     # -----------------------------
-    channel = bot.get_channel(event["channel_id"])
+    channel = await publish_event(event)
     if channel:
-        embed = await create_event_embed(event)  # ✅
-        sent_message = await channel.send(embed=embed, view=EventView(event_id, user.id))
-        event["message_id"] = sent_message.id
-        save_events(events)
         await dm.send(f"Evento creado correctamente en <#{channel.id}>")
     else:
         await dm.send("No se pudo enviar el evento al canal, pero se guardó en la base de datos.")
 
+
+async def publish_event(event):
+    """Publica el embed con sus botones y guarda el message_id; None si no hay canal"""
+    channel = bot.get_channel(event.channel_id)
+    if not channel:
+        return None
+    embed = await create_event_embed(event)
+    sent_message = await channel.send(embed=embed, view=EventView(event.id))
+    event.message_id = sent_message.id
+    save_event(event)
+    return channel
+
+# -----------------------------
+# FORMULARIOS DE EVENTO (MODAL + MENÚS)
+# -----------------------------
+# Crear un evento: /eventos abre EventModal (textos) y al enviarlo aparece
+# EventSetupView (canal, roles y opciones) con el botón Publicar: dos
+# interacciones en lugar de ~10 idas y vueltas por DM. "Editar evento" abre el
+# mismo formulario relleno. El asistente por DM sigue disponible como alternativa.
+def parse_start(text):
+    text = text.strip()
+    if text.lower() == "ahora":
+        return datetime.now().replace(second=0, microsecond=0)
+    return datetime.strptime(text, DATE_FORMAT)
+
+
+class EventModal(discord.ui.Modal):
+    def __init__(self, event=None, draft=None):
+        super().__init__(title="Editar evento" if event else "Crear evento", timeout=600)
+        self.event = event
+        self.draft = draft or {}  # Canal / roles ya elegidos en /eventos
+
+        self.title_input = discord.ui.TextInput(
+            label="Título", max_length=200,
+            default=event.title if event else None
+        )
+        self.description_input = discord.ui.TextInput(
+            label="Descripción", style=discord.TextStyle.paragraph, max_length=1600, required=False,
+            default=event.description if event else None
+        )
+        self.start_input = discord.ui.TextInput(
+            label="Inicio (YYYY-MM-DD HH:MM o 'ahora')", max_length=16, placeholder="2025-09-21 16:30",
+            default=event.start_str if event and event.start else None
+        )
+        self.duration_input = discord.ui.TextInput(
+            label="Duración (ej. '2 horas', '30 minutos')", max_length=100, required=False,
+            default=event.end if event else None
+        )
+        self.max_input = discord.ui.TextInput(
+            label="Máx. asistentes (1-250, vacío = sin límite)", max_length=3, required=False,
+            default=str(event.max_attendees) if event and event.max_attendees else None
+        )
+        for item in (self.title_input, self.description_input, self.start_input,
+                     self.duration_input, self.max_input):
+            self.add_item(item)
+
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            start_dt = parse_start(self.start_input.value)
+        except ValueError:
+            await interaction.response.send_message(
+                "Fecha inválida. Usa 'YYYY-MM-DD HH:MM' o 'ahora' y vuelve a intentarlo.", ephemeral=True)
+            return
+
+        max_text = self.max_input.value.strip()
+        if max_text and not (max_text.isdigit() and 1 <= int(max_text) <= 250):
+            await interaction.response.send_message(
+                "Número máximo de asistentes inválido (1-250 o vacío).", ephemeral=True)
+            return
+
+        fields = {
+            "title": self.title_input.value,
+            "description": self.description_input.value or "Sin descripción",
+            "start": start_dt,
+            "end": self.duration_input.value or "No especificada",
+            "max_attendees": int(max_text) if max_text else None,
+        }
+
+        if self.event is None:
+            draft = {"channel_id": interaction.channel_id, **self.draft, **fields}
+            await interaction.response.send_message(
+                "Elige canal y opciones (todo opcional) y pulsa **Publicar**:",
+                view=EventSetupView(interaction.user, draft), ephemeral=True)
+            return
+
+        event = self.event
+        event.title = fields["title"]
+        event.description = fields["description"]
+        event.end = fields["end"]
+        event.max_attendees = fields["max_attendees"]
+        if start_dt != event.start:
+            # Nueva fecha: el recordatorio se reprograma al guardar
+            event.set_start(start_dt)
+            event.reminder_sent = False
+        if not save_event(event):
+            await interaction.response.send_message("Evento no encontrado.", ephemeral=True)
+            return
+
+        channel = bot.get_channel(event.channel_id)
+        if channel:
+            schedule_embed_update(event, channel)
+        await interaction.response.send_message(
+            "Evento editado correctamente ✅\nSi quieres, cambia también canal u opciones y pulsa **Guardar**:",
+            view=EventSetupView(interaction.user, event.to_dict(include_participants=False), event),
+            ephemeral=True)
+
+
+class EventSetupView(discord.ui.View):
+    """Canal, roles y opciones del evento con menús de selección.
+
+    Trabaja sobre un borrador con el esquema de eventos.json; al crear se
+    publica con Publicar y al editar se aplica con Guardar.
+    """
+
+    def __init__(self, user, draft, event=None):
+        super().__init__(timeout=600)
+        self.user = user
+        self.draft = draft
+        self.event = event
+
+        channel_id = draft.get("channel_id")
+        self.channel_select = discord.ui.ChannelSelect(
+            placeholder="Canal del evento", channel_types=[discord.ChannelType.text],
+            default_values=[discord.Object(id=channel_id, type=discord.abc.GuildChannel)] if channel_id else [],
+            row=0
+        )
+        self.mention_select = discord.ui.RoleSelect(
+            placeholder="Roles a mencionar al publicar", min_values=0, max_values=25,
+            default_values=[discord.Object(id=r, type=discord.Role) for r in draft.get("mention_roles") or []],
+            row=1
+        )
+        self.allowed_select = discord.ui.RoleSelect(
+            placeholder="Restringir inscripción a estos roles", min_values=0, max_values=25,
+            default_values=[discord.Object(id=r, type=discord.Role) for r in draft.get("allowed_roles") or []],
+            row=2
+        )
+        assign_role = draft.get("assign_role")
+        self.assign_select = discord.ui.RoleSelect(
+            placeholder="Rol que se asigna a los asistentes", min_values=0, max_values=1,
+            default_values=[discord.Object(id=assign_role, type=discord.Role)] if assign_role else [],
+            row=3
+        )
+        self.channel_select.callback = self.on_channel
+        self.mention_select.callback = self.on_mention_roles
+        self.allowed_select.callback = self.on_allowed_roles
+        self.assign_select.callback = self.on_assign_role
+        for item in (self.channel_select, self.mention_select, self.allowed_select, self.assign_select):
+            self.add_item(item)
+
+        self.multi_button.label = self.multi_label()
+        self.submit_button.label = "Guardar" if event else "Publicar"
+
+    def multi_label(self):
+        return f"Multi-respuesta: {'Sí' if self.draft.get('multi_response') else 'No'}"
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        return interaction.user.id == self.user.id
+
+    # -----------------------------
+    # MENÚS (solo actualizan el borrador)
+    # -----------------------------
+    async def on_channel(self, interaction: discord.Interaction):
+        self.draft["channel_id"] = self.channel_select.values[0].id
+        await interaction.response.defer()
+
+    async def on_mention_roles(self, interaction: discord.Interaction):
+        self.draft["mention_roles"] = [r.id for r in self.mention_select.values]
+        await interaction.response.defer()
+
+    async def on_allowed_roles(self, interaction: discord.Interaction):
+        self.draft["allowed_roles"] = [r.id for r in self.allowed_select.values]
+        await interaction.response.defer()
+
+    async def on_assign_role(self, interaction: discord.Interaction):
+        values = self.assign_select.values
+        self.draft["assign_role"] = values[0].id if values else None
+        await interaction.response.defer()
+
+    # -----------------------------
+    # BOTONES
+    # -----------------------------
+    @discord.ui.button(label="Multi-respuesta: No", style=discord.ButtonStyle.secondary, row=4)
+    async def multi_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.draft["multi_response"] = not self.draft.get("multi_response")
+        button.label = self.multi_label()
+        await interaction.response.edit_message(view=self)
+
+    @discord.ui.button(label="Publicar", style=discord.ButtonStyle.success, row=4)
+    async def submit_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.stop()
+        if self.event is None:
+            await self.publish(interaction)
+        else:
+            await self.apply(interaction)
+
+    @discord.ui.button(label="Asistente por DM", style=discord.ButtonStyle.secondary, row=4)
+    async def dm_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.stop()
+        await interaction.response.edit_message(content="Seguimos por DM.", view=None)
+        user = interaction.user
+        dm = await user.create_dm()
+        if self.event is None:
+            # Se sigue con el borrador: lo del formulario y los menús no se vuelve a preguntar
+            await dm.send("Te ayudo a terminar el evento paso a paso (ya tengo lo que rellenaste en el formulario).")
+            draft = dict(self.draft)
+            flow = lambda session: create_event_dm(interaction, user, dm, session, draft)
+        else:
+            await dm.send("Te ayudo a editar el evento paso a paso.")
+            flow = lambda session: edit_event_steps(self.event, dm, session)
+        await run_dm_session(user, dm, flow)
+
+    @discord.ui.button(label="Cancelar", style=discord.ButtonStyle.danger, row=4)
+    async def cancel_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.stop()
+        text = "Creación cancelada." if self.event is None else "Sin más cambios."
+        await interaction.response.edit_message(content=text, view=None)
+
+    async def publish(self, interaction):
+        event = Event.from_dict(dict(
+            self.draft,
+            id=str(uuid.uuid4()),
+            creator_id=interaction.user.id,
+            guild_id=interaction.guild_id,
+            participants_roles={key: [] for key in BUTTONS.keys()},
+            registration_open=True,
+            reminder_sent=False,
+            channel_created=False,
+        ))
+        add_event(event)
+
+        await interaction.response.edit_message(content="Publicando evento…", view=None)
+        channel = await publish_event(event)
+        if channel:
+            await interaction.edit_original_response(content=f"Evento creado correctamente en <#{channel.id}>")
+        else:
+            await interaction.edit_original_response(
+                content="No se pudo enviar el evento al canal, pero se guardó en la base de datos.")
+
+    async def apply(self, interaction):
+        event = self.event
+        if event.id not in events:
+            await interaction.response.edit_message(content="Evento no encontrado.", view=None)
+            return
+
+        old_channel_id = event.channel_id
+        event.channel_id = self.draft.get("channel_id") or old_channel_id
+        event.mention_roles = self.draft.get("mention_roles") or []
+        event.allowed_roles = self.draft.get("allowed_roles") or []
+        event.assign_role = self.draft.get("assign_role")
+        event.multi_response = bool(self.draft.get("multi_response"))
+        save_event(event)
+        await interaction.response.edit_message(content="Evento editado correctamente ✅", view=None)
+
+        if event.channel_id == old_channel_id:
+            channel = bot.get_channel(event.channel_id)
+            if channel:
+                schedule_embed_update(event, channel)
+            return
+
+        # Cambio de canal: se mueve el mensaje (borrar el antiguo y publicar de nuevo)
+        old_channel = bot.get_channel(old_channel_id)
+        if old_channel and event.message_id is not None:
+            try:
+                await old_channel.get_partial_message(event.message_id).delete()
+            except (discord.NotFound, discord.Forbidden):
+                pass
+        event.message_id = None
+        if not await publish_event(event):
+            await interaction.edit_original_response(
+                content="Evento editado, pero no se pudo publicar en el nuevo canal.")
+
+
 # -----------------------------
 # COMANDO /proximos_eventos_visual
 # -----------------------------
-@bot.tree.command(name="proximos_eventos_visual", description="Muestra los próximos eventos tipo calendario con emojis", guild=discord.Object(id=GUILD_ID))
-async def proximos_eventos_visual(interaction: discord.Interaction):
-    await interaction.response.defer(ephemeral=True)
-    
-    global events
-    now = datetime.now()
+# Calendario paginado sobre events.upcoming() (índice ordenado por inicio de cada
+# servidor): cada página cuesta O(log n + CALENDAR_PAGE_SIZE) y se guarda ya
+# renderizada hasta que cambia algún evento del servidor (events.version) o el
+# minuto (emojis de proximidad).
+CALENDAR_PAGE_SIZE = 10
+CALENDAR_TITLE_LIMIT = 80  # 10 líneas por campo caben de sobra en los 1024 caracteres
 
-    # Filtrar eventos futuros
-    upcoming = [e for e in events if datetime.strptime(e["start"], "%Y-%m-%d %H:%M") >= now]
+calendar_pages = {}  # guild_id -> ((events.version, minuto), {página: embed})
 
-    if not upcoming:
-        await interaction.followup.send(embed=embed, ephemeral=True)
-        return
 
-    # Ordenar por fecha
-    upcoming.sort(key=lambda e: datetime.strptime(e["start"], "%Y-%m-%d %H:%M"))
+def calendar_page_count(guild_id, now_ts):
+    return max(1, -(-events.count_from(guild_id, now_ts) // CALENDAR_PAGE_SIZE))
+
+
+def render_calendar_page(guild_id, page, now_ts):
+    total = events.count_from(guild_id, now_ts)
+    pages = calendar_page_count(guild_id, now_ts)
+    page_events = events.upcoming(guild_id, now_ts, offset=page * CALENDAR_PAGE_SIZE, limit=CALENDAR_PAGE_SIZE)
 
-    # Agrupar por día
-    events_by_day = {}
-    for e in upcoming:
-        start_dt = datetime.strptime(e["start"], "%Y-%m-%d %H:%M")
-        day_str = start_dt.strftime("%A, %d %B %Y")  # Ej. Lunes, 15 Septiembre 2025
-        if day_str not in events_by_day:
-            events_by_day[day_str] = []
-        events_by_day[day_str].append(e)
-
-    # Crear embed principal
     embed = discord.Embed(
         title="📅 Próximos eventos",
         description="Eventos próximos organizados por día 🌟",
         color=discord.Color.green()
     )
+    embed.set_footer(text=f"Página {page + 1}/{pages} · {total} eventos")
+
+    # Agrupar por día (ya vienen ordenados por fecha)
+    events_by_day = {}
+    for e in page_events:
+        day_str = e.start.strftime("%A, %d %B %Y")  # Ej. Lunes, 15 Septiembre 2025
+        events_by_day.setdefault(day_str, []).append(e)
 
     for day_index, (day, day_events) in enumerate(events_by_day.items()):
         value_text = ""
         for e in day_events:
-            start_dt = datetime.strptime(e["start"], "%Y-%m-%d %H:%M")
-            time_str = start_dt.strftime("%H:%M")
-            
+            time_str = e.start.strftime("%H:%M")
+
             # Emojis según proximidad
-            delta = start_dt - now
-            if delta.total_seconds() < 3600:  # Menos de 1h
+            delta = e.start_ts - now_ts
+            if delta < 3600:  # Menos de 1h
                 emoji = "🔥"
-            elif delta.total_seconds() < 86400:  # Menos de 24h
+            elif delta < 86400:  # Menos de 24h
                 emoji = "⏰"
             else:
                 emoji = "📌"
 
-            # Añadir detalles del evento
-            value_text += f"{emoji} {time_str} - **{e['title']}** en <#{e['channel_id']}>\n"
+            title = e.title if len(e.title) <= CALENDAR_TITLE_LIMIT else e.title[:CALENDAR_TITLE_LIMIT - 1] + "…"
+            value_text += f"{emoji} {time_str} - **{title}** en <#{e.channel_id}>\n"
 
         # Separador de semanas cada 7 días
         week_emoji = "🗓️" if day_index % 7 == 0 else ""
         embed.add_field(name=f"{week_emoji} {day}", value=value_text, inline=False)
+    return embed
+
 
-    await interaction.response.send_message(embed=embed)
+def calendar_page(guild_id, page):
+    """Embed y vista de una página del calendario del servidor (desde caché si nada cambió)"""
+    minute = int(time.time() // 60) * 60
+    key = (events.version(guild_id), minute)
+    cached = calendar_pages.get(guild_id)
+    if cached is None or cached[0] != key:
+        cached = calendar_pages[guild_id] = (key, {})
+    rendered = cached[1]
+
+    pages = calendar_page_count(guild_id, minute)
+    page = min(max(page, 0), pages - 1)
+    embed = rendered.get(page)
+    if embed is None:
+        embed = rendered[page] = render_calendar_page(guild_id, page, minute)
+
+    view = discord.ui.View(timeout=None)
+    view.add_item(CalendarPageButton("prev", page - 1, disabled=page == 0))
+    view.add_item(CalendarPageButton("next", page + 1, disabled=page >= pages - 1))
+    return embed, view
+
+
+class CalendarPageButton(discord.ui.DynamicItem[discord.ui.Button], template=r"calendario:(?P<direction>prev|next):(?P<page>-?\d+)"):
+    """Botones ◀/▶ del calendario; el custom_id lleva la página de destino"""
+
+    def __init__(self, direction, page, disabled=False):
+        super().__init__(discord.ui.Button(
+            emoji="◀️" if direction == "prev" else "▶️", style=discord.ButtonStyle.secondary,
+            custom_id=f"calendario:{direction}:{page}", disabled=disabled))
+        self.page = page
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["direction"], int(match["page"]))
+
+    async def callback(self, interaction: discord.Interaction):
+        embed, view = calendar_page(interaction.guild_id, self.page)
+        await interaction.response.edit_message(embed=embed, view=view)
+
+
+@bot.tree.command(name="proximos_eventos_visual", description="Muestra los próximos eventos tipo calendario con emojis")
+@app_commands.guild_only()
+async def proximos_eventos_visual(interaction: discord.Interaction):
+    if not events.count_from(interaction.guild_id, time.time()):
+        await interaction.response.send_message("No hay eventos próximos.", ephemeral=True)
+        return
+
+    embed, view = calendar_page(interaction.guild_id, 0)
+    await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
 
 # -----------------------------
-# KEEP ALIVE PARA KOYEB
+# COMANDO /historial
 # -----------------------------
-from keep_alive import keep_alive
-keep_alive()
+HISTORY_LIST_LIMIT = 4000  # Margen bajo el límite de 4096 de la descripción del embed
+
+
+async def month_autocomplete(interaction: discord.Interaction, current: str):
+    return [app_commands.Choice(name=m, value=m) for m in archive_for(interaction.guild_id).months() if m.startswith(current)][:MAX_CHOICES]
+
+
+@bot.tree.command(name="historial", description="Eventos archivados y estadísticas de asistencia")
+@app_commands.guild_only()
+@app_commands.describe(mes="Mes archivado (AAAA-MM); sin indicarlo, resumen de todo el archivo")
+@app_commands.autocomplete(mes=month_autocomplete)
+async def historial(interaction: discord.Interaction, mes: str = None):
+    archive = archive_for(interaction.guild_id)
+    months = archive.months()
+    if not months:
+        await interaction.response.send_message("Aún no hay eventos archivados.", ephemeral=True)
+        return
+    if mes is not None and mes not in months:
+        await interaction.response.send_message(f"No hay eventos archivados de {mes}.", ephemeral=True)
+        return
+
+    await interaction.response.defer(ephemeral=True)
+    selected = [mes] if mes else months
+    # Solo aquí se leen los meses archivados (en un hilo: son ficheros comprimidos)
+    loaded = await asyncio.to_thread(lambda: {m: archive.load(m) for m in selected})
+    stats = archive_stats([e for month_events in loaded.values() for e in month_events])
+
+    lines = []
+    if mes:
+        for e in loaded[mes]:
+            attendees = archive_stats([e])["signups"]
+            lines.append(f"`{e.get('start') or 'sin fecha'}` **{e.get('title', 'Evento sin título')}** ({attendees} 👥)")
+    else:
+        for month, month_events in loaded.items():
+            month_stats = archive_stats(month_events)
+            lines.append(f"`{month}` {month_stats['events']} eventos, {month_stats['signups']} inscripciones")
+    description = ""
+    for i, line in enumerate(lines):
+        if len(description) + len(line) + 1 > HISTORY_LIST_LIMIT:
+            description += f"… y {len(lines) - i} más"
+            break
+        description += line + "\n"
+
+    embed = discord.Embed(title=f"🗄️ Historial {mes or 'completo'}", description=description, color=discord.Color.dark_grey())
+    embed.add_field(name="Eventos", value=str(stats["events"]), inline=True)
+    embed.add_field(name="Inscripciones", value=str(stats["signups"]), inline=True)
+    if stats["signups"]:
+        embed.add_field(name="Por rol", value="\n".join(
+            f"{BUTTONS[role][0] if role in BUTTONS else '•'} {role}: {count}"
+            for role, count in stats["by_role"].items() if count), inline=False)
+    if stats["top_attendees"]:
+        top = []
+        for uid, count in stats["top_attendees"]:
+            member = member_index.resolve(interaction.guild_id, uid)
+            top.append(f"{member.display_name if member else f'❓({uid})'}: {count}")
+        embed.add_field(name="Más asistencias", value="\n".join(top), inline=False)
+    await interaction.followup.send(embed=embed, ephemeral=True)
+
 
 # -----------------------------
 # INICIAR BOT
 # -----------------------------
-bot.run(TOKEN)
+# Importable sin conectarse (benchmarks y simulaciones)
+if __name__ == "__main__":
+    bot.run(TOKEN)
@@ -0,0 +1,79 @@
+# members.py
+
+
+# -----------------------------
+# ÍNDICE DE MIEMBROS
+# -----------------------------
+class MemberIndex:
+    """Miembros de cada servidor indexados por id y por nombre visible.
+
+    Sustituye a discord.utils.find(..., guild.members), que recorre todo el
+    servidor por cada participante. Se mantiene al día con on_member_join,
+    on_member_update y on_member_remove.
+    """
+
+    def __init__(self):
+        self._by_id = {}    # guild_id -> {user_id: member}
+        self._by_name = {}  # guild_id -> {display_name: {user_id, ...}}
+
+    def __len__(self):
+        return sum(len(members) for members in self._by_id.values())
+
+    # -----------------------------
+    # CARGA Y ACTUALIZACIÓN
+    # -----------------------------
+    def load_guild(self, guild):
+        self._by_id[guild.id] = {}
+        self._by_name[guild.id] = {}
+        for member in guild.members:
+            self.add(member)
+
+    def drop_guild(self, guild_id):
+        self._by_id.pop(guild_id, None)
+        self._by_name.pop(guild_id, None)
+
+    def add(self, member):
+        guild_id = member.guild.id
+        self._by_id.setdefault(guild_id, {})[member.id] = member
+        self._by_name.setdefault(guild_id, {}).setdefault(member.display_name, set()).add(member.id)
+
+    def remove(self, member):
+        guild_id = member.guild.id
+        self._by_id.get(guild_id, {}).pop(member.id, None)
+        self._unindex_name(guild_id, member.display_name, member.id)
+
+    def update(self, before, after):
+        self.rename(after, before.display_name)
+
+    def rename(self, member, old_name):
+        if old_name != member.display_name:
+            self._unindex_name(member.guild.id, old_name, member.id)
+        self.add(member)
+
+    def _unindex_name(self, guild_id, name, user_id):
+        names = self._by_name.get(guild_id, {})
+        ids = names.get(name)
+        if ids is not None:
+            ids.discard(user_id)
+            if not ids:
+                del names[name]
+
+    # -----------------------------
+    # BÚSQUEDAS O(1)
+    # -----------------------------
+    def get(self, guild_id, user_id):
+        return self._by_id.get(guild_id, {}).get(user_id)
+
+    def find_by_name(self, guild_id, name):
+        ids = self._by_name.get(guild_id, {}).get(name)
+        if not ids:
+            return None
+        return self.get(guild_id, next(iter(ids)))
+
+    def resolve(self, guild_id, ref):
+        """Devuelve el miembro de un participante guardado como id (actual) o apodo (antiguo)"""
+        if isinstance(ref, int):
+            return self.get(guild_id, ref)
+        if isinstance(ref, str) and ref.isdigit():
+            return self.get(guild_id, int(ref))
+        return self.find_by_name(guild_id, ref)
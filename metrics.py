@@ -0,0 +1,245 @@
+# metrics.py
+import asyncio
+import bisect
+import logging
+import math
+import os
+import time
+
+# Cubetas de latencia en segundos (de 1 ms a 30 s)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# Cubetas de tamaño en bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Operaciones más lentas que esto (ms) se escriben en el log; 0 lo desactiva
+SLOW_OP_MS = float(os.getenv("SLOW_OP_MS", "0"))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_number(value):
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# -----------------------------
+# MÉTRICAS
+# -----------------------------
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}  # tupla de etiquetas -> valor
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(name, "") for name in self.labelnames), 0)
+
+    def render(self):
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_number(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # tupla de etiquetas -> [cuentas por cubeta..., +Inf], suma
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        # Solo se incrementa la cubeta propia; las acumuladas se calculan al exportar
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def time(self, **labels):
+        """with histogram.time(...): mide el bloque y avisa si supera SLOW_OP_MS"""
+        return _Timer(self, labels)
+
+    def count(self, **labels):
+        series = self._series.get(tuple(labels.get(name, "") for name in self.labelnames))
+        return sum(series[0]) if series else 0
+
+    def render(self):
+        for key, (counts, total) in sorted(self._series.items()):
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(labels, ('le', _format_number(bound)))} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_number(total)}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+
+class Gauge:
+    """Valor instantáneo que se lee con `read()` al exportar (p. ej. len(events))"""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, read):
+        self.name = name
+        self.help = help_text
+        self.read = read
+
+    def render(self):
+        try:
+            value = self.read()
+        except Exception:
+            return
+        if value is not None and math.isfinite(value):
+            yield f"{self.name} {_format_number(value)}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        self.histogram.observe(elapsed, **self.labels)
+        if SLOW_OP_MS and elapsed * 1000 >= SLOW_OP_MS:
+            labels = ", ".join(f"{k}={v}" for k, v in self.labels.items())
+            print(f"🐢 Operación lenta: {self.histogram.name}({labels}) {elapsed * 1000:.0f} ms")
+        return False
+
+
+# -----------------------------
+# REGISTRO Y FORMATO PROMETHEUS
+# -----------------------------
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name, help_text, read):
+        return self._register(Gauge(name, help_text, read))
+
+    def render(self):
+        """Texto en formato de exposición de Prometheus (text/plain; version=0.0.4)"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# -----------------------------
+# INSTRUMENTACIÓN DE discord.py
+# -----------------------------
+REST_SECONDS = REGISTRY.histogram(
+    "bot_rest_request_seconds", "Duración de las peticiones REST a Discord por ruta",
+    ("method", "route", "status"),
+)
+RATE_LIMIT_HITS = REGISTRY.counter(
+    "bot_rate_limit_hits_total", "Respuestas 429 recibidas de Discord", ("scope",),
+)
+
+
+def instrument_http(http):
+    """Envuelve HTTPClient.request para medir cada llamada por ruta (plantilla, sin ids)"""
+    original = http.request
+
+    async def request(route, **kwargs):
+        status = "ok"
+        started = time.perf_counter()
+        try:
+            return await original(route, **kwargs)
+        except Exception as e:
+            status = str(getattr(e, "status", type(e).__name__))
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            REST_SECONDS.observe(elapsed, method=route.method, route=route.path, status=status)
+            if SLOW_OP_MS and elapsed * 1000 >= SLOW_OP_MS:
+                print(f"🐢 Petición lenta: {route.method} {route.path} {elapsed * 1000:.0f} ms ({status})")
+
+    http.request = request
+
+
+class RateLimitLogHandler(logging.Handler):
+    """Cuenta cada 429 que discord.py escribe en el logger discord.http, una sola vez.
+
+    Todos los 429 se avisan con "We are being rate limited"; los globales,
+    además, justo después y sin await entre medias con "Global rate limit".
+    Por eso el 429 se cuenta como de ruta en la siguiente vuelta del loop,
+    salvo que antes llegue el aviso global.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._pending = 0  # 429 avisados aún sin contar (pueden resultar globales)
+
+    def emit(self, record):
+        if record.levelno < logging.WARNING:
+            return
+        message = record.msg if isinstance(record.msg, str) else ""
+        if message.startswith("We are being rate limited"):
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                RATE_LIMIT_HITS.inc(scope="route")
+                return
+            self._pending += 1
+            loop.call_soon(self._count_route)
+        elif message.startswith("Global rate limit"):
+            if self._pending:
+                self._pending -= 1
+            RATE_LIMIT_HITS.inc(scope="global")
+
+    def _count_route(self):
+        if self._pending:
+            self._pending -= 1
+            RATE_LIMIT_HITS.inc(scope="route")
+
+
+def watch_rate_limits():
+    logger = logging.getLogger("discord.http")
+    if not any(isinstance(h, RateLimitLogHandler) for h in logger.handlers):
+        logger.addHandler(RateLimitLogHandler())
@@ -0,0 +1,215 @@
+# models.py
+import re
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+
+from roster import Roster
+
+# Formato de fecha usado en eventos.json y en los DMs
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+# Campos internos que no forman parte del esquema de eventos.json
+_INTERNAL_FIELDS = ("start_ts", "extra", "version", "header_version", "role_versions")
+
+# Duración libre de los organizadores ("2 horas", "1 día", "1h 30min"): prefijo de unidad -> segundos
+_DURATION_UNITS = (("sem", 7 * 86400), ("d", 86400), ("h", 3600), ("m", 60))
+_DURATION_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*([^\W\d_]+)")
+
+
+def parse_duration(text):
+    """Segundos de una duración escrita a mano; None si no se reconoce ninguna unidad"""
+    total = None
+    for amount, unit in _DURATION_RE.findall((text or "").lower()):
+        for prefix, seconds in _DURATION_UNITS:
+            if unit.startswith(prefix):
+                total = (total or 0) + float(amount.replace(",", ".")) * seconds
+                break
+    return total
+
+
+# -----------------------------
+# MODELO DE EVENTO
+# -----------------------------
+@dataclass(slots=True)
+class Event:
+    """Evento con campos tipados; la fecha de inicio se parsea una sola vez.
+
+    `start` es la hora local (como la escriben los organizadores) y `start_ts`
+    el mismo instante en segundos epoch (UTC), para comparar sin strptime.
+    """
+
+    id: str
+    title: str = "Evento sin título"
+    description: str = "Sin descripción"
+    channel_id: int | None = None
+    guild_id: int | None = None
+    start: datetime | None = None
+    start_ts: float | None = None
+    start_raw: str | None = None  # Fecha de eventos.json que no se pudo leer: se guarda tal cual
+    end: str | None = None
+    creator_id: int | None = None
+    message_id: int | None = None
+    thread_id: int | None = None
+    max_attendees: int | None = None
+    multi_response: bool = False
+    registration_open: bool = True
+    registration_close: str | None = None
+    reminder_sent: bool = False
+    channel_created: bool = False
+    thread_created: bool = False
+    color: int | None = None
+    image: str | None = None
+    mention_roles: list[int] = field(default_factory=list)
+    allowed_roles: list[int] = field(default_factory=list)
+    assign_role: int | None = None
+    participants_roles: Roster = field(default_factory=Roster)  # En eventos.json: {rol: [usuarios]}
+    # Formato anterior a los roles (solo apodos). Queda fuera del Roster a propósito: no dice con qué rol se
+    # apuntó cada uno y el bot nunca lo ha mostrado ni contado; meterlo en un rol cambiaría las listas y el
+    # aforo de eventos antiguos. Se conserva tal cual (sin duplicados) para no perder el dato.
+    participants: list | None = None
+    extra: dict = field(default_factory=dict)  # Claves desconocidas, se conservan tal cual
+    # Versiones de mutación (no se guardan); las usa la caché de embeds
+    version: int = 0
+    header_version: int = 0
+    role_versions: dict[str, int] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.id = str(self.id)
+        if not isinstance(self.participants_roles, Roster):
+            self.participants_roles = Roster.from_dict(self.participants_roles)
+        if self.start is not None and self.start_ts is None:
+            self.start_ts = self.start.timestamp()
+
+    # -----------------------------
+    # FECHAS
+    # -----------------------------
+    def set_start(self, start):
+        self.start = start
+        self.start_ts = start.timestamp() if start is not None else None
+        self.start_raw = None
+
+    @property
+    def end_ts(self):
+        """Fin estimado (epoch): inicio + duración, o solo el inicio si no se entiende la duración"""
+        if self.start_ts is None:
+            return None
+        return self.start_ts + (parse_duration(self.end) or 0)
+
+    @property
+    def start_str(self):
+        return self.start.strftime(DATE_FORMAT) if self.start else "No especificado"
+
+    # -----------------------------
+    # MUTACIONES VERSIONADAS
+    # -----------------------------
+    def touch(self):
+        """Marca un cambio en título, fechas u opciones (no en participantes)"""
+        self.version += 1
+        self.header_version += 1
+
+    def add_participant(self, role, user_id):
+        if not self.participants_roles.add(role, user_id):
+            return False
+        self._bump_role(role)
+        return True
+
+    def remove_participant(self, role, user_id):
+        if not self.participants_roles.remove(role, user_id):
+            return False
+        self._bump_role(role)
+        return True
+
+    def switch_participant(self, role, user_id):
+        """Deja al usuario solo en `role` (sin multi-respuesta); devuelve (añadido, roles quitados)"""
+        added, removed = self.participants_roles.switch(role, user_id)
+        for name in ([role] if added else []) + removed:
+            self._bump_role(name)
+        return added, removed
+
+    def rekey_participant(self, old_ref, user_id):
+        """Migra un participante antiguo (apodo) a su id; devuelve los roles que tenía"""
+        roles = self.participants_roles.rekey(old_ref, user_id)
+        for name in roles:
+            self._bump_role(name)
+        return roles
+
+    def update_from(self, other, participants_only=False):
+        """Copia los campos guardados de `other` (la versión de otro worker) y marca el cambio"""
+        for f in fields(self):
+            if f.name in _INTERNAL_FIELDS or f.name == "id":
+                continue
+            if participants_only and f.name != "participants_roles":
+                continue
+            setattr(self, f.name, getattr(other, f.name))
+        if not participants_only:
+            self.start_ts = other.start_ts
+        # Cambia header_version: el embed se reconstruye entero
+        self.touch()
+
+    def is_attending(self, user_id):
+        """Inscrito en algún rol que no sea DECLINADO"""
+        return self.participants_roles.in_any(user_id, skip=("DECLINADO",))
+
+    def _bump_role(self, role):
+        self.version += 1
+        self.role_versions[role] = self.role_versions.get(role, 0) + 1
+
+    # -----------------------------
+    # (DE)SERIALIZACIÓN JSON
+    # -----------------------------
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        kwargs = {}
+        for f in fields(cls):
+            if f.name in _INTERNAL_FIELDS:
+                continue
+            if f.name in data:
+                kwargs[f.name] = data.pop(f.name)
+
+        start = kwargs.get("start")
+        if isinstance(start, str):
+            try:
+                kwargs["start"] = datetime.strptime(start, DATE_FORMAT)
+            except ValueError:
+                # Sin fecha para el bot, pero to_dict la vuelve a escribir hasta que se edite
+                print(f"⚠️ Fecha ilegible en el evento {kwargs.get('id')}: {start!r}")
+                kwargs["start"] = None
+                kwargs["start_raw"] = start
+        for key in ("channel_id", "guild_id", "creator_id", "message_id", "thread_id", "max_attendees", "assign_role", "color"):
+            if kwargs.get(key) is not None:
+                kwargs[key] = int(kwargs[key])
+        for key in ("mention_roles", "allowed_roles"):
+            kwargs[key] = [int(r) for r in kwargs.get(key) or []]
+        kwargs["participants_roles"] = Roster.from_dict(kwargs.get("participants_roles") or {})
+        if kwargs.get("participants"):
+            # Lista antigua de apodos (fuera del Roster, ver el campo): sin duplicados
+            kwargs["participants"] = list(dict.fromkeys(kwargs["participants"]))
+        for key in ("title", "description"):
+            if kwargs.get(key) is None:
+                kwargs.pop(key, None)
+        return cls(extra=data, **kwargs)
+
+    def to_dict(self, include_participants=True):
+        """Devuelve el evento con el esquema de eventos.json"""
+        data = dict(self.extra)
+        for f in fields(self):
+            if f.name in _INTERNAL_FIELDS:
+                continue
+            value = getattr(self, f.name)
+            if f.name == "start_raw":
+                continue
+            if f.name == "start":
+                value = value.strftime(DATE_FORMAT) if value else self.start_raw
+            elif f.name == "participants_roles":
+                if include_participants:
+                    value = value.to_dict()
+                else:
+                    # Solo las claves de rol; los participantes se guardan por fila
+                    value = {k: [] for k in value.roles()}
+            elif isinstance(value, list):
+                value = list(value)
+            if value is None and f.name != "max_attendees":
+                continue
+            data[f.name] = value
+        return data
@@ -0,0 +1,81 @@
+# notify.py
+import asyncio
+
+MESSAGE_LIMIT = 2000
+
+
+# -----------------------------
+# AVISOS AGRUPADOS EN HILOS
+# -----------------------------
+class ThreadNotifier:
+    """Avisa en el hilo del evento solo de altas y bajas, como mucho una vez por intervalo.
+
+    Las altas y bajas se acumulan por hilo y se compensan entre sí (quien se
+    apunta y se borra dentro del mismo intervalo no aparece).
+    """
+
+    def __init__(self, interval_ms=30000):
+        self.interval = interval_ms / 1000
+        self.messages_sent = 0
+        self._joined = {}  # thread_id -> {user_id: mención}
+        self._left = {}    # thread_id -> {user_id: mención}
+        self._senders = {}  # thread_id -> función async que envía un texto al hilo
+        self._tasks = {}
+
+    def joined(self, thread_id, user_id, mention, send):
+        left = self._left.setdefault(thread_id, {})
+        if left.pop(user_id, None) is None:
+            self._joined.setdefault(thread_id, {})[user_id] = mention
+        self._touch(thread_id, send)
+
+    def left(self, thread_id, user_id, mention, send):
+        joined = self._joined.setdefault(thread_id, {})
+        if joined.pop(user_id, None) is None:
+            self._left.setdefault(thread_id, {})[user_id] = mention
+        self._touch(thread_id, send)
+
+    def _touch(self, thread_id, send):
+        self._senders[thread_id] = send
+        if thread_id not in self._tasks:
+            self._tasks[thread_id] = asyncio.get_running_loop().create_task(self._flush_later(thread_id))
+
+    async def _flush_later(self, thread_id):
+        try:
+            await asyncio.sleep(self.interval)
+            await self.flush(thread_id)
+        finally:
+            self._tasks.pop(thread_id, None)
+
+    async def flush(self, thread_id):
+        joined = self._joined.pop(thread_id, {})
+        left = self._left.pop(thread_id, {})
+        send = self._senders.pop(thread_id, None)
+        if send is None:
+            return
+
+        lines = []
+        if joined:
+            lines.append(f"👥 Nuevos inscritos: {', '.join(joined.values())}")
+        if left:
+            lines.append(f"👋 Se han dado de baja: {', '.join(left.values())}")
+        for chunk in split_message("\n".join(lines)):
+            try:
+                await send(chunk)
+                self.messages_sent += 1
+            except Exception as e:
+                print(f"❌ Error al avisar en el hilo {thread_id}: {e}")
+                return
+
+
+def split_message(text, limit=MESSAGE_LIMIT):
+    """Parte un texto largo en trozos que Discord acepta (por comas o saltos de línea)"""
+    chunks = []
+    while len(text) > limit:
+        cut = max(text.rfind(", ", 0, limit), text.rfind("\n", 0, limit))
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip(", \n")
+    if text:
+        chunks.append(text)
+    return chunks
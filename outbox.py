@@ -0,0 +1,173 @@
+# outbox.py
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+
+import discord
+
+from metrics import REGISTRY
+
+JOB_SECONDS = REGISTRY.histogram("bot_outbox_job_seconds", "Duración de cada trabajo del outbox", ("kind", "result"))
+
+
+# -----------------------------
+# TRABAJOS
+# -----------------------------
+@dataclass(slots=True)
+class Job:
+    """Un paso con efecto en Discord; `key` es su clave de idempotencia"""
+    key: str
+    kind: str
+    event_id: str | None = None
+    shard: int = 0
+    payload: dict = field(default_factory=dict)
+    attempts: int = 0
+
+
+@dataclass(slots=True)
+class Done:
+    """Resultado de un trabajo: datos a guardar, trabajos siguientes y campos de eventos
+    ({evento: {campo: valor}}), todo en la misma transacción que lo cierra"""
+    result: dict | None = None
+    enqueue: list = field(default_factory=list)
+    events: dict = field(default_factory=dict)
+
+
+def job_row(job):
+    return {"key": job.key, "kind": job.kind, "event_id": job.event_id, "shard": job.shard, "payload": job.payload}
+
+
+class PermanentJobError(Exception):
+    """El trabajo no tiene sentido reintentarlo (evento borrado, sin permisos...)"""
+
+
+# -----------------------------
+# OUTBOX PERSISTENTE
+# -----------------------------
+class Outbox:
+    """Cola de trabajos guardada en el almacén (tabla jobs) con reintentos.
+
+    - Cada trabajo tiene una clave de idempotencia: encolar dos veces la misma
+      clave no duplica el envío (salvo `replace=True`, que la vuelve a dejar
+      pendiente para trabajos que convergen a un estado, como dar un rol).
+    - Se ejecutan por lotes de hasta `batch` trabajos vencidos, `concurrency`
+      a la vez; los resultados del lote se guardan en una sola transacción.
+    - Los fallos se reintentan con espera exponencial (con jitter) hasta
+      `max_attempts`; los errores 4xx de Discord no se reintentan.
+    - Al arrancar, todo lo vencido (p. ej. tras un redeploy) se drena en
+      paralelo sin esperar a ningún tick. Sin nada pendiente se vuelve a mirar
+      cada `idle_interval` segundos (trabajos de otros workers, leases nuevos).
+    """
+
+    def __init__(self, store, handlers, concurrency=8, batch=50, max_attempts=8,
+                 backoff_base=2.0, backoff_max=900.0, idle_interval=30.0):
+        self.store = store
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.batch = batch
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.idle_interval = idle_interval
+        self.shards = lambda: None  # Shards cuyos trabajos ejecuta este worker (None: todos)
+        self.pending = 0  # trabajos pendientes (todos los shards) en la última vuelta del bucle, para métricas
+        self.on_finished = None  # async (lista de (trabajo, estado, resultado)) tras guardar cada lote
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    # -----------------------------
+    # ENCOLAR
+    # -----------------------------
+    async def enqueue(self, jobs, replace=False):
+        """Guarda los trabajos (ya en disco al volver) y despierta al bucle"""
+        if not jobs:
+            return
+        rows = [job_row(job) for job in jobs]
+        await asyncio.to_thread(self.store.enqueue_jobs, rows, time.time(), replace)
+        self._wakeup.set()
+
+    # -----------------------------
+    # EJECUCIÓN
+    # -----------------------------
+    def _backoff(self, attempts):
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempts)
+        return delay * random.uniform(0.8, 1.2)
+
+    async def _run_job(self, job, semaphore):
+        async with semaphore:
+            handler = self.handlers.get(job.kind)
+            started = time.perf_counter()
+            try:
+                if handler is None:
+                    raise PermanentJobError(f"tipo de trabajo desconocido: {job.kind}")
+                done = await handler(job) or Done()
+                JOB_SECONDS.observe(time.perf_counter() - started, kind=job.kind, result="ok")
+                return job.key, "done", done.result, [job_row(j) for j in done.enqueue], None, None, done.events
+            except Exception as e:
+                permanent = isinstance(e, PermanentJobError) or (
+                    isinstance(e, discord.HTTPException) and 400 <= e.status < 500 and e.status != 429)
+                attempts = job.attempts + 1
+                if permanent or attempts >= self.max_attempts:
+                    JOB_SECONDS.observe(time.perf_counter() - started, kind=job.kind, result="failed")
+                    print(f"❌ Trabajo {job.key} descartado tras {attempts} intento(s): {e}")
+                    return job.key, "failed", None, [], str(e), None, {}
+                JOB_SECONDS.observe(time.perf_counter() - started, kind=job.kind, result="retry")
+                return job.key, "pending", None, [], str(e), time.time() + self._backoff(attempts), {}
+
+    async def run_due(self):
+        """Ejecuta un lote de trabajos vencidos; devuelve cuántos se procesaron"""
+        rows = await asyncio.to_thread(self.store.due_jobs, time.time(), self.shards(), self.batch)
+        jobs = [Job(**row) for row in rows]
+        if not jobs:
+            return 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+        outcomes = await asyncio.gather(*(self._run_job(job, semaphore) for job in jobs))
+        await asyncio.to_thread(self.store.finish_jobs, outcomes, time.time())
+        finished = [(job, state, result) for job, (_, state, result, *_) in zip(jobs, outcomes) if state != "pending"]
+        if finished and self.on_finished is not None:
+            try:
+                await self.on_finished(finished)
+            except Exception as e:
+                print(f"❌ Error tras terminar trabajos del outbox: {e}")
+        return len(jobs)
+
+    async def drain(self):
+        """Procesa lotes hasta que no quede nada vencido (arranque y benchmarks)"""
+        total = 0
+        while processed := await self.run_due():
+            total += processed
+        return total
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        first = True
+        while True:
+            self._wakeup.clear()
+            try:
+                processed = await self.drain()
+                if first and processed:
+                    print(f"📬 Outbox: {processed} trabajo(s) pendientes procesados al arrancar")
+                first = False
+                next_at = await asyncio.to_thread(self.store.next_job_at, self.shards())
+                self.pending = await asyncio.to_thread(self.store.pending_jobs)
+            except Exception as e:
+                print(f"❌ Error en el outbox: {e}")
+                next_at = time.time() + 5
+            delay = self.idle_interval if next_at is None else min(self.idle_interval, max(0.0, next_at - time.time()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,109 @@
+# persistence.py
+import asyncio
+
+from metrics import REGISTRY, SIZE_BUCKETS
+
+FLUSH_SECONDS = REGISTRY.histogram("bot_store_flush_seconds", "Duración de cada volcado a disco")
+FLUSH_BYTES = REGISTRY.histogram("bot_store_flush_bytes", "Bytes escritos por volcado", buckets=SIZE_BUCKETS)
+FLUSH_ERRORS = REGISTRY.counter("bot_store_flush_errors_total", "Volcados fallidos (el lote se reintenta)")
+
+
+# -----------------------------
+# PERSISTENCIA DIFERIDA (WRITE-BEHIND)
+# -----------------------------
+class WriteBehindPersister:
+    """Acumula los cambios de eventos en memoria y los escribe en bloque.
+
+    Los handlers solo marcan cambios (O(1), sin E/S); cada `interval_ms` se
+    vuelca un único lote en un hilo de trabajo para no bloquear el event loop.
+    """
+
+    def __init__(self, store, interval_ms=500):
+        self.store = store
+        self.interval = interval_ms / 1000
+        self.dirty = False
+        self.flush_count = 0
+        self.failing = False  # el último volcado falló (se reintenta en el siguiente); lo usa /readyz
+        self._events = {}        # id -> copia del evento, o None si se borró
+        self._participants = {}  # (id, rol, usuario) -> True (alta) / False (baja)
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    # -----------------------------
+    # MARCAR CAMBIOS
+    # -----------------------------
+    def save_event(self, event):
+        # Copia superficial en el loop; la serialización se hace en el hilo
+        snapshot = dict(event)
+        snapshot["participants_roles"] = {key: [] for key in event.get("participants_roles", {})}
+        self._events[str(event["id"])] = snapshot
+        self._mark_dirty()
+
+    def delete_event(self, event_id):
+        self._events[str(event_id)] = None
+        self._mark_dirty()
+
+    def add_participant(self, event_id, role, user_id):
+        self._participants[(str(event_id), role, user_id)] = True
+        self._mark_dirty()
+
+    def remove_participant(self, event_id, role, user_id):
+        self._participants[(str(event_id), role, user_id)] = False
+        self._mark_dirty()
+
+    def pending(self, event_id):
+        """Cambios aún sin volcar de un evento: (fila pendiente, [(rol, usuario, presente)])"""
+        event_id = str(event_id)
+        ops = [(role, user_id, present) for (eid, role, user_id), present in self._participants.items() if eid == event_id]
+        return event_id in self._events, ops
+
+    def _mark_dirty(self):
+        self.dirty = True
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Sin loop (scripts / migraciones): se escribirá en el próximo flush()
+            return
+        self._task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        while self.dirty:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Error al guardar eventos: {e}")
+
+    # -----------------------------
+    # VOLCADO
+    # -----------------------------
+    async def flush(self):
+        """Escribe todos los cambios pendientes (también se llama al apagar el bot)"""
+        async with self._lock:
+            if not self.dirty:
+                return
+            events, participants = self._events, self._participants
+            self._events, self._participants = {}, {}
+            self.dirty = False
+
+            upserts = [e for e in events.values() if e is not None]
+            deletes = [event_id for event_id, e in events.items() if e is None]
+            ops = [(event_id, role, user_id, present) for (event_id, role, user_id), present in participants.items()]
+            try:
+                with FLUSH_SECONDS.time():
+                    written = await asyncio.to_thread(self.store.apply, upserts, deletes, ops)
+            except Exception:
+                FLUSH_ERRORS.inc()
+                self.failing = True
+                # Devolver el lote a la cola sin pisar cambios más recientes
+                for key, value in events.items():
+                    self._events.setdefault(key, value)
+                for key, value in participants.items():
+                    self._participants.setdefault(key, value)
+                self.dirty = True
+                raise
+            FLUSH_BYTES.observe(written or 0)
+            self.flush_count += 1
+            self.failing = False
@@ -0,0 +1,142 @@
+# registry.py
+import bisect
+
+
+# -----------------------------
+# REGISTRO DE EVENTOS CON ÍNDICES
+# -----------------------------
+class EventRegistry:
+    """Eventos en memoria indexados por id, message_id, channel_id y, por servidor, fecha de inicio.
+
+    Todas las altas, ediciones y bajas pasan por add / reindex / remove, así
+    los índices se mantienen en un único sitio y las búsquedas son O(1)
+    (O(log n) por fecha). Lo que depende del servidor (listado, calendario,
+    versión) vive en una partición por guild_id: las consultas de un servidor
+    nunca recorren los eventos de otro. `version(guild_id)` cambia con cada
+    mutación de ese servidor y sirve para invalidar lo calculado a partir de
+    sus eventos.
+    """
+
+    def __init__(self, events=()):
+        self._by_id = {}
+        self._by_message = {}
+        self._by_channel = {}
+        self._by_guild = {}  # guild_id -> {id: evento}
+        self._by_start = {}  # guild_id -> [(start_ts, id)] ordenados; sin los eventos sin fecha
+        self._versions = {}  # guild_id -> contador de mutaciones
+        self._keys = {}  # id -> (message_id, channel_id, guild_id, start_ts) indexados
+        for event in events:
+            self.add(event)
+
+    def __iter__(self):
+        # Copia para poder borrar/editar eventos mientras se recorre
+        return iter(list(self._by_id.values()))
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, event_id):
+        return str(event_id) in self._by_id
+
+    # -----------------------------
+    # BÚSQUEDAS
+    # -----------------------------
+    def get(self, event_id):
+        return self._by_id.get(str(event_id))
+
+    def by_message(self, message_id):
+        return self._by_message.get(message_id)
+
+    def by_channel(self, channel_id):
+        return list(self._by_channel.get(channel_id, {}).values())
+
+    def by_guild(self, guild_id):
+        return list(self._by_guild.get(guild_id, {}).values())
+
+    def guilds(self):
+        return list(self._by_guild)
+
+    def version(self, guild_id):
+        return self._versions.get(guild_id, 0)
+
+    def count_from(self, guild_id, since_ts):
+        """Eventos del servidor que empiezan en `since_ts` o después"""
+        by_start = self._by_start.get(guild_id, [])
+        return len(by_start) - bisect.bisect_left(by_start, (since_ts,))
+
+    def upcoming(self, guild_id, since_ts, offset=0, limit=None):
+        """Eventos del servidor ordenados por inicio a partir de `since_ts`; solo se recorre la página pedida"""
+        by_start = self._by_start.get(guild_id, [])
+        start = bisect.bisect_left(by_start, (since_ts,)) + offset
+        end = len(by_start) if limit is None else start + limit
+        return [self._by_id[event_id] for _, event_id in by_start[start:end]]
+
+    def started_before(self, guild_id, until_ts):
+        """Eventos del servidor que empezaron antes de `until_ts`, del más antiguo al más reciente"""
+        by_start = self._by_start.get(guild_id, [])
+        end = bisect.bisect_left(by_start, (until_ts,))
+        return [self._by_id[event_id] for _, event_id in by_start[:end]]
+
+    # -----------------------------
+    # MUTACIONES
+    # -----------------------------
+    def add(self, event):
+        self._by_id[event.id] = event
+        self.reindex(event)
+
+    def reindex(self, event):
+        """Actualiza los índices tras editar message_id, channel_id, el servidor o el inicio"""
+        event_id = event.id
+        if event_id not in self._by_id:
+            # Borrado mientras se editaba: no se vuelve a indexar
+            return
+        new_keys = (event.message_id, event.channel_id, event.guild_id, event.start_ts)
+        old_keys = self._keys.get(event_id)
+        self._bump(event.guild_id)
+        if old_keys == new_keys:
+            return
+        if old_keys:
+            self._unindex(event_id, old_keys)
+        message_id, channel_id, guild_id, start_ts = new_keys
+        if message_id is not None:
+            self._by_message[message_id] = event
+        if channel_id is not None:
+            self._by_channel.setdefault(channel_id, {})[event_id] = event
+        self._by_guild.setdefault(guild_id, {})[event_id] = event
+        if start_ts is not None:
+            bisect.insort(self._by_start.setdefault(guild_id, []), (start_ts, event_id))
+        self._keys[event_id] = new_keys
+
+    def remove(self, event_id):
+        event_id = str(event_id)
+        event = self._by_id.pop(event_id, None)
+        old_keys = self._keys.pop(event_id, None)
+        if old_keys:
+            self._unindex(event_id, old_keys)
+        return event
+
+    def _bump(self, guild_id):
+        self._versions[guild_id] = self._versions.get(guild_id, 0) + 1
+
+    def _unindex(self, event_id, keys):
+        message_id, channel_id, guild_id, start_ts = keys
+        self._bump(guild_id)
+        partition = self._by_guild.get(guild_id)
+        if partition is not None:
+            partition.pop(event_id, None)
+            if not partition:
+                del self._by_guild[guild_id]
+        if start_ts is not None:
+            by_start = self._by_start.get(guild_id, [])
+            i = bisect.bisect_left(by_start, (start_ts, event_id))
+            if i < len(by_start) and by_start[i] == (start_ts, event_id):
+                del by_start[i]
+        current = self._by_message.get(message_id)
+        if message_id is not None and current is not None and current.id == event_id:
+            del self._by_message[message_id]
+        if channel_id is not None:
+            bucket = self._by_channel.get(channel_id)
+            if bucket is not None:
+                bucket.pop(event_id, None)
+                if not bucket:
+                    del self._by_channel[channel_id]
@@ -0,0 +1,322 @@
+# roster.py
+from array import array
+from itertools import chain, compress
+
+# Anchos de máscara por número de roles del evento (se ensancha al añadir roles)
+_MASK_TYPECODES = ("B", "H", "I", "Q")
+_MIN_CAPACITY = 8
+_EMPTY = -1    # hueco libre de la tabla de índices
+_DELETED = -2  # hueco de un usuario dado de baja (la búsqueda sigue de largo)
+
+
+_SELECTOR_TABLES = {}  # bits -> tabla de bytes.translate: máscara -> 1 si tiene alguno de esos bits
+
+
+def _selector_table(bits):
+    table = _SELECTOR_TABLES.get(bits)
+    if table is None:
+        table = _SELECTOR_TABLES[bits] = bytes(1 if mask & bits else 0 for mask in range(256))
+    return table
+
+
+def _is_id(user):
+    # Snowflakes de Discord: int positivo de 63 bits; lo demás (apodos antiguos, ids en texto) va aparte
+    return type(user) is int and 0 < user < 1 << 63
+
+
+# -----------------------------
+# INSCRIPCIONES DE UN EVENTO
+# -----------------------------
+class Roster:
+    """Participantes de un evento: usuario -> máscara de roles, con un contador por rol.
+
+    Sustituye a las listas por rol de participants_roles (siete listas por
+    evento, `in`/`remove` O(n) y duplicados):
+    - Los usuarios y sus máscaras van en dos `array` en orden de inscripción
+      (8 bytes de id + 1 byte de máscara con hasta 8 roles), más una tabla
+      hash de índices int32 para encontrarlos; como el dict compacto de
+      CPython, pero sin un objeto int por usuario y rol.
+    - Comprobar, añadir, quitar o cambiar de rol y contar inscritos son O(1);
+      el contador de cada rol se mantiene junto a la tabla.
+    - Un usuario no puede repetirse: los duplicados de eventos.json se
+      descartan al cargar.
+    - Los listados por rol recorren a los usuarios en orden de inscripción.
+
+    Los participantes guardados como texto (apodos de eventos antiguos) van
+    en un diccionario aparte hasta que `rekey` los sustituye por su id.
+    """
+
+    __slots__ = ("_roles", "_counts", "_users", "_masks", "_index", "_live", "_used", "_legacy")
+
+    def __init__(self, roles=()):
+        self._roles = []   # bit i de cada máscara -> nombre del rol (orden de participants_roles)
+        self._counts = []  # inscritos por rol, en el mismo orden
+        self._users = array("q")  # ids en orden de inscripción; las bajas quedan con máscara 0 hasta compactar
+        self._masks = array("B")
+        self._index = array("i", [_EMPTY]) * _MIN_CAPACITY  # hueco -> posición en _users
+        self._live = 0   # usuarios con algún rol
+        self._used = 0   # huecos ocupados de _index, contando borrados
+        self._legacy = None  # apodo -> máscara (solo eventos antiguos)
+        for role in roles:
+            self._bit(role)
+
+    @classmethod
+    def from_dict(cls, participants_roles):
+        """Desde el esquema de eventos.json ({rol: [usuarios]}); los duplicados se descartan"""
+        roster = cls(participants_roles)
+        # Carga en bloque: máscaras en un dict y una sola construcción de la tabla
+        masks = {}
+        for i, refs in enumerate(participants_roles.values()):
+            bit = 1 << i
+            for ref in refs:
+                mask = masks.get(ref, 0)
+                if not mask & bit:
+                    masks[ref] = mask | bit
+                    roster._counts[i] += 1
+        ids = [user for user in masks if _is_id(user)]
+        if len(ids) < len(masks):
+            roster._legacy = {user: mask for user, mask in masks.items() if not _is_id(user)}
+        roster._users = array("q", ids)
+        roster._masks = array(roster._masks.typecode, [masks[user] for user in ids])
+        roster._rebuild()
+        return roster
+
+    def to_dict(self):
+        """{rol: [usuarios]} en orden de inscripción, con todos los roles (también vacíos)"""
+        return {role: list(self._select(1 << i)) for i, role in enumerate(self._roles)}
+
+    def __eq__(self, other):
+        return isinstance(other, Roster) and self.to_dict() == other.to_dict()
+
+    def __len__(self):
+        """Usuarios distintos inscritos en algún rol"""
+        return self._live + (len(self._legacy) if self._legacy else 0)
+
+    def __contains__(self, user):
+        return self._mask_of(user) != 0
+
+    # -----------------------------
+    # CONSULTAS O(1)
+    # -----------------------------
+    def roles(self):
+        return list(self._roles)
+
+    def count(self, role):
+        try:
+            return self._counts[self._roles.index(role)]
+        except ValueError:
+            return 0
+
+    def total(self):
+        """Inscripciones en todos los roles (un usuario en dos roles cuenta dos veces)"""
+        return sum(self._counts)
+
+    def has(self, role, user):
+        return role in self._roles and bool(self._mask_of(user) & 1 << self._roles.index(role))
+
+    def roles_of(self, user):
+        return self._names(self._mask_of(user))
+
+    def in_any(self, user, skip=()):
+        """Inscrito en algún rol que no esté en `skip`"""
+        return bool(self._mask_of(user) & ~self._skip_mask(skip))
+
+    # -----------------------------
+    # RECORRIDOS (O(inscritos del evento))
+    # -----------------------------
+    def members(self, role):
+        """Usuarios de un rol en orden de inscripción (generador: se puede cortar antes del final)"""
+        if role not in self._roles:
+            return iter(())
+        return self._select(1 << self._roles.index(role))
+
+    def users(self, skip=()):
+        """Usuarios distintos con algún rol fuera de `skip`"""
+        return self._select(~self._skip_mask(skip))
+
+    def legacy_refs(self):
+        """Participantes guardados como texto (apodos antiguos o ids en str), pendientes de migrar a id"""
+        return list(self._legacy) if self._legacy else []
+
+    def _select(self, bits):
+        """Usuarios cuya máscara tiene alguno de `bits` (el filtrado de ids corre en C con compress)"""
+        if self._masks.typecode == "B":
+            # Máscaras de un byte: una sola traducción en C marca qué usuarios entran
+            selectors = self._masks.tobytes().translate(_selector_table(bits))
+        else:
+            selectors = map(bits.__and__, self._masks)
+        selected = compress(self._users, selectors)
+        if self._legacy:
+            return chain([user for user, mask in self._legacy.items() if mask & bits], selected)
+        return selected
+
+    # -----------------------------
+    # MUTACIONES O(1)
+    # -----------------------------
+    def add(self, role, user):
+        bit = self._bit(role)
+        mask = self._mask_of(user)
+        if mask & bit:
+            return False
+        self._set_mask(user, mask | bit)
+        self._counts[self._roles.index(role)] += 1
+        return True
+
+    def remove(self, role, user):
+        if role not in self._roles:
+            return False
+        index = self._roles.index(role)
+        mask = self._mask_of(user)
+        if not mask & 1 << index:
+            return False
+        self._set_mask(user, mask & ~(1 << index))
+        self._counts[index] -= 1
+        return True
+
+    def switch(self, role, user):
+        """Deja al usuario solo en `role` (eventos sin multi-respuesta): (añadido, roles quitados)"""
+        bit = self._bit(role)
+        old = self._mask_of(user)
+        if old == bit:
+            return False, []
+        removed = self._names(old & ~bit)
+        for name in removed:
+            self._counts[self._roles.index(name)] -= 1
+        added = not old & bit
+        if added:
+            self._counts[self._roles.index(role)] += 1
+            # Reinsertar: quien cambia de rol aparece el último de su nuevo rol
+            self._set_mask(user, 0)
+        self._set_mask(user, bit)
+        return added, removed
+
+    def rekey(self, old_user, new_user):
+        """Sustituye un participante (apodo antiguo -> id) uniendo sus roles; devuelve los roles movidos"""
+        mask = self._mask_of(old_user)
+        if not mask:
+            return []
+        current = self._mask_of(new_user)
+        for name in self._names(mask & current):
+            # Ya estaba con ese rol por id: el apodo era un duplicado
+            self._counts[self._roles.index(name)] -= 1
+        self._set_mask(old_user, 0)
+        self._set_mask(new_user, current | mask)
+        return self._names(mask)
+
+    # -----------------------------
+    # ROLES Y MÁSCARAS
+    # -----------------------------
+    def _bit(self, role):
+        """Bit del rol en este evento; un rol nuevo se añade al final (y ensancha las máscaras si hace falta)"""
+        try:
+            return 1 << self._roles.index(role)
+        except ValueError:
+            pass
+        index = len(self._roles)
+        if index >= self._masks.itemsize * 8:
+            typecode = next((t for t in _MASK_TYPECODES if array(t).itemsize * 8 > index), None)
+            if typecode is None:
+                raise ValueError(f"demasiados roles en un evento ({index + 1})")
+            self._masks = array(typecode, self._masks)
+        self._roles.append(role)
+        self._counts.append(0)
+        return 1 << index
+
+    def _names(self, mask):
+        names = []
+        i = 0
+        while mask:
+            if mask & 1:
+                names.append(self._roles[i])
+            mask >>= 1
+            i += 1
+        return names
+
+    def _skip_mask(self, roles):
+        mask = 0
+        for role in roles:
+            if role in self._roles:
+                mask |= 1 << self._roles.index(role)
+        return mask
+
+    # -----------------------------
+    # TABLA HASH DE ÍNDICES
+    # -----------------------------
+    def _find(self, user):
+        """Hueco de _index que apunta a `user`, o -1"""
+        index, users = self._index, self._users
+        last = len(index) - 1
+        slot = _hash(user) & last
+        while True:
+            entry = index[slot]
+            if entry == _EMPTY:
+                return -1
+            if entry >= 0 and users[entry] == user:
+                return slot
+            slot = (slot + 1) & last
+
+    def _mask_of(self, user):
+        if not _is_id(user):
+            return self._legacy.get(user, 0) if self._legacy else 0
+        slot = self._find(user)
+        return self._masks[self._index[slot]] if slot >= 0 else 0
+
+    def _set_mask(self, user, mask):
+        if not _is_id(user):
+            if mask:
+                if self._legacy is None:
+                    self._legacy = {}
+                self._legacy[user] = mask
+            elif self._legacy:
+                self._legacy.pop(user, None)
+            return
+
+        slot = self._find(user)
+        if slot >= 0:
+            entry = self._index[slot]
+            self._masks[entry] = mask
+            if not mask:
+                self._index[slot] = _DELETED
+                self._live -= 1
+                if len(self._users) > 2 * self._live + _MIN_CAPACITY:
+                    self._rebuild()
+            return
+        if not mask:
+            return
+
+        if (self._used + 1) * 3 > len(self._index) * 2:
+            self._rebuild(extra=1)
+        index = self._index
+        last = len(index) - 1
+        slot = _hash(user) & last
+        while index[slot] >= 0:
+            slot = (slot + 1) & last
+        if index[slot] == _EMPTY:
+            self._used += 1
+        index[slot] = len(self._users)
+        self._users.append(user)
+        self._masks.append(mask)
+        self._live += 1
+
+    def _rebuild(self, extra=0):
+        """Compacta usuarios y máscaras (sin bajas) y reconstruye la tabla con margen para crecer"""
+        users = array("q", compress(self._users, self._masks))
+        masks = array(self._masks.typecode, compress(self._masks, self._masks))
+        capacity = _MIN_CAPACITY
+        while capacity < 2 * (len(users) + extra):
+            capacity *= 2
+        index = array("i", [_EMPTY]) * capacity
+        last = capacity - 1
+        for entry, user in enumerate(users):
+            slot = _hash(user) & last
+            while index[slot] != _EMPTY:
+                slot = (slot + 1) & last
+            index[slot] = entry
+        self._users, self._masks, self._index = users, masks, index
+        self._live = self._used = len(users)
+
+
+def _hash(user):
+    # Hash multiplicativo (Fibonacci): los ids consecutivos o con los mismos bits bajos
+    # (snowflakes del mismo milisegundo) no forman racimos en el sondeo lineal
+    return (user * 0x9E3779B97F4A7C15) >> 32
@@ -0,0 +1,126 @@
+# scheduler.py
+import asyncio
+import heapq
+import itertools
+import time
+
+from metrics import REGISTRY
+
+REMINDER_LAG = REGISTRY.histogram(
+    "bot_reminder_lag_seconds", "Retraso entre la hora programada de un recordatorio y su disparo"
+)
+REMINDER_SECONDS = REGISTRY.histogram(
+    "bot_reminder_seconds", "Duración del envío de cada recordatorio", ("result",)
+)
+
+# -----------------------------
+# PLANIFICADOR DE RECORDATORIOS
+# -----------------------------
+class ReminderScheduler:
+    """Min-heap de recordatorios pendientes que duerme justo hasta el siguiente.
+
+    schedule/cancel son O(log n); las entradas canceladas o reprogramadas se
+    descartan de forma perezosa cuando llegan a la cima del heap. Cada
+    recordatorio vencido corre en su propia tarea, así varios eventos que
+    empiezan a la vez no se esperan entre sí.
+    """
+
+    def __init__(self):
+        self._heap = []        # (timestamp, secuencia, event_id)
+        self._deadlines = {}   # event_id -> timestamp vigente
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._running = set()    # Tareas de recordatorios en curso
+        self._in_flight = set()  # event_id de esas tareas
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def next_deadline(self):
+        self._discard_stale()
+        return self._heap[0][0] if self._heap else None
+
+    # -----------------------------
+    # PROGRAMAR / CANCELAR
+    # -----------------------------
+    def schedule(self, event_id, when):
+        """Programa (o reprograma) el recordatorio de un evento; when en segundos epoch"""
+        if self._deadlines.get(event_id) == when:
+            return
+        self._deadlines[event_id] = when
+        heapq.heappush(self._heap, (when, next(self._seq), event_id))
+        if self._heap[0][2] == event_id:
+            # Nuevo recordatorio más cercano: despertar al bucle para recalcular la espera
+            self._wakeup.set()
+        self._compact()
+
+    def cancel(self, event_id):
+        if self._deadlines.pop(event_id, None) is not None:
+            self._compact()
+
+    def _discard_stale(self):
+        while self._heap:
+            when, _, event_id = self._heap[0]
+            if self._deadlines.get(event_id) == when:
+                return
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        # Evita que el heap crezca sin límite con entradas obsoletas
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [
+                entry for entry in self._heap if self._deadlines.get(entry[2]) == entry[0]
+            ]
+            heapq.heapify(self._heap)
+
+    # -----------------------------
+    # BUCLE
+    # -----------------------------
+    def start(self, callback):
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run(callback))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self, callback):
+        while True:
+            self._discard_stale()
+            delay = self._heap[0][0] - time.time() if self._heap else None
+            if delay is None or delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            when, _, event_id = heapq.heappop(self._heap)
+            del self._deadlines[event_id]
+            REMINDER_LAG.observe(max(0.0, time.time() - when))
+            if event_id in self._in_flight:
+                # Reprogramado mientras se enviaba (p. ej. al guardar el hilo): ya está en curso
+                continue
+            task = asyncio.get_running_loop().create_task(self._fire(callback, event_id))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _fire(self, callback, event_id):
+        self._in_flight.add(event_id)
+        result = "ok"
+        started = time.perf_counter()
+        try:
+            await callback(event_id)
+        except Exception as e:
+            result = "error"
+            print(f"❌ Error en recordatorio {event_id}: {e}")
+        finally:
+            self._in_flight.discard(event_id)
+            REMINDER_SECONDS.observe(time.perf_counter() - started, result=result)
@@ -0,0 +1,85 @@
+# sessions.py
+import asyncio
+
+
+class SessionExpired(Exception):
+    """El usuario no respondió dentro del tiempo de la sesión"""
+
+
+class SessionLimitReached(Exception):
+    """El usuario ya tiene el máximo de asistentes abiertos"""
+
+
+# -----------------------------
+# SESIÓN DE CONVERSACIÓN POR DM
+# -----------------------------
+class DMSession:
+    __slots__ = ("user_id", "ttl", "closed", "_queue", "_manager")
+
+    def __init__(self, manager, user_id, ttl):
+        self.user_id = user_id
+        self.ttl = ttl
+        self.closed = False
+        self._queue = asyncio.Queue()
+        self._manager = manager
+
+    def deliver(self, message):
+        self._queue.put_nowait(message)
+
+    async def next_message(self):
+        """Siguiente DM del usuario; si pasa `ttl` sin respuesta la sesión expira"""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=self.ttl)
+        except asyncio.TimeoutError:
+            self.close()
+            raise SessionExpired() from None
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._manager._remove(self)
+
+
+# -----------------------------
+# GESTOR DE SESIONES
+# -----------------------------
+class DMSessionManager:
+    """Enruta cada DM a la conversación abierta de su autor en O(1).
+
+    Sustituye a bot.wait_for("message", check=...), que evalúa cada mensaje
+    contra todos los checks pendientes y deja esperas colgadas para siempre
+    cuando alguien abandona un asistente.
+    """
+
+    def __init__(self, ttl=300, max_per_user=1):
+        self.ttl = ttl
+        self.max_per_user = max_per_user
+        self._sessions = {}  # user_id -> [DMSession, ...] (la última recibe los mensajes)
+
+    def __len__(self):
+        return sum(len(sessions) for sessions in self._sessions.values())
+
+    def open(self, user_id):
+        sessions = self._sessions.setdefault(user_id, [])
+        if len(sessions) >= self.max_per_user:
+            raise SessionLimitReached()
+        session = DMSession(self, user_id, self.ttl)
+        sessions.append(session)
+        return session
+
+    def dispatch(self, message):
+        """Entrega un DM a la sesión de su autor; devuelve False si no hay ninguna"""
+        if message.guild is not None:
+            return False
+        sessions = self._sessions.get(message.author.id)
+        if not sessions:
+            return False
+        sessions[-1].deliver(message)
+        return True
+
+    def _remove(self, session):
+        sessions = self._sessions.get(session.user_id)
+        if sessions and session in sessions:
+            sessions.remove(session)
+            if not sessions:
+                del self._sessions[session.user_id]
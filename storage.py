@@ -0,0 +1,612 @@
+# storage.py
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# -----------------------------
+# ESQUEMA SQLITE
+# -----------------------------
+# user_id se declara sin tipo para conservar tanto ids (int) como
+# apodos antiguos (str) tal y como vienen de eventos.json.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    start TEXT,
+    channel_id INTEGER,
+    message_id INTEGER,
+    data TEXT NOT NULL,
+    guild_id INTEGER
+);
+CREATE TABLE IF NOT EXISTS participants (
+    event_id TEXT NOT NULL,
+    role TEXT NOT NULL,
+    user_id NOT NULL,
+    PRIMARY KEY (event_id, role, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_participants_event ON participants(event_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+-- Coordinación entre workers que comparten la base de datos
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id TEXT NOT NULL,
+    origin TEXT,
+    ts REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+-- Outbox: pasos con efecto en Discord (recordatorios, hilos, DMs, roles)
+CREATE TABLE IF NOT EXISTS jobs (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    event_id TEXT,
+    shard INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_at REAL NOT NULL,
+    result TEXT,
+    error TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs(state, next_at);
+"""
+
+
+class SqliteStore:
+    """Almacén de eventos en SQLite (modo WAL) con escrituras de una fila por cambio.
+
+    Varios procesos pueden compartir el fichero: cada escritura deja una fila en
+    `changes` (con el worker de origen) para que los demás recarguen el evento,
+    y `leases` sirve para elegir qué worker ejecuta cada tarea periódica.
+    """
+
+    def __init__(self, path, origin=None):
+        self.path = path
+        self.origin = origin
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        # Otro worker puede estar escribiendo: esperar en vez de fallar con "database is locked"
+        self.conn.execute("PRAGMA busy_timeout=5000")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        # Bases de datos de la versión de un solo servidor: sin columna guild_id
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(events)")}
+        if "guild_id" not in columns:
+            self.conn.execute("ALTER TABLE events ADD COLUMN guild_id INTEGER")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_events_guild ON events(guild_id)")
+
+    # -----------------------------
+    # LECTURA
+    # -----------------------------
+    def load_events(self, guild_id=None):
+        """Todos los eventos, o solo los de un servidor"""
+        with self._lock:
+            if guild_id is None:
+                rows = self.conn.execute("SELECT id, data FROM events ORDER BY rowid").fetchall()
+                participants = self.conn.execute(
+                    "SELECT event_id, role, user_id FROM participants ORDER BY rowid"
+                ).fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT id, data FROM events WHERE guild_id = ? ORDER BY rowid", (guild_id,)
+                ).fetchall()
+                participants = self.conn.execute(
+                    "SELECT p.event_id, p.role, p.user_id FROM participants p "
+                    "JOIN events e ON e.id = p.event_id WHERE e.guild_id = ? ORDER BY p.rowid", (guild_id,)
+                ).fetchall()
+
+        events = []
+        by_id = {}
+        for event_id, data in rows:
+            event = json.loads(data)
+            event["participants_roles"] = event.get("participants_roles") or {}
+            by_id[event_id] = event
+            events.append(event)
+        for event_id, role, user_id in participants:
+            event = by_id.get(event_id)
+            if event is not None:
+                event["participants_roles"].setdefault(role, []).append(user_id)
+        return events
+
+    def load_event(self, event_id):
+        """Un evento con sus participantes; None si ya no existe"""
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM events WHERE id = ?", (str(event_id),)).fetchone()
+            participants = self.conn.execute(
+                "SELECT role, user_id FROM participants WHERE event_id = ? ORDER BY rowid", (str(event_id),)
+            ).fetchall()
+        if row is None:
+            return None
+        event = json.loads(row[0])
+        event["participants_roles"] = event.get("participants_roles") or {}
+        for role, user_id in participants:
+            event["participants_roles"].setdefault(role, []).append(user_id)
+        return event
+
+    # -----------------------------
+    # ESCRITURA (una fila por cambio)
+    # -----------------------------
+    def _event_row(self, event):
+        data = {k: v for k, v in event.items() if k != "participants_roles"}
+        # Se guardan las claves de rol para conservar los roles vacíos
+        data["participants_roles"] = {key: [] for key in event.get("participants_roles", {})}
+        return (
+            str(event["id"]),
+            event.get("start"),
+            event.get("channel_id"),
+            event.get("message_id"),
+            json.dumps(data, default=str),
+            event.get("guild_id"),
+        )
+
+    def _upsert(self, cur, event):
+        """Escribe la fila del evento y devuelve los bytes de su JSON"""
+        row = self._event_row(event)
+        cur.execute(
+            "INSERT INTO events (id, start, channel_id, message_id, data, guild_id) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET start=excluded.start, channel_id=excluded.channel_id, "
+            "message_id=excluded.message_id, data=excluded.data, guild_id=excluded.guild_id",
+            row,
+        )
+        return len(row[4].encode())
+
+    def _patch(self, cur, event_id, changes):
+        """Cambia solo esos campos del JSON del evento (sin pisar lo demás); nada si ya no existe"""
+        row = cur.execute("SELECT data FROM events WHERE id = ?", (str(event_id),)).fetchone()
+        if row is None:
+            return
+        data = json.loads(row[0])
+        data.update(changes)
+        cur.execute("UPDATE events SET data = ? WHERE id = ?", (json.dumps(data, default=str), str(event_id)))
+
+    def _record(self, cur, event_ids):
+        now = time.time()
+        cur.executemany(
+            "INSERT INTO changes (event_id, origin, ts) VALUES (?, ?, ?)",
+            [(str(event_id), self.origin, now) for event_id in event_ids],
+        )
+
+    def upsert_event(self, event):
+        """Inserta o actualiza la fila del evento (sin tocar sus participantes)"""
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            self._upsert(self.conn, event)
+            self._record(self.conn, [event["id"]])
+
+    def delete_event(self, event_id):
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.execute("DELETE FROM participants WHERE event_id = ?", (str(event_id),))
+            self.conn.execute("DELETE FROM events WHERE id = ?", (str(event_id),))
+            self._record(self.conn, [event_id])
+
+    def add_participant(self, event_id, role, user_id):
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.execute(
+                "INSERT OR IGNORE INTO participants (event_id, role, user_id) VALUES (?, ?, ?)",
+                (str(event_id), role, user_id),
+            )
+            self._record(self.conn, [event_id])
+
+    def remove_participant(self, event_id, role, user_id):
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            self.conn.execute(
+                "DELETE FROM participants WHERE event_id = ? AND role = ? AND user_id = ?",
+                (str(event_id), role, user_id),
+            )
+            self._record(self.conn, [event_id])
+
+    def save_all(self, events):
+        """Reescribe todos los eventos en una sola transacción (importación / volcado completo)"""
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            for event in events:
+                self._upsert(self.conn, event)
+                self.conn.execute("DELETE FROM participants WHERE event_id = ?", (str(event["id"]),))
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO participants (event_id, role, user_id) VALUES (?, ?, ?)",
+                    [
+                        (str(event["id"]), role, user_id)
+                        for role, user_ids in event.get("participants_roles", {}).items()
+                        for user_id in user_ids
+                    ],
+                )
+
+    def apply(self, upserts, deletes, participant_ops):
+        """Aplica en una sola transacción un lote de cambios acumulados.
+
+        participant_ops es una lista de (event_id, role, user_id, presente).
+        Devuelve los bytes de JSON escritos.
+        """
+        written = 0
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            for event in upserts:
+                written += self._upsert(self.conn, event)
+            for event_id, role, user_id, present in participant_ops:
+                if present:
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO participants (event_id, role, user_id) VALUES (?, ?, ?)",
+                        (str(event_id), role, user_id),
+                    )
+                else:
+                    self.conn.execute(
+                        "DELETE FROM participants WHERE event_id = ? AND role = ? AND user_id = ?",
+                        (str(event_id), role, user_id),
+                    )
+            for event_id in deletes:
+                self.conn.execute("DELETE FROM participants WHERE event_id = ?", (str(event_id),))
+                self.conn.execute("DELETE FROM events WHERE id = ?", (str(event_id),))
+            # Un aviso por evento tocado en el lote, en la misma transacción
+            touched = dict.fromkeys(str(e["id"]) for e in upserts)
+            touched.update(dict.fromkeys(str(op[0]) for op in participant_ops))
+            touched.update(dict.fromkeys(str(event_id) for event_id in deletes))
+            self._record(self.conn, touched)
+        return written
+
+    # -----------------------------
+    # AVISOS DE CAMBIOS ENTRE WORKERS
+    # -----------------------------
+    def last_change(self):
+        with self._lock:
+            row = self.conn.execute("SELECT MAX(seq) FROM changes").fetchone()
+        return row[0] or 0
+
+    def changes_since(self, seq, limit=500):
+        """[(seq, event_id)] de otros workers posteriores a `seq`, y el último seq visto"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT seq, event_id, origin FROM changes WHERE seq > ? ORDER BY seq LIMIT ?", (seq, limit)
+            ).fetchall()
+        last = rows[-1][0] if rows else seq
+        return [(s, event_id) for s, event_id, origin in rows if origin != self.origin], last
+
+    def prune_changes(self, before_ts):
+        with self._lock:
+            self.conn.execute("DELETE FROM changes WHERE ts < ?", (before_ts,))
+
+    # -----------------------------
+    # LEASES (ELECCIÓN DE LÍDER)
+    # -----------------------------
+    def acquire_lease(self, name, owner, ttl):
+        """Toma o renueva el lease `name` si está libre, caducado o ya es de `owner`"""
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner=excluded.owner, expires_at=excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at < ?",
+                (name, owner, now + ttl, now),
+            )
+            row = self.conn.execute("SELECT owner FROM leases WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == owner
+
+    def release_lease(self, name, owner):
+        with self._lock:
+            self.conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+
+    # -----------------------------
+    # OUTBOX (TRABAJOS CON REINTENTOS)
+    # -----------------------------
+    def _insert_jobs(self, cur, jobs, now, replace=False):
+        conflict = ("DO UPDATE SET payload=excluded.payload, state='pending', attempts=0, "
+                    "next_at=excluded.next_at, error=NULL, updated=excluded.updated") if replace else "DO NOTHING"
+        cur.executemany(
+            "INSERT INTO jobs (key, kind, event_id, shard, payload, state, next_at, updated) "
+            f"VALUES (?, ?, ?, ?, ?, 'pending', ?, ?) ON CONFLICT(key) {conflict}",
+            [(j["key"], j["kind"], j["event_id"], j["shard"], json.dumps(j["payload"]), now, now) for j in jobs],
+        )
+
+    def enqueue_jobs(self, jobs, now, replace=False):
+        """Encola trabajos; una clave ya existente se ignora (o se reactiva con replace)"""
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            self._insert_jobs(self.conn, jobs, now, replace)
+
+    def _shard_filter(self, shards):
+        if shards is None:
+            return "", []
+        return f" AND shard IN ({','.join('?' * len(shards))})", list(shards)
+
+    def due_jobs(self, now, shards=None, limit=50):
+        if shards is not None and not shards:
+            return []
+        where, params = self._shard_filter(shards)
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT key, kind, event_id, shard, payload, attempts FROM jobs "
+                f"WHERE state = 'pending' AND next_at <= ?{where} ORDER BY next_at LIMIT ?",
+                [now, *params, limit],
+            ).fetchall()
+        return [
+            {"key": key, "kind": kind, "event_id": event_id, "shard": shard,
+             "payload": json.loads(payload), "attempts": attempts}
+            for key, kind, event_id, shard, payload, attempts in rows
+        ]
+
+    def next_job_at(self, shards=None):
+        if shards is not None and not shards:
+            return None
+        where, params = self._shard_filter(shards)
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT MIN(next_at) FROM jobs WHERE state = 'pending'{where}", params
+            ).fetchone()
+        return row[0]
+
+    def finish_jobs(self, outcomes, now):
+        """Guarda en una transacción el resultado de un lote:
+        (clave, estado, resultado, siguientes, error, next_at, {evento: {campo: valor}})"""
+        with self._lock, self.conn:
+            self.conn.execute("BEGIN")
+            for key, state, result, followups, error, next_at, event_updates in outcomes:
+                for event_id, changes in event_updates.items():
+                    self._patch(self.conn, event_id, changes)
+                if event_updates:
+                    self._record(self.conn, list(event_updates))
+                if state == "pending":
+                    self.conn.execute(
+                        "UPDATE jobs SET attempts = attempts + 1, next_at = ?, error = ?, updated = ? WHERE key = ?",
+                        (next_at, error, now, key),
+                    )
+                else:
+                    self.conn.execute(
+                        "UPDATE jobs SET state = ?, attempts = attempts + 1, result = ?, error = ?, updated = ? "
+                        "WHERE key = ?",
+                        (state, json.dumps(result) if result is not None else None, error, now, key),
+                    )
+                if followups:
+                    self._insert_jobs(self.conn, followups, now)
+
+    def pending_jobs(self, event_id=None):
+        with self._lock:
+            if event_id is None:
+                row = self.conn.execute("SELECT COUNT(*) FROM jobs WHERE state = 'pending'").fetchone()
+            else:
+                row = self.conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE state = 'pending' AND event_id = ?", (str(event_id),)
+                ).fetchone()
+        return row[0]
+
+    def job_outcomes(self, prefix):
+        """[(estado, resultado)] de los trabajos cuya clave empieza por `prefix`"""
+        with self._lock:
+            rows = self.conn.execute(
+                # Rango sobre la clave primaria en lugar de LIKE (sin escapar % ni _ de la clave)
+                "SELECT state, result FROM jobs WHERE key >= ? AND key < ?", (prefix, prefix + "\U0010ffff")
+            ).fetchall()
+        return [(state, json.loads(result) if result is not None else None) for state, result in rows]
+
+    def prune_jobs(self, before_ts):
+        """Borra los trabajos terminados (hechos o descartados) antes de `before_ts`"""
+        with self._lock:
+            self.conn.execute("DELETE FROM jobs WHERE state != 'pending' AND updated < ?", (before_ts,))
+
+    # -----------------------------
+    # IMPORTACIÓN DE eventos.json
+    # -----------------------------
+    def import_json(self, json_path):
+        """Importa eventos.json una sola vez; devuelve el número de eventos importados"""
+        with self._lock:
+            done = self.conn.execute("SELECT value FROM meta WHERE key = 'json_imported'").fetchone()
+        if done or not os.path.exists(json_path):
+            return 0
+
+        with open(json_path, "r") as f:
+            legacy = json.load(f)
+        for event in legacy:
+            event["id"] = str(event["id"])
+        self.save_all(legacy)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('json_imported', ?)", (json_path,)
+            )
+        return len(legacy)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+# -----------------------------
+# ALMACÉN JSON (COMPATIBILIDAD)
+# -----------------------------
+class JsonStore:
+    """Mantiene eventos.json como almacén; cada lote se escribe de forma atómica (temporal + rename)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.jobs_path = os.path.splitext(path)[0] + ".outbox.json"
+        self._lock = threading.Lock()
+        self._events = {}
+        self._jobs = None  # clave -> trabajo; se carga de jobs_path al usarse
+
+    def load_events(self, guild_id=None):
+        events = []
+        if os.path.exists(self.path):
+            with open(self.path, "r") as f:
+                events = json.load(f)
+        with self._lock:
+            self._events = {str(e["id"]): json.loads(json.dumps(e, default=str)) for e in events}
+        if guild_id is not None:
+            events = [e for e in events if e.get("guild_id") == guild_id]
+        return events
+
+    def apply(self, upserts, deletes, participant_ops):
+        with self._lock:
+            for event in upserts:
+                current = self._events.get(str(event["id"]), {})
+                roles = current.get("participants_roles", {})
+                data = dict(event)
+                data["participants_roles"] = {key: roles.get(key, []) for key in event.get("participants_roles", roles)}
+                self._events[str(event["id"])] = data
+            for event_id, role, user_id, present in participant_ops:
+                event = self._events.get(str(event_id))
+                if event is None:
+                    continue
+                lst = event.setdefault("participants_roles", {}).setdefault(role, [])
+                if present and user_id not in lst:
+                    lst.append(user_id)
+                elif not present and user_id in lst:
+                    # También los duplicados de versiones antiguas
+                    event["participants_roles"][role] = [u for u in lst if u != user_id]
+            for event_id in deletes:
+                self._events.pop(str(event_id), None)
+            payload = json.dumps(list(self._events.values()), indent=4, default=str)
+
+        _atomic_write(self.path, payload)
+        return len(payload.encode())
+
+    def save_all(self, events):
+        with self._lock:
+            self._events = {}
+        self.apply([dict(e) for e in events], [], [
+            (e["id"], role, user_id, True)
+            for e in events
+            for role, user_ids in e.get("participants_roles", {}).items()
+            for user_id in user_ids
+        ])
+
+    def load_event(self, event_id):
+        with self._lock:
+            event = self._events.get(str(event_id))
+            return json.loads(json.dumps(event)) if event is not None else None
+
+    # eventos.json no admite varios procesos: un único worker, siempre líder y sin avisos
+    def last_change(self):
+        return 0
+
+    def changes_since(self, seq, limit=500):
+        return [], seq
+
+    def prune_changes(self, before_ts):
+        pass
+
+    def acquire_lease(self, name, owner, ttl):
+        return True
+
+    def release_lease(self, name, owner):
+        pass
+
+    # Outbox en un fichero aparte (eventos.outbox.json), reescrito de forma atómica
+    def _load_jobs(self):
+        if self._jobs is None:
+            self._jobs = {}
+            if os.path.exists(self.jobs_path):
+                with open(self.jobs_path, "r") as f:
+                    self._jobs = {job["key"]: job for job in json.load(f)}
+        return self._jobs
+
+    def _save_jobs(self):
+        _atomic_write(self.jobs_path, json.dumps(list(self._jobs.values()), default=str))
+
+    def _insert_jobs(self, jobs, now, replace=False):
+        for job in jobs:
+            if job["key"] in self._jobs and not replace:
+                continue
+            self._jobs[job["key"]] = dict(job, state="pending", attempts=0, next_at=now,
+                                          result=None, error=None, updated=now)
+
+    def enqueue_jobs(self, jobs, now, replace=False):
+        with self._lock:
+            self._load_jobs()
+            self._insert_jobs(jobs, now, replace)
+            self._save_jobs()
+
+    def due_jobs(self, now, shards=None, limit=50):
+        with self._lock:
+            due = sorted(
+                (j for j in self._load_jobs().values()
+                 if j["state"] == "pending" and j["next_at"] <= now and (shards is None or j["shard"] in shards)),
+                key=lambda j: j["next_at"],
+            )[:limit]
+            return [{k: j[k] for k in ("key", "kind", "event_id", "shard", "payload", "attempts")} for j in due]
+
+    def next_job_at(self, shards=None):
+        with self._lock:
+            pending = [j["next_at"] for j in self._load_jobs().values()
+                       if j["state"] == "pending" and (shards is None or j["shard"] in shards)]
+        return min(pending) if pending else None
+
+    def finish_jobs(self, outcomes, now):
+        # Dos ficheros: primero los eventos. Si se cae entre medias, el trabajo se repite
+        # pero ya ve lo que guardó (p. ej. el thread_id) y no vuelve a hacerlo
+        event_updates = {}
+        for *_, updates in outcomes:
+            for event_id, changes in updates.items():
+                event_updates.setdefault(str(event_id), {}).update(changes)
+        if event_updates:
+            with self._lock:
+                for event_id, changes in event_updates.items():
+                    if event_id in self._events:
+                        self._events[event_id].update(changes)
+                payload = json.dumps(list(self._events.values()), indent=4, default=str)
+            _atomic_write(self.path, payload)
+        with self._lock:
+            jobs = self._load_jobs()
+            for key, state, result, followups, error, next_at, _ in outcomes:
+                job = jobs.get(key)
+                if job is None:
+                    continue
+                job.update(state=state, attempts=job["attempts"] + 1, error=error, updated=now)
+                if state == "pending":
+                    job["next_at"] = next_at
+                else:
+                    job["result"] = result
+                if followups:
+                    self._insert_jobs(followups, now)
+            self._save_jobs()
+
+    def pending_jobs(self, event_id=None):
+        with self._lock:
+            return sum(1 for j in self._load_jobs().values()
+                       if j["state"] == "pending" and (event_id is None or j["event_id"] == str(event_id)))
+
+    def job_outcomes(self, prefix):
+        with self._lock:
+            return [(j["state"], j["result"]) for key, j in self._load_jobs().items() if key.startswith(prefix)]
+
+    def prune_jobs(self, before_ts):
+        with self._lock:
+            jobs = self._load_jobs()
+            for key in [k for k, j in jobs.items() if j["state"] != "pending" and j["updated"] < before_ts]:
+                del jobs[key]
+            self._save_jobs()
+
+    def import_json(self, json_path):
+        return 0
+
+    def close(self):
+        pass
+
+
+def _atomic_write(path, payload):
+    """Escritura atómica: nunca queda un fichero a medias (temporal + fsync + rename)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".eventos-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,175 @@
+# tests/test_roster.py
+# Ejecutar desde la raíz del repositorio: python -m pytest (o python -m unittest discover tests)
+import random
+import unittest
+
+from roster import Roster
+
+ROLES = ["INF", "OFICIAL", "TANQUE", "RECON", "COMANDANTE", "DECLINADO", "TENTATIVO"]
+
+
+# -----------------------------
+# ALTAS, BAJAS Y CAMBIOS DE ROL
+# -----------------------------
+class RosterMutationTest(unittest.TestCase):
+    def test_add_is_idempotent_and_counts(self):
+        roster = Roster(ROLES)
+        self.assertTrue(roster.add("INF", 1))
+        self.assertFalse(roster.add("INF", 1))
+        self.assertTrue(roster.add("OFICIAL", 1))
+        self.assertEqual(roster.count("INF"), 1)
+        self.assertEqual(roster.total(), 2)
+        self.assertEqual(len(roster), 1)
+        self.assertEqual(roster.roles_of(1), ["INF", "OFICIAL"])
+
+    def test_remove(self):
+        roster = Roster(ROLES)
+        roster.add("INF", 1)
+        self.assertFalse(roster.remove("OFICIAL", 1))
+        self.assertFalse(roster.remove("NO_EXISTE", 1))
+        self.assertTrue(roster.remove("INF", 1))
+        self.assertNotIn(1, roster)
+        self.assertEqual(roster.count("INF"), 0)
+        self.assertEqual(len(roster), 0)
+
+    def test_switch_moves_to_the_end_of_the_new_role(self):
+        roster = Roster(ROLES)
+        for user in (1, 2, 3):
+            roster.add("INF", user)
+        roster.add("OFICIAL", 4)
+        self.assertEqual(roster.switch("OFICIAL", 1), (True, ["INF"]))
+        self.assertEqual(roster.switch("OFICIAL", 1), (False, []))
+        self.assertEqual(list(roster.members("INF")), [2, 3])
+        self.assertEqual(list(roster.members("OFICIAL")), [4, 1])
+        self.assertEqual((roster.count("INF"), roster.count("OFICIAL")), (2, 2))
+
+    def test_switch_keeps_only_the_chosen_role(self):
+        roster = Roster(ROLES)
+        roster.add("INF", 1)
+        roster.add("OFICIAL", 1)
+        self.assertEqual(roster.switch("INF", 1), (False, ["OFICIAL"]))
+        self.assertEqual(roster.roles_of(1), ["INF"])
+        self.assertEqual(roster.count("OFICIAL"), 0)
+
+    def test_in_any_and_users_skip_roles(self):
+        roster = Roster(ROLES)
+        roster.add("INF", 1)
+        roster.add("DECLINADO", 2)
+        self.assertTrue(roster.in_any(1, skip=("DECLINADO",)))
+        self.assertFalse(roster.in_any(2, skip=("DECLINADO",)))
+        self.assertEqual(list(roster.users(skip=("DECLINADO",))), [1])
+
+    def test_unknown_role_is_appended(self):
+        roster = Roster(["INF"])
+        roster.add("NUEVO", 1)
+        self.assertEqual(roster.roles(), ["INF", "NUEVO"])
+        self.assertEqual(roster.to_dict(), {"INF": [], "NUEVO": [1]})
+
+
+# -----------------------------
+# CARGA DESDE eventos.json Y APODOS ANTIGUOS
+# -----------------------------
+class RosterLoadTest(unittest.TestCase):
+    def test_from_dict_drops_duplicates(self):
+        roster = Roster.from_dict({"INF": [1, 2, 1], "OFICIAL": [2, 2], "DECLINADO": []})
+        self.assertEqual(roster.to_dict(), {"INF": [1, 2], "OFICIAL": [2], "DECLINADO": []})
+        self.assertEqual((roster.count("INF"), roster.count("OFICIAL")), (2, 1))
+        self.assertEqual(len(roster), 2)
+
+    def test_round_trip(self):
+        data = {"INF": [5, 3, "apodo"], "OFICIAL": [3], "DECLINADO": []}
+        self.assertEqual(Roster.from_dict(Roster.from_dict(data).to_dict()), Roster.from_dict(data))
+
+    def test_legacy_refs_are_kept_apart(self):
+        roster = Roster.from_dict({"INF": ["apodo", 7, "123"], "OFICIAL": ["apodo"]})
+        self.assertEqual(roster.legacy_refs(), ["apodo", "123"])
+        self.assertIn("apodo", roster)
+        self.assertEqual(roster.roles_of("apodo"), ["INF", "OFICIAL"])
+        self.assertEqual(len(roster), 3)
+
+    def test_rekey_merges_into_the_id(self):
+        roster = Roster.from_dict({"INF": ["apodo", 7], "OFICIAL": ["apodo"]})
+        self.assertEqual(roster.rekey("apodo", 7), ["INF", "OFICIAL"])
+        self.assertEqual(roster.legacy_refs(), [])
+        self.assertEqual(roster.to_dict(), {"INF": [7], "OFICIAL": [7]})
+        # El apodo duplicaba la inscripción por id en INF: no cuenta dos veces
+        self.assertEqual((roster.count("INF"), roster.count("OFICIAL")), (1, 1))
+        self.assertEqual(roster.rekey("apodo", 7), [])
+
+    def test_non_snowflake_ints_are_legacy(self):
+        roster = Roster(ROLES)
+        for user in (0, -5, 1 << 63, True):
+            roster.add("INF", user)
+        self.assertEqual(len(roster.legacy_refs()), 4)
+        self.assertEqual(roster.count("INF"), 4)
+
+
+# -----------------------------
+# CRECIMIENTO DE LA TABLA Y DE LAS MÁSCARAS
+# -----------------------------
+class RosterGrowthTest(unittest.TestCase):
+    def test_index_table_grows_and_compacts(self):
+        roster = Roster(ROLES)
+        # Snowflakes reales y consecutivos: los dos casos que agrupan el sondeo lineal
+        users = [(1700000000000 << 22) + i for i in range(2000)] + list(range(1, 2000))
+        for user in users:
+            roster.add("INF", user)
+        self.assertEqual(len(roster), len(users))
+        self.assertTrue(all(user in roster for user in users))
+        for user in users[::2]:
+            roster.remove("INF", user)
+        self.assertEqual(list(roster.members("INF")), users[1::2])
+        self.assertEqual(roster.count("INF"), len(users[1::2]))
+        # Los huecos de las bajas no rompen las búsquedas ni las altas de nuevo
+        for user in users[::2]:
+            self.assertNotIn(user, roster)
+            roster.add("OFICIAL", user)
+        self.assertEqual(len(roster), len(users))
+
+    def test_masks_widen_past_eight_roles(self):
+        roles = [f"ROL{i}" for i in range(20)]
+        roster = Roster(roles[:8])
+        roster.add("ROL0", 1)
+        roster.add("ROL7", 2)
+        for role in roles[8:]:
+            roster.add(role, 1)
+        self.assertEqual(roster.roles_of(1), ["ROL0"] + roles[8:])
+        self.assertEqual(list(roster.members("ROL7")), [2])
+        self.assertEqual(list(roster.members("ROL19")), [1])
+        self.assertEqual(roster.switch("ROL7", 1), (True, ["ROL0"] + roles[8:]))
+        self.assertEqual(list(roster.members("ROL7")), [2, 1])
+
+    def test_too_many_roles(self):
+        roster = Roster([f"ROL{i}" for i in range(64)])
+        with self.assertRaises(ValueError):
+            roster.add("ROL64", 1)
+
+    def test_matches_a_reference_model(self):
+        rnd = random.Random(25)
+        roster = Roster(ROLES)
+        reference = {}  # usuario -> roles, en orden de inscripción
+        for _ in range(5000):
+            user = rnd.randrange(1, 300)
+            role = rnd.choice(ROLES)
+            op = rnd.random()
+            if op < 0.45:
+                self.assertEqual(roster.add(role, user), role not in reference.get(user, set()))
+                reference.setdefault(user, set()).add(role)
+            elif op < 0.75:
+                self.assertEqual(roster.remove(role, user), role in reference.get(user, set()))
+                reference.get(user, set()).discard(role)
+            else:
+                old = reference.get(user, set())
+                added, removed = roster.switch(role, user)
+                self.assertEqual(added, role not in old)
+                self.assertEqual(set(removed), old - {role})
+                reference[user] = {role}
+            reference = {u: roles for u, roles in reference.items() if roles}
+            for name in ROLES:
+                self.assertEqual(roster.count(name), sum(name in roles for roles in reference.values()))
+        for name in ROLES:
+            self.assertEqual(set(roster.members(name)), {u for u, roles in reference.items() if name in roles})
+
+
+if __name__ == "__main__":
+    unittest.main()